@@ -0,0 +1,40 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# entering, exiting and reading `with context(name=v):` blocks
+#
+# `python benchmarks/bench_context.py`
+
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bones.core.context import context
+
+
+def contextBenchmark(depth=10, n=100_000):
+    # answers the seconds for n rounds of entering then exiting depth nested `with context(name=v):` blocks, and the
+    # seconds for n reads of a context value
+    def nest(d):
+        if d:
+            with context(benchmarkDepth=d):
+                nest(d - 1)
+    t1 = time.perf_counter()
+    for i in range(n):
+        nest(depth)
+    t2 = time.perf_counter()
+    with context(benchmarkDepth=0):
+        for i in range(n):
+            context.benchmarkDepth
+    t3 = time.perf_counter()
+    return dict(nestedEnterExit=t2 - t1, read=t3 - t2)
+
+
+if __name__ == '__main__':
+    for k, v in contextBenchmark().items():
+        print(f'{k}: {v}')
@@ -0,0 +1,46 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# element updates in a _CoWScope - copy based vs persistent, shared vs unshared
+#
+# `python benchmarks/bench_cow.py`
+
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import coppertop._scopes as scopes
+from coppertop._scopes import _CoWScope
+
+
+def cowBenchmark(n=100_000, numUpdates=100):
+    # answers the seconds for numUpdates of `_.fred[i] = x` on an n entry dict and on an n element list in a
+    # _CoWScope, with the prior value held elsewhere each time (so it's shared and the copy based path must copy), for
+    # the copy based and the persistent scopes - the Unshared entries are the same updates with nothing held, where
+    # only the first write should copy
+    answer = {}
+    for persistent in (False, True):
+        for name, initial in (('dict', lambda: dict.fromkeys(range(n), 0)), ('list', lambda: [0] * n)):
+            for shared in (True, False):
+                _ = _CoWScope(persistent=persistent)
+                _.fred = initial()
+                held, numCopies = [], scopes._numCopies
+                t1 = time.perf_counter()
+                for i in range(numUpdates):
+                    if shared: held.append(_._target['fred'])
+                    _.fred[i] = i
+                t2 = time.perf_counter()
+                label = f'{"persistent" if persistent else "copying"}{name.capitalize()}{"" if shared else "Unshared"}'
+                answer[label] = t2 - t1
+                answer[f'{label}Copies'] = scopes._numCopies - numCopies
+    return answer
+
+
+if __name__ == '__main__':
+    for k, v in cowBenchmark().items():
+        print(f'{k}: {v}')
@@ -0,0 +1,53 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# parse throughput of the hand-written TypeLang parser vs the ANTLR path
+#
+# `python benchmarks/bench_fast_parser.py [file.tl ...]` - defaults to the conformance corpus in tests
+
+import os, sys, time
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [os.path.join(_ROOT, 'src'), os.path.join(_ROOT, 'tests')]
+
+from bones.ts.type_lang import parseTlWithAntlr
+from bones.ts._type_lang.fast_parser import parseTl
+from test_fast_parser import CONFORMANCE_SRCS
+
+
+def _parses(src):
+    try:
+        parseTl(src)
+        return True
+    except Exception:
+        return False
+
+
+def benchmark(srcs, n=20):
+    # answers the parse throughput in chars / second of (antlr, fast)
+    srcs = [src for src in srcs if _parses(src)]
+    numChars = n * sum(len(src) for src in srcs)
+    answer = []
+    for fn in (parseTlWithAntlr, parseTl):
+        t1 = time.perf_counter()
+        for _ in range(n):
+            for src in srcs:
+                fn(src)
+        answer.append(numChars / (time.perf_counter() - t1))
+    return tuple(answer)
+
+
+if __name__ == '__main__':
+    srcs = CONFORMANCE_SRCS
+    if sys.argv[1:]:
+        srcs = []
+        for path in sys.argv[1:]:
+            with open(path) as f:
+                srcs.append(f.read())
+    antlr, fast = benchmark(srcs)
+    print(f'antlr: {antlr:,.0f} chars/s, fast: {fast:,.0f} chars/s ({fast / antlr:.1f}x)')
@@ -0,0 +1,57 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# memory retained per fitsWithin miss with interned Fits and without
+#
+# `python benchmarks/bench_fits_allocations.py` - run as its own process so the atoms it binds and the caches it swaps
+# go no further
+
+import os, sys, random, tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import bones.ts.metatypes as mt
+from bones.ts.metatypes import BTAtom, BTIntersection, fitsWithin, weaken
+
+
+def fitsMissAllocations(pairs):
+    # answers the bytes and blocks, as seen by tracemalloc, retained per fitsWithin miss over the (a, b) pairs with
+    # interned Fits and without. Fresh caches are swapped in so every distinct pair is a miss and the dense table is
+    # bypassed so, as for types beyond it, each answer is kept in the dict cache and thus visible to tracemalloc
+    answer = {}
+    mt.USE_DENSE_FITS = False
+    for interned in (False, True):
+        mt.USE_INTERNED_FITS = interned
+        mt._fitsCache = mt._FitsCache(max(mt.FITS_CACHE_CAPACITY, 2 * len(pairs)))
+        mt._fitsByBinding.clear()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for a, b in pairs: fitsWithin(a, b)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        diffs = after.compare_to(before, 'filename')
+        misses = max(1, mt._fitsCache.misses)
+        answer['interned' if interned else 'fresh'] = dict(
+            misses=misses, bytesPerMiss=sum(d.size_diff for d in diffs) / misses,
+            blocksPerMiss=sum(d.count_diff for d in diffs) / misses
+        )
+    return answer
+
+
+def _pairs(numAtoms=200, numPairs=20000, seed=1):
+    # pairs of atoms and small intersections, bound as _fitsAllocations<i>, with some weakenings so coercions are hit
+    rng = random.Random(seed)
+    atoms = [BTAtom(f'_fitsAllocations{i}') for i in range(numAtoms)]
+    for i in range(0, numAtoms - 1, 10): weaken(atoms[i], atoms[i + 1])
+    newT = lambda: rng.choice(atoms) if rng.random() < 0.5 else BTIntersection(*rng.sample(atoms, rng.randint(2, 3)))
+    return [(newT(), newT()) for _ in range(numPairs)]
+
+
+if __name__ == '__main__':
+    for k, v in fitsMissAllocations(_pairs()).items():
+        print(f'{k}: {v}')
@@ -0,0 +1,45 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# fitsWithinMany vs a loop of fitsWithin over the same candidates
+#
+# `python benchmarks/bench_fits_within_many.py` - run as its own process so the atoms it binds go no further
+
+import os, sys, random, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bones.ts.metatypes import BTAtom, BTIntersection, fitsWithin, fitsWithinMany
+
+
+def fitsWithinManyBenchmark(a, bs, n=1000):
+    # answers the seconds for n rounds of a <: each of bs via fitsWithin and via fitsWithinMany (after a warm up so
+    # both are measuring cache hits) and whether they agree
+    scalar = [fitsWithin(a, b) for b in bs]
+    flags, distances, fitses = fitsWithinMany(a, bs)
+    t1 = time.perf_counter()
+    for _ in range(n): [fitsWithin(a, b) for b in bs]
+    t2 = time.perf_counter()
+    for _ in range(n): fitsWithinMany(a, bs)
+    t3 = time.perf_counter()
+    return dict(scalar=t2 - t1, batch=t3 - t2, agree=scalar == fitses)
+
+
+def _candidates(numAtoms=50, numBs=20, seed=1):
+    # an intersection and numBs candidates, some made from its members, drawn from atoms bound as
+    # _fitsWithinManyBenchmark<i>
+    rng = random.Random(seed)
+    atoms = [BTAtom(f'_fitsWithinManyBenchmark{i}') for i in range(numAtoms)]
+    a = BTIntersection(*rng.sample(atoms, 4))
+    bs = [rng.choice(a.types) if rng.random() < 0.5 else rng.choice(atoms) for _ in range(numBs)]
+    return a, bs
+
+
+if __name__ == '__main__':
+    for k, v in fitsWithinManyBenchmark(*_candidates()).items():
+        print(f'{k}: {v}')
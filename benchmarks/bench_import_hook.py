@@ -0,0 +1,44 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# cost of coppertop's import hook over the plain import machinery
+#
+# `python benchmarks/bench_import_hook.py`
+
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from coppertop import pipe
+
+
+def importHookOverhead(name='json', fromlist=('dumps', 'loads'), n=100_000):
+    # answers the ns per `from name import *fromlist` for the import machinery alone, for the hook fast path and for
+    # the hook slow path (an importer that holds jones fns)
+    untracked = {'__name__': '_importHookOverhead_untracked'}
+    tracked = {'__name__': '_importHookOverhead_tracked'}
+    pipe._modsWithFns.add(tracked['__name__'])
+    try:
+        answer = {}
+        for label, fn, g in (
+            ('without', sys._preCoppertopImportFn, untracked),
+            ('fastPath', pipe._coppertopImportFn, untracked),
+            ('slowPath', pipe._coppertopImportFn, tracked),
+        ):
+            t1 = time.perf_counter_ns()
+            for _ in range(n):
+                fn(name, g, None, fromlist, 0)
+            answer[label] = (time.perf_counter_ns() - t1) / n
+        return answer
+    finally:
+        pipe._modsWithFns.discard(tracked['__name__'])
+
+
+if __name__ == '__main__':
+    for label, ns in importHookOverhead().items():
+        print(f'{label}: {ns:,.0f} ns')
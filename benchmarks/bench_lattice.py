@@ -0,0 +1,54 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# intersection fitting via the bitset lattice vs via _partitionIntersectionTLs
+#
+# `python benchmarks/bench_lattice.py` - run as its own process so the atoms it binds go no further
+
+import os, sys, random, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bones.core.sentinels import Missing
+from bones.ts.metatypes import BTAtom, BTIntersection, _Lattice, _fitsViaPartition
+
+
+def latticeBenchmark(numAtoms=1000, numPairs=10000, maxMembers=5, seed=1):
+    # answers the seconds to fit numPairs intersection pairs drawn from numAtoms (unspaced, implicit) atoms via
+    # _partitionIntersectionTLs and via _Lattice, plus the number of pairs that disagree (which should be 0). The atoms
+    # are bound as _latticeBenchmark<i> in this process's type manager.
+    rng = random.Random(seed)
+    atoms = [BTAtom(f'_latticeBenchmark{i}') for i in range(numAtoms)]
+    newT = lambda: BTIntersection(*rng.sample(atoms, rng.randint(1, maxMembers)))
+    pairs = []
+    for _ in range(numPairs):
+        a = newT()
+        # half the time make b from some of a's members (so a usually fits) else from anywhere
+        if rng.random() < 0.5 and a.__class__ == BTIntersection:
+            b = BTIntersection(*rng.sample(a.types, rng.randint(1, len(a.types))))
+        else:
+            b = newT()
+        if a.id != b.id and (a.__class__ == BTIntersection or b.__class__ == BTIntersection): pairs.append((a, b))
+    typesOf = lambda t: t.types if t.__class__ == BTIntersection else (t,)
+    lattice = _Lattice()
+    for a, b in pairs: lattice.fits(a, b)            # assign the ordinals and masks outside the timing
+
+    t1 = time.perf_counter()
+    viaPartition = [_fitsViaPartition(typesOf(a), typesOf(b)) for a, b in pairs]
+    t2 = time.perf_counter()
+    viaLattice = [lattice.fits(a, b) for a, b in pairs]
+    t3 = time.perf_counter()
+
+    summary = lambda f: (bool(f.fits), f.distance if f.fits else 0)
+    disagreements = sum(1 for p, l in zip(viaPartition, viaLattice) if l is not Missing and summary(p) != summary(l))
+    return dict(pairs=len(pairs), partition=t2 - t1, lattice=t3 - t2, disagreements=disagreements, **lattice.stats())
+
+
+if __name__ == '__main__':
+    for k, v in latticeBenchmark().items():
+        print(f'{k}: {v}')
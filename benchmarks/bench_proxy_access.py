@@ -0,0 +1,49 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# reads through a _CoWScope's proxies
+#
+# `python benchmarks/bench_proxy_access.py`
+
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from coppertop._scopes import _CoWScope
+
+
+class Obj: pass
+
+
+def proxyAccessBenchmark(n=100_000):
+    # answers the seconds for n reads of an element, of a nested element, of a list method and of an object's attribute
+    # through a _CoWScope
+    answer = {}
+    for persistent in (False, True):
+        _ = _CoWScope(persistent=persistent)
+        _.fred = list(range(100))
+        _.joe = {'a': [1, 2, 3]}
+        _.obj = Obj()
+        _.obj.age = 42
+        for name, read in (
+            ('element', lambda: _.fred[5]),
+            ('nested', lambda: _.joe['a'][1]),
+            ('method', lambda: _.fred.count),
+            ('attribute', lambda: _.obj.age),
+        ):
+            t1 = time.perf_counter()
+            for i in range(n):
+                read()
+            t2 = time.perf_counter()
+            answer[f'{"persistent" if persistent else "copying"}{name.capitalize()}'] = t2 - t1
+    return answer
+
+
+if __name__ == '__main__':
+    for k, v in proxyAccessBenchmark().items():
+        print(f'{k}: {v}')
@@ -0,0 +1,89 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# updateSchemaVarsWith (copy-on-change) vs updateSchemaVarsWithCopying (the prior version that copies on every call)
+#
+# `python benchmarks/bench_schema_vars.py` - run as its own process so the atoms it binds go no further
+
+import os, sys, random, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bones.core.sentinels import Missing
+from bones.jones import SchemaError
+from bones.ts.metatypes import BTAtom, T, schemaVariableForOrd, updateSchemaVarsWith, _fitsAt, _bindingFits, _weakenings
+
+
+def updateSchemaVarsWithCopying(runningSchemaVars, runningDistance, result):
+    # the implementation updateSchemaVarsWith replaced
+    resultFits, resultSVRs, resultDistance = result
+    if not resultFits: raise ValueError(f'Can only update schemaVars when a <: b which is not the case here')
+    runningSchemaVars = dict(runningSchemaVars)
+    for TNew, tNew in resultSVRs.items():
+        if TNew is T:
+            continue   # OPEN: implies that T cannot be part of a schema only a general placeholder. ponder this some more
+        if (tRunning := runningSchemaVars.get(TNew, Missing)) is Missing:
+            runningSchemaVars[TNew] = tNew
+        elif tNew != tRunning:
+            weakened = False
+            if tRunning not in _weakenings.get(tNew, ()):
+                if tNew in _weakenings.get(tRunning, ()):
+                    runningSchemaVars[TNew] = tNew
+                    weakened = True
+            if not weakened:
+                raise SchemaError(f'{TNew} could be {tRunning} or {tNew} but currently we don\'t support analysing conflicting schema vars - can be probably be done with unions')
+        else:
+            # no change
+            pass
+    return runningSchemaVars, runningDistance + resultDistance
+
+
+def updateSchemaVarsWithBenchmark(numSigs=10000, numArgs=4, numTs=3, seed=1):
+    # folds the per argument fits of numSigs T heavy signatures (e.g. (T1, T1, T2, txt)) as _distancesEtAl does,
+    # answering the seconds taken by the copying and copy-on-change implementations, the dicts each allocated and
+    # whether the answers agree. The atoms are bound as _schemaVarsBenchmark<i> in this process's type manager.
+    rng = random.Random(seed)
+    Ts = [schemaVariableForOrd(i) for i in range(1, numTs + 1)]
+    ts = [BTAtom(f'_schemaVarsBenchmark{i}') for i in range(numTs)]
+    sigs = []
+    for _ in range(numSigs):
+        sig = []
+        for _ in range(numArgs):
+            if rng.random() < 0.25:
+                sig.append(_fitsAt(1))
+            else:
+                i = rng.randrange(numTs)
+                sig.append(_bindingFits(Ts[i], ts[i], 0))
+        sigs.append(sig)
+
+    def run(update):
+        answers, dicts = [], 0
+        for sig in sigs:
+            schemaVars, distance = {}, 0
+            dicts += 1
+            for fits in sig:
+                newSchemaVars, distance = update(schemaVars, distance, fits)
+                if newSchemaVars is not schemaVars: dicts += 1
+                schemaVars = newSchemaVars
+            answers.append((schemaVars, distance))
+        return answers, dicts
+
+    t1 = time.perf_counter()
+    copyingAnswers, copyingDicts = run(updateSchemaVarsWithCopying)
+    t2 = time.perf_counter()
+    answers, dicts = run(updateSchemaVarsWith)
+    t3 = time.perf_counter()
+    return dict(
+        copying=t2 - t1, copyOnChange=t3 - t2, copyingDicts=copyingDicts, copyOnChangeDicts=dicts,
+        agree=copyingAnswers == answers
+    )
+
+
+if __name__ == '__main__':
+    for k, v in updateSchemaVarsWithBenchmark().items():
+        print(f'{k}: {v}')
@@ -10,12 +10,19 @@
 import sys
 if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
 
-from contextlib import contextmanager as _contextmanager
+from contextvars import ContextVar as _ContextVar, Token as _Token
 from bones.core.sentinels import Missing
 from bones.core.errors import ProgrammerError
 
-if not hasattr(sys, '_ContextStack'):
-    sys._ContextStack = {}
+# each context name has a ContextVar so a push is a set and a pop is a reset of the token from that set - both O(1) -
+# and a thread or asyncio task sees only the values set in its own context. Kept on sys so reloading this module
+# doesn't lose them
+if not hasattr(sys, '_ContextVars'):
+    sys._ContextVars = {}
+if not hasattr(sys, '_ContextDefaults'):
+    sys._ContextDefaults = {}       # process wide values seen whenever a name hasn't been set in the current context
+
+_NOT_SET = object()
 
 
 
@@ -23,6 +30,11 @@ if not hasattr(sys, '_ContextStack'):
 # context
 # **********************************************************************************************************************
 
+def _varFor(name):
+    if (var := sys._ContextVars.get(name, Missing)) is Missing:
+        var = sys._ContextVars[name] = _ContextVar(name)
+    return var
+
 class _Context:
 
     def __call__(self, *args, **kwargs):
@@ -30,27 +42,42 @@ class _Context:
         return _setContext(**kwargs)
 
     def __getattr__(self, name):
-        return sys._ContextStack.get(name, [Missing])[-1]
+        if (var := sys._ContextVars.get(name, Missing)) is not Missing:
+            if (answer := var.get(_NOT_SET)) is not _NOT_SET:
+                return answer
+        return sys._ContextDefaults.get(name, Missing)
 
     def __setattr__(self, name, value):
         # if there is no context for the name, i.e.  established via with `context(name=val):`, then this have no effect
-        sys._ContextStack.get(name, [Missing])[-1] = value
-
-
-@_contextmanager
-def _setContext(*args, **kwargs):
-    # push context
-    for k, v in kwargs.items():
-        sys._ContextStack.setdefault(k, []).append(v)
-    answer = None
-    try:
-        yield answer
-    finally:
-        # pop context, deleting if empty
-        for k in kwargs.keys():
-            sys._ContextStack[k] = sys._ContextStack[k][:-1]
-            if len(sys._ContextStack[k]) == 0:
-                del sys._ContextStack[k]
+        if (var := sys._ContextVars.get(name, Missing)) is not Missing and var.get(_NOT_SET) is not _NOT_SET:
+            var.set(value)      # undone along with the with's value on exit as that resets to before its token
+        elif name in sys._ContextDefaults:
+            sys._ContextDefaults[name] = value
+
+
+class _setContext:
+    __slots__ = ['_valueByName', '_tokens']
+
+    def __init__(self, **kwargs):
+        self._valueByName = kwargs
+        self._tokens = Missing
+
+    def __enter__(self):
+        # push context
+        self._tokens = [_varFor(k).set(v) for k, v in self._valueByName.items()]
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # pop context - in reverse so a name given twice is restored properly
+        for token in reversed(self._tokens):
+            try:
+                token.var.reset(token)
+            except ValueError:
+                # the token was made in another Context, e.g. a generator that entered the with and has since been
+                # resumed under copy_context().run, so just put back the value it replaced
+                token.var.set(_NOT_SET if token.old_value is _Token.MISSING else token.old_value)
+        self._tokens = Missing
+        return False
 
 context = _Context()
 
@@ -62,9 +89,9 @@ def _EE(x):
     print(str(x), file = sys.stderr)
     return x
 
-sys._ContextStack.setdefault('PP', []).append(_PP)
-sys._ContextStack.setdefault('NB', []).append(_EE)
-sys._ContextStack.setdefault('EE', []).append(_EE)
+sys._ContextDefaults.setdefault('PP', _PP)
+sys._ContextDefaults.setdefault('NB', _EE)
+sys._ContextDefaults.setdefault('EE', _EE)
 
 if __name__ == '__main__':
     with context(fred=1):
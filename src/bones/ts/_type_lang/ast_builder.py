@@ -60,7 +60,7 @@ class TypeLangAstBuilder:
         self.ast.append(
             BindNode(
                 ctx.name_.text,
-                self._nodeByCtx[ctx.expr_],
+                self._getNode(ctx.expr_),
                 SrcLoc(ctx)
             )
         )
@@ -115,7 +115,7 @@ class TypeLangAstBuilder:
 
     def expr_in(self, ctx):
         interCtx = ctx.expr_
-        while ctxLabel(interCtx) == 'expr_paren':
+        while ctxLabel(interCtx) == 'expr_parens':
             interCtx = interCtx.expr_
         if ctxLabel(interCtx) in ('inter', 'inter_high', 'inter_low'):
             inter = self._nodeByCtx[interCtx]
@@ -191,7 +191,7 @@ class TypeLangAstBuilder:
         self.ast.append(
             BindNode(
                 ctx.name_.text,
-                TbcNode(self.get(ctx._atom), SrcLoc(ctx)),
+                TbcNode(self.get(ctx.atom_), SrcLoc(ctx)),
                 SrcLoc(ctx)
             )
         )
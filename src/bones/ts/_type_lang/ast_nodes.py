@@ -25,6 +25,14 @@ class SrcLoc:
             self.l2 = ctx.stop.line
             self.s1 = ctx.start.start
             self.s2 = ctx.stop.stop
+    @classmethod
+    def fromSpan(cls, l1, l2, s1, s2):
+        loc = cls.__new__(cls)
+        loc.l1 = l1
+        loc.l2 = l2
+        loc.s1 = s1
+        loc.s2 = s2
+        return loc
 
 
 class TLNode:
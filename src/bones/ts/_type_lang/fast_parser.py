@@ -0,0 +1,363 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# A hand-written recursive descent (Pratt for expr) parser for TypeLang.g4 that produces the same AST nodes, with the
+# same source locations, as running the ANTLR generated parser and walking the tree with TypeLangAstBuilder - but
+# without the antlr4 runtime.
+#
+# Keep in step with TypeLang.g4 and ast_builder.py. The ANTLR specifics that are reproduced:
+#   - the lexer takes the longest match with ties going to the earliest rule, so keywords win over NAME and e.g. "T1"
+#     is a SCHEMA_VAR, "Na" a SEQ_VAR but "T123" and "Nab" are NAMEs, "*(" and "}}" are single tokens
+#   - the left recursive alternatives of expr bind tighter the earlier they appear in the rule, i.e. && & + * ** ^ [] in
+#     (the binary ones left associative), with the rhs of "N **" parsed at the precedence of map
+#   - nested intersections, unions and tuples are flattened unless parenthesised
+#   - a source that ends after its assignments gets a DoneNode, one that ends in an expression gets a ReturnNode
+#
+# Syntax errors raise TLError (ANTLR reports and tries to recover).
+#
+# tests/test_fast_parser.py checks conformance with the ANTLR path and benchmarks/bench_fast_parser.py compares the two.
+
+
+import sys
+if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
+
+import re
+
+from bones.core.sentinels import Missing
+from bones.core.errors import NotYetImplemented
+from bones.ts.core import TLError
+from bones.ts._type_lang.ast_nodes import SrcLoc, BindNode, MutableNode, AtomNode, CheckImplicitTbcsAreConfirmedNode, \
+    DoneNode, ExprNode, GetNode, InterNode, TbcNode, ReturnNode
+
+
+
+# **********************************************************************************************************************
+# lexer
+# **********************************************************************************************************************
+
+NAME = 'NAME'
+SCHEMA_VAR = 'SCHEMA_VAR'
+SEQ_VAR = 'SEQ_VAR'
+EOF = '<EOF>'
+
+_KEYWORDS = frozenset(['atom', 'explicit', 'in', 'implicitly', 'tbc'])
+
+_TOKEN_RE = re.compile(
+    r'(?P<ws>(?:[ \t]|\r?\n|\r)+)'
+    r'|(?P<comment>//[^\r\n]*\r?\n)'
+    r'|(?P<id>[A-Za-z_][A-Za-z0-9_]*)'
+    r'|(?P<op>\{\{|\}\}|&&|\*\*|\*\(|[:()&+*{}^\[\],])'
+)
+_SCHEMA_VAR_RE = re.compile(r'T[0-9][0-9]?')
+_SEQ_VAR_RE = re.compile(r'N(?:[0-9][0-9]?|[a-z])?')
+
+
+class _Tok:
+    __slots__ = ['kind', 'text', 'start', 'stop', 'line']
+    def __init__(self, kind, text, start, stop, line):
+        self.kind = kind
+        self.text = text
+        self.start = start          # index of the first char
+        self.stop = stop            # index of the last char (inclusive, as ANTLR)
+        self.line = line
+    def __repr__(self):
+        return f'{self.kind}<"{self.text}"@{self.line}>'
+
+
+def tokenise(src):
+    # answers the default channel tokens of src ending with EOF
+    toks = []
+    match = _TOKEN_RE.match
+    pos, line, n = 0, 1, len(src)
+    while pos < n:
+        if (m := match(src, pos)) is None:
+            raise TLError(f'token recognition error at {_lineCol(src, pos, line)} - "{src[pos]}"')
+        end = m.end()
+        kind = m.lastgroup
+        if kind == 'id':
+            text = m.group()
+            if text in _KEYWORDS:
+                toks.append(_Tok(text, text, pos, end - 1, line))
+            elif _SCHEMA_VAR_RE.fullmatch(text):
+                toks.append(_Tok(SCHEMA_VAR, text, pos, end - 1, line))
+            elif _SEQ_VAR_RE.fullmatch(text):
+                toks.append(_Tok(SEQ_VAR, text, pos, end - 1, line))
+            else:
+                toks.append(_Tok(NAME, text, pos, end - 1, line))
+        elif kind == 'op':
+            text = m.group()
+            toks.append(_Tok(text, text, pos, end - 1, line))
+        else:
+            line += src.count('\n', pos, end)
+        pos = end
+    toks.append(_Tok(EOF, '<EOF>', n, n - 1, line))
+    return toks
+
+
+def _lineCol(src, pos, line):
+    return f'{line}:{pos - src.rfind(chr(10), 0, pos) - 1}'
+
+
+
+# **********************************************************************************************************************
+# parser
+# **********************************************************************************************************************
+
+# an expression answers a tuple (label, arg, startTok, stopTok) where label is the ANTLR alternative and arg is:
+#   inter_high, inter, inter_low, union, tuple - (lhs, rhs) - the node is created by the parent (see
+#       TypeLangAstBuilder.inter) so a parent of the same kind can flatten them
+#   expr_parens - the inner expression
+#   otherwise - the node
+
+_INTERS = ('inter', 'inter_low')
+_COLLECTED = {'inter_high': 'inter_high', 'inter': _INTERS, 'inter_low': _INTERS, 'union': 'union', 'tuple': 'tuple'}
+
+
+class TypeLangParser:
+    __slots__ = ['_src', '_toks', '_i', 'ast']
+
+    def __init__(self, src):
+        self._src = src
+        self._toks = tokenise(src)
+        self._i = 0
+        self.ast = []
+
+    def tl_body(self):
+        toks = self._toks
+        first = toks[0]
+        numAssigns = 0
+        while toks[self._i].kind == NAME and toks[self._i + 1].kind == ':':
+            self._assign()
+            numAssigns += 1
+        if toks[self._i].kind == EOF:
+            if not numAssigns: self._raiseUnexpected()
+            self.ast.append(DoneNode(_loc(first, toks[self._i - 1])))
+        else:
+            e = self._expr(0)
+            self.ast.append(ReturnNode(self._node(e), _loc(e[2], e[3])))
+            if toks[self._i].kind != EOF: self._raiseUnexpected()
+        return self.ast
+
+
+    # RULES
+
+    def _assign(self):
+        toks = self._toks
+        name = toks[self._i]
+        self._i += 2
+        t = toks[self._i]
+        if t.kind == 'atom' or (t.kind == NAME and toks[self._i + 1].kind == ':'):
+            self._assign_atom(name)
+        elif t.kind == 'tbc':
+            # prealloc_in, prealloc
+            self._i += 1
+            if toks[self._i].kind == 'in':
+                self._i += 1
+                space = self._getNode(self._get())
+            else:
+                space = Missing
+            loc = _loc(name, toks[self._i - 1])
+            self.ast.append(BindNode(name.text, TbcNode(space, loc), loc))
+        else:
+            # assign_expr_to
+            e = self._expr(0)
+            loc = _loc(name, e[3])
+            self.ast.append(BindNode(name.text, self._node(e), loc))
+            self.ast.append(CheckImplicitTbcsAreConfirmedNode(loc))
+
+    def _assign_atom(self, name):
+        # NAME ':' has been consumed, answers the bind node, and the label and space of the root atom for atom_multi
+        toks = self._toks
+        t = toks[self._i]
+        explicit, space, implicitly = False, Missing, Missing
+        if t.kind == NAME and toks[self._i + 1].kind == ':':
+            # atom_multi
+            self._i += 2
+            _, label, rootSpace = self._assign_atom(t)
+            if label == 'atom':
+                pass
+            elif label == 'atom_in':
+                space = self._getNode(rootSpace)
+            else:
+                raise NotYetImplemented(label)
+        else:
+            self._expect('atom')
+            label, rootSpace = 'atom', Missing
+            k = toks[self._i].kind
+            if k == 'explicit':
+                self._i += 1
+                explicit, label = True, 'atom_explicit'
+                if toks[self._i].kind == 'in':
+                    self._i += 1
+                    label, rootSpace = 'atom_explicit_in', self._get()
+                    space = self._getNode(rootSpace)
+            elif k == 'in':
+                self._i += 1
+                label, rootSpace = 'atom_in', self._get()
+                if toks[self._i].kind == 'implicitly':
+                    self._i += 1
+                    label, implicitly = 'atom_in_implicitly', self._get()
+                    space, implicitly = self._getNode(rootSpace), self._getNode(implicitly)
+                else:
+                    space = self._getNode(rootSpace)
+            elif k == 'implicitly':
+                self._i += 1
+                label = 'atom_implicitly'
+                implicitly = self._getNode(self._get())
+        loc = _loc(name, toks[self._i - 1])
+        self.ast.append(bind := BindNode(name.text, AtomNode(explicit, space, implicitly, loc), loc))
+        return bind, label, rootSpace
+
+    def _get(self):
+        # answers the NAME token or for atom_in_parens the bind node of the atom
+        toks = self._toks
+        t = toks[self._i]
+        if t.kind == NAME:
+            self._i += 1
+            return t
+        self._expect('(')
+        name = self._expect(NAME)
+        self._expect(':')
+        bind, _, _ = self._assign_atom(name)
+        self._expect(')')
+        return bind
+
+    def _getNode(self, get):
+        return GetNode(get.text, _loc(get, get)) if isinstance(get, _Tok) else get
+
+    def _expr(self, p):
+        toks = self._toks
+        lhs = self._primary()
+        while True:
+            op = toks[self._i].kind
+            if op == '&&' and p <= 15:
+                self._i += 1
+                lhs = ('inter_high', (lhs, rhs := self._expr(16)), lhs[2], rhs[3])
+            elif op == '&' and p <= 14:
+                self._i += 1
+                lhs = ('inter', (lhs, rhs := self._expr(15)), lhs[2], rhs[3])
+            elif op == '+' and p <= 13:
+                self._i += 1
+                lhs = ('union', (lhs, rhs := self._expr(14)), lhs[2], rhs[3])
+            elif op == '*' and p <= 12:
+                self._i += 1
+                lhs = ('tuple', (lhs, rhs := self._expr(13)), lhs[2], rhs[3])
+            elif op == '**' and p <= 8:
+                self._i += 1
+                rhs = self._expr(9)
+                lhs = ('map', ExprNode('map', [self._node(lhs), self._node(rhs)], _loc(lhs[2], rhs[3])), lhs[2], rhs[3])
+            elif op == '^' and p <= 7:
+                self._i += 1
+                rhs = self._expr(8)
+                lhs = ('fn', ExprNode('fn', (self._node(lhs), self._node(rhs)), _loc(lhs[2], rhs[3])), lhs[2], rhs[3])
+            elif op == '[' and p <= 6:
+                self._i += 1
+                rhs = self._expr(0)
+                lhs = ('inter_low', (lhs, rhs), lhs[2], self._expect(']'))
+            elif op == 'in' and p <= 1:
+                self._i += 1
+                inter = lhs
+                while inter[0] == 'expr_parens':
+                    inter = inter[1]
+                if inter[0] not in ('inter', 'inter_high', 'inter_low'):
+                    raise TLError('only intersections, recursive intersections or atoms can be "in" a space')
+                inter = self._node(inter)
+                inter.space = self._getNode(self._get())
+                lhs = ('expr_in', inter, lhs[2], toks[self._i - 1])
+            else:
+                return lhs
+
+    def _primary(self):
+        toks = self._toks
+        t = toks[self._i]
+        k = t.kind
+        if k == NAME:
+            self._i += 1
+            return 'name_or_atom', GetNode(t.text, _loc(t, t)), t, t
+        if k == '(':
+            if toks[self._i + 1].kind == NAME and toks[self._i + 2].kind == ':':
+                return 'name_or_atom', self._get(), t, toks[self._i - 1]
+            self._i += 1
+            e = self._expr(0)
+            return 'expr_parens', e, t, self._expect(')')
+        if k == SCHEMA_VAR:
+            self._i += 1
+            return 'schema_var', GetNode(t.text, _loc(t, t)), t, t
+        if k == SEQ_VAR:
+            self._i += 1
+            self._expect('**')
+            rhs = self._expr(9)
+            return 'seq', ExprNode('seq', [self._node(rhs)], _loc(t, rhs[3])), t, rhs[3]
+        if k == '*(':
+            self._i += 1
+            e = self._expr(0)
+            stop = self._expect(')')
+            return 'mutable', MutableNode(self._node(e), _loc(t, stop)), t, stop
+        if k == '{' or k == '{{':
+            self._i += 1
+            fields = self._fields()
+            stop = self._expect('}' if k == '{' else '}}')
+            op = 'struct' if k == '{' else 'rec'
+            return op, ExprNode(op, tuple(fields), _loc(t, stop)), t, stop
+        self._raiseUnexpected()
+
+    def _fields(self):
+        fields = []
+        while True:
+            name = self._expect(NAME)
+            self._expect(':')
+            fields.append((name.text, self._node(self._expr(0))))
+            if self._toks[self._i].kind != ',': return fields
+            self._i += 1
+
+
+    # UTILITIES
+
+    def _collectInto(self, types, e):
+        # as TypeLangAstBuilder._collectInters et al - including the order
+        _, (lhs, rhs), _, _ = e
+        self._collectInto(types, lhs) if lhs[0] in _COLLECTED[e[0]] else types.insert(0, self._node(lhs))
+        self._collectInto(types, rhs) if rhs[0] in _COLLECTED[e[0]] else types.append(self._node(rhs))
+        return types
+
+    def _node(self, e):
+        label, arg, start, stop = e
+        if label in _COLLECTED:
+            types = tuple(self._collectInto([], e))
+            if label == 'union' or label == 'tuple':
+                return ExprNode(label, types, _loc(start, stop))
+            return InterNode(types, Missing, _loc(start, stop))
+        if label == 'expr_parens':
+            return self._node(arg)
+        return arg
+
+    def _expect(self, kind):
+        t = self._toks[self._i]
+        if t.kind != kind: self._raiseUnexpected(kind)
+        self._i += 1
+        return t
+
+    def _raiseUnexpected(self, expected=Missing):
+        t = self._toks[self._i]
+        found = 'end of input' if t.kind == EOF else f'"{t.text}"'
+        expecting = '' if expected is Missing else f' expecting "{expected}"'
+        raise TLError(f'syntax error at {_lineCol(self._src, t.start, t.line)} - unexpected {found}{expecting}')
+
+
+def _loc(startTok, stopTok):
+    return SrcLoc.fromSpan(startTok.line, stopTok.line, startTok.start, stopTok.stop)
+
+
+def parseTl(src):
+    # answers the list of AST nodes for src
+    return TypeLangParser(src).tl_body()
+
+
+
+if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__ + ' - done')
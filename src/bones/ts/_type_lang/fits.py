@@ -34,49 +34,147 @@ bmtsvr = 10
 Fits = collections.namedtuple('Fits', ['fits', 'tByT'])
 Fits.__bool__ = lambda self: self.fits
 
+# shared answers - the tByT of an answer may be shared so must never be mutated
 IDENTICAL = Fits(True, {})
+FITS = Fits(True, {})                   # fits without binding any schema variables
+DOES_NOT_FIT = Fits(False, {})
+
+class _FitsCall:
+    # the state of one outermost fitsWithin - the pairs currently being fitted (a pair met again whilst it's in progress,
+    # i.e. a recursive type, is assumed to fit) and the number of such assumptions made. Anything answered under an
+    # assumption (other than the outermost pair) is not cached. Being per call nothing is shared between type managers
+    # or left behind by an exception
+    __slots__ = ['inProgress', 'numAssumptions']
+
+    def __init__(self):
+        self.inProgress = set()
+        self.numAssumptions = 0
+
 
 def fitsWithin(tm, A, B):
+    # answers a Fits for A <: B using only the type manager's structural queries - no weakenings, distances or Python
+    # classes, for that see metatypes.fitsWithin. Answers, including negative ones, are cached on tm._fitsCache unless
+    # either type is still to be defined
+    return _fitsWithinIn(tm, A, B, Missing)
+
+
+def _fitsWithinIn(tm, A, B, call):
     if A.id == B.id: return IDENTICAL
-    fits, tByT = tm._fitsCache.get((A.id, B.id), (Missing, Missing))
-    if fits is not Missing: return fits
-    if type(A).__name__ == 'TBC': A = A.btype
-    if type(B).__name__ == 'TBC': B = B.btype
-    tm._fitsCache[(A.id, B.id)] = answer = _fitsWithin(tm, A, B)
+    key = (A.id, B.id)
+    if (answer := tm._fitsCache.get(key, Missing)) is not Missing: return answer
+    if call is Missing:
+        call = _FitsCall()
+    elif key in call.inProgress:
+        call.numAssumptions += 1
+        return FITS
+    if type(A).__name__ == 'TBC': A = A.btype or A
+    if type(B).__name__ == 'TBC': B = B.btype or B
+    if tm.bmtid(A) == bmtnul or tm.bmtid(B) == bmtnul: return DOES_NOT_FIT
+    numAssumptions = call.numAssumptions
+    call.inProgress.add(key)
+    try:
+        answer = _fitsWithin(tm, A, B, call)
+    finally:
+        call.inProgress.discard(key)
+    if call.numAssumptions == numAssumptions or not call.inProgress:
+        tm._fitsCache[key] = answer
     return answer
 
-def _fitsWithin(tm, A, B):
-    if tm.bmtid(A) == bmtatm:
-        if tm.bmtid(B) == bmtatm:
-            return Fits(A.id == B.id, {})
-        elif tm.bmtid(B) == bmtuni:
-            for t in tm.unionTl(B):
-                if fitsWithin(tm, A, t):
-                    return Fits(True, {})
-            return Fits(False, {})
-        elif tm.bmtid(B) == bmtsvr:
-            return Fits(True, {B: A})
-        else:
-            return Fits(False, {})
-    elif tm.bmtid(A) == bmtint:
-        if tm.bmtid(B) == bmtint:
-            As = set(tm.intersectionTl(A))
-            Bs = set(tm.intersectionTl(B))
-            if len(Bs.difference(As)) == 0:
-                return Fits(True, {})
-            return Fits(False, {})
-        for t in tm.intersectionTl(A):
-            if fitsWithin(tm, t, B):
-                return Fits(True, {})
-        return Fits(False, {})
-    elif tm.bmtid(A) == bmtuni:
-        if tm.bmtid(B) == bmtuni:
-            for t in tm.unionTL(A):
-                if not fitsWithin(tm, t, B):
-                    return Fits(False, {})
-            return Fits(True, {})
-        else:
-            return Fits(False, {})
+
+def _fitsWithin(tm, A, B, call):
+    bmtA, bmtB = tm.bmtid(A), tm.bmtid(B)
+
+    if bmtB == bmtsvr:
+        # anything except an explicit <: a schema variable
+        if bmtA == bmtatm and tm.isExplicit(A): return DOES_NOT_FIT
+        return Fits(True, {B: A})
+
+    if bmtA == bmtuni:
+        # every member of A must fit B
+        As = tm.unionTl(A)
+        return _fitsAll(tm, As, (B,) * len(As), call)
+
+    if bmtB == bmtuni:
+        # A must fit one of B's members - the first wins
+        for t in tm.unionTl(B):
+            if (fits := _fitsWithinIn(tm, A, t, call)): return fits
+        return DOES_NOT_FIT
+
+    if bmtA == bmtint:
+        As = tm.intersectionTl(A)
+        if bmtB == bmtint:
+            # every member of B must be fitted by one of A's
+            tByT = {}
+            for tB in tm.intersectionTl(B):
+                if tB in As: continue
+                for tA in As:
+                    if (fits := _fitsWithinIn(tm, tA, tB, call)):
+                        if (tByT := _merge(tByT, fits)) is Missing: return DOES_NOT_FIT
+                        break
+                else:
+                    return DOES_NOT_FIT
+            return Fits(True, tByT) if tByT else FITS
+        # one member of A must fit B
+        for t in As:
+            if (fits := _fitsWithinIn(tm, t, B, call)): return fits
+        return DOES_NOT_FIT
+
+    if bmtB == bmtint:
+        # A must fit every member of B
+        Bs = tm.intersectionTl(B)
+        return _fitsAll(tm, (A,) * len(Bs), Bs, call)
+
+    if bmtA != bmtB:
+        return DOES_NOT_FIT
+
+    if bmtA == bmtatm:
+        return DOES_NOT_FIT                 # A.id != B.id
+
+    elif bmtA == bmttup:
+        As, Bs = tm.tupleTl(A), tm.tupleTl(B)
+        if len(As) != len(Bs): return DOES_NOT_FIT
+        return _fitsAll(tm, As, Bs, call)
+
+    elif bmtA == bmtstr:
+        if tuple(tm.structNames(A)) != tuple(tm.structNames(B)): return DOES_NOT_FIT
+        return _fitsAll(tm, tm.structTl(A), tm.structTl(B), call)
+
+    elif bmtA == bmtseq:
+        return _fitsWithinIn(tm, tm.seqT(A), tm.seqT(B), call)
+
+    elif bmtA == bmtmap:
+        return _fitsAll(tm, (tm.mapTK(A), tm.mapTV(A)), (tm.mapTK(B), tm.mapTV(B)), call)
+
+    elif bmtA == bmtfnc:
+        # args are contravariant, the return is covariant
+        argsA, argsB = tuple(tm.tupleTl(tm.fnTArgs(A))), tuple(tm.tupleTl(tm.fnTArgs(B)))
+        if len(argsA) != len(argsB): return DOES_NOT_FIT
+        return _fitsAll(tm, argsB + (tm.fnTRet(A),), argsA + (tm.fnTRet(B),), call)
+
+    elif bmtA == bmtsvr:
+        return DOES_NOT_FIT                 # A.id != B.id
+
     else:
         raise NotYetImplemented('#3')
 
+
+def _fitsAll(tm, As, Bs, call):
+    # answers the Fits for As[i] <: Bs[i] for all i with the schema variable bindings merged
+    tByT = {}
+    for tA, tB in zip(As, Bs):
+        if not (fits := _fitsWithinIn(tm, tA, tB, call)): return DOES_NOT_FIT
+        if (tByT := _merge(tByT, fits)) is Missing: return DOES_NOT_FIT
+    return Fits(True, tByT) if tByT else FITS
+
+
+def _merge(tByT, fits):
+    # answers the bindings in tByT and fits, or Missing if they bind a schema variable to different types
+    if not fits.tByT: return tByT
+    if not tByT: return fits.tByT
+    merged = dict(tByT)
+    for T, t in fits.tByT.items():
+        if (current := merged.get(T, Missing)) is Missing:
+            merged[T] = t
+        elif current != t:
+            return Missing
+    return merged
@@ -30,9 +30,32 @@ from bones.ts.type_lang import TypeLangInterpreter
 NaT = 0
 _btcls_by_bmtid = {}
 _btypeByClass = {}                   # mappings from python classes to bones types
-_BTypeById = [Missing] * 10000
+BTYPE_BY_ID_CHUNK = 1024
+_BTypeById = [Missing] * BTYPE_BY_ID_CHUNK     # grown in place by _growBTypeById - jones.sc_tArgsFromQuery reads it
+_BTypeByIdGrows = 0
 REPL_OVERRIDE_MODE = False
-
+USE_OP_MEMO = True
+OP_MEMO_CAPACITY = 4096
+
+
+def _growBTypeById(id):
+    # extends _BTypeById in place to the chunk holding id - in place so the C side and the modules that imported it
+    # (metatypes, select) all keep seeing the one list
+    global _BTypeByIdGrows
+    _BTypeById.extend([Missing] * ((id // BTYPE_BY_ID_CHUNK + 1) * BTYPE_BY_ID_CHUNK - len(_BTypeById)))
+    _BTypeByIdGrows += 1
+
+def btypeByIdStats():
+    # answers the usage and memory of the BType by id registry
+    used = highestId = 0
+    for id, t in enumerate(_BTypeById):
+        if t is not Missing:
+            used += 1
+            highestId = id
+    return dict(
+        capacity=len(_BTypeById), used=used, highestId=highestId, chunkSize=BTYPE_BY_ID_CHUNK, grows=_BTypeByIdGrows,
+        bytes=sys.getsizeof(_BTypeById)
+    )
 
 
 def getBTypeForClass(cls):
@@ -42,6 +65,71 @@ def getBTypeForClass(cls):
         _btypeByClass[cls] = t
     return t
 
+class _OpMemo:
+    # the BTypes answered by the set operators (+, &, *, ** and ^) keyed by (op, lhs, rhs) - where lhs and rhs are
+    # BType ids or Python classes - so annotations rebuilt inside functions, or per call via | (T1 & T2), skip the
+    # class coercion, the sorting and the trip to the type manager. Types are hash consed so the answer for a key only
+    # goes stale if a name is rebound, hence we clear when the type manager's generation moves. Bounded by dropping
+    # the oldest entry.
+
+    __slots__ = ['capacity', 'generation', '_tByKey', 'hits', 'misses', 'evictions']
+
+    def __init__(self, capacity=OP_MEMO_CAPACITY):
+        self.capacity = capacity
+        self.generation = 0
+        self._tByKey = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def keyFor(op, lhs, rhs):
+        # answers Missing if the memo is off or either side isn't a BType or a Python class, i.e. the operator will
+        # raise or the lhs is a list or tuple (for ^)
+        if not USE_OP_MEMO: return Missing
+        if isinstance(lhs, BType): lhs = lhs.id
+        elif not isinstance(lhs, type): return Missing
+        if isinstance(rhs, BType): rhs = rhs.id
+        elif not isinstance(rhs, type): return Missing
+        return (op, lhs, rhs)
+
+    def get(self, key):
+        if key is Missing: return Missing
+        if self.generation != sys._gtm.generation:
+            self._tByKey.clear()
+            self.generation = sys._gtm.generation
+        if (t := self._tByKey.get(key, Missing)) is Missing:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return t
+
+    def put(self, key, t):
+        if key is not Missing and self.capacity > 0:
+            if len(self._tByKey) >= self.capacity:
+                # dicts are insertion ordered so drop the oldest
+                del self._tByKey[next(iter(self._tByKey))]
+                self.evictions += 1
+            self._tByKey[key] = t
+        return t
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(
+            size=len(self._tByKey), capacity=self.capacity, hits=self.hits, misses=self.misses,
+            hitRate=(self.hits / lookups) if lookups else 0.0, evictions=self.evictions
+        )
+
+_opMemo = _OpMemo()
+
+def opMemoStats():
+    return _opMemo.stats()
+
+def setOpMemoCapacity(capacity):
+    global _opMemo
+    _opMemo = _OpMemo(capacity)
+
+
 def _ensurePyBType(x):
     if not isinstance(x, BType) and not isinstance(x, type):
         bmtid = sys._gtm.bmtid(x)
@@ -72,6 +160,7 @@ class BType(BTypeRoot):
             instance._constructor = Missing
             instance._coercer = Missing
             instance._pp = Missing
+            if bt.id >= len(_BTypeById): _growBTypeById(bt.id)
             _BTypeById[bt.id] = instance
             return instance
         else:
@@ -205,21 +294,24 @@ class BType(BTypeRoot):
 
     # unions - +
     def __add__(self, rhs):  # type + rhs
+        if (t := _opMemo.get(key := _OpMemo.keyFor('+', self, rhs))) is not Missing: return t
         if isinstance(rhs, type):
             rhs = getBTypeForClass(rhs)
         elif not isinstance(rhs, BType):
             raise BTypeError(f'rhs should be a BType or type - got {repr(rhs)}')
-        return BTUnion(self, rhs)
+        return _opMemo.put(key, BTUnion(self, rhs))
 
     def __radd__(self, lhs):  # lhs + type
+        if (t := _opMemo.get(key := _OpMemo.keyFor('+', lhs, self))) is not Missing: return t
         if isinstance(lhs, type):
             lhs = getBTypeForClass(lhs)
         elif not isinstance(lhs, BType):
             raise BTypeError(f'lhs should be a BType or type - got {repr(lhs)}')
-        return BTUnion(lhs, self)
+        return _opMemo.put(key, BTUnion(lhs, self))
 
     # products - tuples - *
     def __mul__(self, rhs):  # type * rhs
+        if (t := _opMemo.get(key := _OpMemo.keyFor('*', self, rhs))) is not Missing: return t
         if isinstance(rhs, type):
             rhs = getBTypeForClass(rhs)
         elif not isinstance(rhs, BType):
@@ -227,9 +319,10 @@ class BType(BTypeRoot):
         types = \
             (self.types if isinstance(self, BTTuple) else (self,)) + \
             (rhs.types if isinstance(rhs, BTTuple) else (rhs,))
-        return BTTuple(*types)
+        return _opMemo.put(key, BTTuple(*types))
 
     def __rmul__(self, lhs):  # lhs * type
+        if (t := _opMemo.get(key := _OpMemo.keyFor('*', lhs, self))) is not Missing: return t
         if isinstance(lhs, type):
             lhs = getBTypeForClass(lhs)
         elif not isinstance(lhs, BType):
@@ -237,40 +330,44 @@ class BType(BTypeRoot):
         types = \
             (lhs.types if isinstance(lhs, BTTuple) else (lhs,)) + \
             (self.types if isinstance(self, BTTuple) else (self,))
-        return BTTuple(*types)
+        return _opMemo.put(key, BTTuple(*types))
 
     # finite size exponentials - lists and maps - **
     def __pow__(self, rhs):  # type ** rhs
+        if (t := _opMemo.get(key := _OpMemo.keyFor('**', self, rhs))) is not Missing: return t
         if isinstance(rhs, type):
             rhs = getBTypeForClass(rhs)
         elif not isinstance(rhs, BType):
             raise BTypeError(f'rhs should be a BType or type - got {repr(rhs)}')
         if rhs in BType._arrayOrdinalTypes: raise BTypeError(f'rhs must not be an ordinal type')
         if self in BType._arrayOrdinalTypes:
-            return BTSeq(rhs)
+            return _opMemo.put(key, BTSeq(rhs))
         else:
-            return BTMap(self, rhs)
+            return _opMemo.put(key, BTMap(self, rhs))
 
     def __rpow__(self, lhs):  # lhs ** type
+        if (t := _opMemo.get(key := _OpMemo.keyFor('**', lhs, self))) is not Missing: return t
         if isinstance(lhs, type):
             lhs = getBTypeForClass(lhs)
         elif not isinstance(lhs, BType):
             raise BTypeError(f'lhs should be a BType or type - got {repr(lhs)} - has a type been overridden?')
         if self in BType._arrayOrdinalTypes: raise BTypeError(f'rhs must not be an ordinal type')
         if lhs in BType._arrayOrdinalTypes:
-            return BTSeq(self)
+            return _opMemo.put(key, BTSeq(self))
         else:
-            return BTMap(lhs, self)
+            return _opMemo.put(key, BTMap(lhs, self))
 
     # general exponentials - functions - ^
     def __xor__(self, rhs):  # type ^ rhs
+        if (t := _opMemo.get(key := _OpMemo.keyFor('^', self, rhs))) is not Missing: return t
         if isinstance(rhs, type):
             rhs = getBTypeForClass(rhs)
         elif not isinstance(rhs, BType):
             raise BTypeError(f'rhs should be a BType or type - got {repr(rhs)}')
-        return BTFn(self if isinstance(self, BTTuple) else BTTuple(self), rhs)
+        return _opMemo.put(key, BTFn(self if isinstance(self, BTTuple) else BTTuple(self), rhs))
 
     def __rxor__(self, lhs):  # lhs ^ type
+        if (t := _opMemo.get(key := _OpMemo.keyFor('^', lhs, self))) is not Missing: return t
         if isinstance(lhs, BTTuple):
             tArgs = lhs
         elif isinstance(lhs, type):
@@ -284,28 +381,30 @@ class BType(BTypeRoot):
             tArgs = tuple(lhs)
         else:
             raise BTypeError(f'lhs should be a BType, type, list or tuple - got {repr(lhs)}')
-        return BTFn(tArgs, self)
+        return _opMemo.put(key, BTFn(tArgs, self))
 
     # intersections - &
     def __and__(self, rhs):  # type & rhs
+        if (t := _opMemo.get(key := _OpMemo.keyFor('&', self, rhs))) is not Missing: return t
         if isinstance(rhs, type):
             rhs = getBTypeForClass(rhs)
         elif not isinstance(rhs, BType):
             raise BTypeError(f'rhs should be a BType or type - got {repr(rhs)}')
         if self.__class__ is BTFn:
-            return BTFamily(self, rhs)
+            return _opMemo.put(key, BTFamily(self, rhs))
         else:
-            return BTIntersection(self, rhs)
+            return _opMemo.put(key, BTIntersection(self, rhs))
 
     def __rand__(self, lhs):  # lhs & type
+        if (t := _opMemo.get(key := _OpMemo.keyFor('&', lhs, self))) is not Missing: return t
         if isinstance(lhs, type):
             lhs = getBTypeForClass(lhs)
         elif not isinstance(lhs, BType):
             raise BTypeError(f'lhs should be a BType or type - got {repr(lhs)}')
         if self.__class__ is BTFn:
-            return BTFamily(lhs, self)
+            return _opMemo.put(key, BTFamily(lhs, self))
         else:
-            return BTIntersection(lhs, self)
+            return _opMemo.put(key, BTIntersection(lhs, self))
 
     # intersection - []
     def __getitem__(self, rhs):  # type[rhs]
@@ -766,7 +865,7 @@ def extractConstructors(args_, kwargs_):
 # **********************************************************************************************************************
 
 class JonesTypeManager:
-    __slots__ = ['_k', '_tm', '_implicitRecursive', '_tbcByVarname', '_fitsCache']
+    __slots__ = ['_k', '_tm', '_implicitRecursive', '_tbcByVarname', '_fitsCache', 'generation']
 
     def __init__(self):
         self._k = jones.Kernel()
@@ -774,6 +873,7 @@ class JonesTypeManager:
         self._implicitRecursive = Missing
         self._tbcByVarname = {}
         self._fitsCache = {}
+        self.generation = 0         # bumped when a name is rebound to a different btype so memos can be invalidated
 
 
     # parsing process
@@ -819,8 +919,11 @@ class JonesTypeManager:
         return self.bind(name, btype)
 
     def bind(self, name, btype):
+        priorId = self._tm.lookup(name).id
         try:
             btype = self._tm.bind(name, btype)
+            # only a name that now points to a different btype can change answers, not a re-declaration of the same one
+            if priorId != 0 and priorId != btype.id: self.generation += 1
         except BTypeError as ex:
             if 'already bound' in ex.args[0]:
                 current = self._tm.lookup(name)
@@ -511,6 +511,9 @@ class PyTypeManager:
 
         return typelist
 
+    def isExplicit(self, t):
+        return t.bmtid == bmtatm and t.explicit
+
     def isRecursive(self, t):
         raise NotYetImplemented()
 
@@ -0,0 +1,169 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# A snapshot of parsed TypeLang - maps the hash of a TL source to the list of AST nodes the ANTLR pipeline produced for
+# it so a process that has seen the source before can skip lexing, parsing and walking (and the import of the antlr4
+# runtime) and go straight to evaluating the nodes against the type manager.
+#
+# The type manager lives in C so it's the parse that is snapshotted rather than the resulting types. Changed sources
+# hash differently and so miss, and the whole snapshot is discarded if the grammar or AST classes change. The snapshot
+# is written once at exit (atomically) if anything was added.
+#
+# The snapshot is a pickle so it's opt in - set COPPERTOP_TL_SNAPSHOT to a path, or to "default" for
+# $XDG_CACHE_HOME/coppertop (~/.cache/coppertop). Before loading, the file and its directory must be owned by the user
+# (or root for the directory) and not writable by group or others, else it's ignored and never overwritten. A build
+# step can precompile the base definitions and any library .tl files with
+# `COPPERTOP_TL_SNAPSHOT=default python -m bones.ts._type_lang.tl_snapshot fred.tl joe.tl`
+
+
+import sys
+if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
+
+import os, pickle, hashlib, atexit
+
+from bones.core.sentinels import Missing, Null, Void
+
+
+MAX_ENTRIES = 10000
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_VERSIONED_FILES = ('TypeLang.g4', 'ast_builder.py', 'ast_nodes.py', 'fast_parser.py')
+
+
+def defaultPath():
+    # Missing unless opted in via COPPERTOP_TL_SNAPSHOT
+    path = os.environ.get('COPPERTOP_TL_SNAPSHOT', '')
+    if path == 'default':
+        cacheHome = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(cacheHome, 'coppertop', f'tl_snapshot_py{sys.version_info[0]}{sys.version_info[1]}.pickle')
+    return path or Missing
+
+
+def _isTrusted(path):
+    # True if nobody but the user (and root) could have written path - unpickling runs arbitrary code
+    if not hasattr(os, 'getuid'): return True       # OPEN: check the ACLs on Windows
+    uid = os.getuid()
+    for p, owners in ((path, (uid,)), (os.path.dirname(os.path.abspath(path)), (uid, 0))):
+        try:
+            st = os.stat(p)
+        except OSError:
+            return False
+        if st.st_uid not in owners or st.st_mode & 0o022:
+            return False
+    return True
+
+
+# the sentinels are instances of classes local to _ensureSentinels so can't be pickled by reference
+_SENTINEL_BY_PID = {'Missing': Missing, 'Null': Null, 'Void': Void}
+_PID_BY_SENTINEL_ID = {id(v): k for k, v in _SENTINEL_BY_PID.items()}
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _PID_BY_SENTINEL_ID.get(id(obj))
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return _SENTINEL_BY_PID[pid]
+
+
+def _version():
+    # anything that changes the shape of the AST invalidates the snapshot
+    h = hashlib.sha1()
+    for fn in _VERSIONED_FILES:
+        try:
+            with open(os.path.join(_HERE, fn), 'rb') as f:
+                h.update(f.read())
+        except OSError:
+            h.update(fn.encode())
+    return h.hexdigest()
+
+
+class TLSnapshot:
+    __slots__ = ['path', 'version', '_astByKey', '_dirty', 'hits', 'misses']
+
+    def __init__(self, path):
+        self.path = path
+        self.version = _version()
+        self._astByKey = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path=Missing):
+        path = defaultPath() if path is Missing else path
+        if not path: return Missing
+        snapshot = cls(path)
+        if os.path.exists(path):
+            if not _isTrusted(path):
+                print(f'Ignoring TypeLang snapshot {path} - someone else owns or can write to it', file=sys.stderr)
+                return Missing
+            try:
+                with open(path, 'rb') as f:
+                    version, astByKey = _Unpickler(f).load()
+                if version == snapshot.version:
+                    snapshot._astByKey = astByKey
+            except Exception:
+                pass        # unreadable or written by an older version - start afresh
+        atexit.register(snapshot.save)
+        return snapshot
+
+    @staticmethod
+    def keyFor(src):
+        return hashlib.sha1(src.encode()).digest()
+
+    def get(self, src):
+        if (ast := self._astByKey.get(self.keyFor(src), Missing)) is Missing:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return ast
+
+    def put(self, src, ast):
+        self._astByKey[self.keyFor(src)] = ast
+        if len(self._astByKey) > MAX_ENTRIES:
+            # dicts are insertion ordered so drop the oldest
+            del self._astByKey[next(iter(self._astByKey))]
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty: return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+            tmp = f'{self.path}.{os.getpid()}.tmp'
+            with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+                _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump((self.version, self._astByKey))
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as ex:
+            print(f'Could not save TypeLang snapshot to {self.path} - {ex}', file=sys.stderr)
+
+    def __len__(self):
+        return len(self._astByKey)
+
+    def __repr__(self):
+        return f'TLSnapshot({self.path}, {len(self)} entries)'
+
+
+def compileTlFiles(paths, snapshot=Missing):
+    # parses (without evaluating) each .tl file into the snapshot so the first evaluation in a worker is parse free
+    from bones.ts.type_lang import parseTl
+    snapshot = TLSnapshot.load() if snapshot is Missing else snapshot
+    if snapshot is Missing: raise ValueError('TypeLang snapshot is disabled - set COPPERTOP_TL_SNAPSHOT')
+    for path in paths:
+        with open(path) as f:
+            src = f.read()
+        if snapshot.get(src) is Missing:
+            snapshot.put(src, parseTl(src))
+    snapshot.save()
+    return snapshot
+
+
+if __name__ == '__main__':
+    print(compileTlFiles(sys.argv[1:]))
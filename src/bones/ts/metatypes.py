@@ -22,7 +22,7 @@ if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
 
 __all__ = ['BType', 'BTypeError', 'SchemaError', 'extractConstructors']
 
-import itertools, builtins, collections, statistics
+import itertools, builtins, collections, statistics, array, heapq
 
 from bones.jones import Fits, SchemaError
 import bones.ts._type_lang.jones_type_manager
@@ -140,20 +140,126 @@ def _typeId(t):
     # potentially with a lot of types we could get a clash between the BType id and hash - ignore for the moment!!!
     return t.id if isinstance(t, BType) else hash(t)
 
-_weakenings = {}
+TRANSITIVE_WEAKENINGS = False      # see setTransitiveWeakenings
+
+class _WeakeningGraph:
+    # the coercions registered by weaken() - for each source type the direct targets in the order they were added (a
+    # direct weakening costs its position + 1 as before) and, computed lazily after any change, the closure as a dict
+    # of target -> distance so membership and distance are single lookups rather than tuple scans. By default the
+    # closure is just the direct weakenings, i.e. fitting is unchanged. With TRANSITIVE_WEAKENINGS it also holds the
+    # weakenings reachable in more than one step, each costing the cheapest path through the direct ones plus the
+    # largest number of direct weakenings any type has - so every indirect weakening ranks after every direct one and
+    # can never tie with (and so make ambiguous) or beat a direct match.
+
+    __slots__ = ['_targetsBySrc', '_distancesBySrc', '_closureDirty', 'numEdges', 'numClosures']
+
+    def __init__(self):
+        self._targetsBySrc = {}
+        self._distancesBySrc = {}
+        self._closureDirty = False
+        self.numEdges = 0
+        self.numClosures = 0
+
+    def add(self, srcT, targetT):
+        # answers True if the weakening is new
+        current = self._targetsBySrc.get(srcT, ())
+        if targetT in current or targetT == srcT: return False
+        self._targetsBySrc[srcT] = current + (targetT,)
+        self.numEdges += 1
+        self._closureDirty = True
+        return True
+
+    def get(self, srcT, default=()):
+        # answers the direct weakenings of srcT in the order they were added
+        return self._targetsBySrc.get(srcT, default)
+
+    def closureOf(self, srcT):
+        # answers {target: distance} for every type srcT weakens to (directly unless TRANSITIVE_WEAKENINGS)
+        if self._closureDirty: self._computeClosure()
+        return self._distancesBySrc.get(srcT, _EMPTY_CLOSURE)
+
+    def distance(self, srcT, targetT):
+        # answers the coercion distance from srcT to targetT or Missing if srcT doesn't weaken to targetT
+        if self._closureDirty: self._computeClosure()
+        return self._distancesBySrc.get(srcT, _EMPTY_CLOSURE).get(targetT, Missing)
+
+    def weakensTo(self, srcT, targetT):
+        if self._closureDirty: self._computeClosure()
+        return targetT in self._distancesBySrc.get(srcT, _EMPTY_CLOSURE)
+
+    def _computeClosure(self):
+        # Dijkstra from each source - there are at most a few hundred edges in practice so recomputing the lot on the
+        # first query after a (bulk) registration is cheaper than maintaining it incrementally
+        distancesBySrc = {}
+        maxDirect = max((len(targets) for targets in self._targetsBySrc.values()), default=0)
+        for srcT, targets in self._targetsBySrc.items():
+            distances = {t: o + 1 for o, t in enumerate(targets)}
+            if TRANSITIVE_WEAKENINGS:
+                settled = set()
+                heap = [(o + 1, o, t) for o, t in enumerate(targets)]       # the tie break stops types being compared
+                tieBreak = len(heap)
+                while heap:
+                    d, _, t = heapq.heappop(heap)
+                    if t in settled or t == srcT: continue
+                    settled.add(t)
+                    if t not in distances: distances[t] = maxDirect + d
+                    for o, tNext in enumerate(self._targetsBySrc.get(t, ())):
+                        if tNext not in settled:
+                            heapq.heappush(heap, (d + o + 1, tieBreak, tNext))
+                            tieBreak += 1
+            distancesBySrc[srcT] = distances
+        self._distancesBySrc = distancesBySrc
+        self._closureDirty = False
+        self.numClosures += 1
+
+    def stats(self):
+        if self._closureDirty: self._computeClosure()
+        return dict(
+            sources=len(self._targetsBySrc), edges=self.numEdges,
+            closureSize=sum(len(ds) for ds in self._distancesBySrc.values()), closuresComputed=self.numClosures
+        )
+
+_EMPTY_CLOSURE = {}
+_weakenings = _WeakeningGraph()
+
 
 def weaken(srcTs, targetTs):
     if not isinstance(srcTs, tuple): srcTs = [srcTs]
     if not isinstance(targetTs, tuple): targetTs = [targetTs]
+    anyAdded = False
     for srcT in srcTs:
-        current = _weakenings.get(srcT, ())
         for targetT in targetTs:
-            if targetT not in current:
-                current += (targetT,)
-        _weakenings[srcT] = current
-
-
-_fitsCache = {}
+            anyAdded = _weakenings.add(srcT, targetT) or anyAdded
+    # answers cached by fitsWithin (and the selections made from them) may now be wrong
+    if anyAdded: sys._gtm.generation += 1
+
+def weakenMany(srcTsTargetTs):
+    # registers many weakenings, e.g. [(ccy, (GBP, USD, EUR)), ((GBP, USD), fx), ...] each pair as weaken would take
+    # it, invalidating the caches once rather than per pair
+    anyAdded = False
+    for srcTs, targetTs in srcTsTargetTs:
+        if not isinstance(srcTs, tuple): srcTs = [srcTs]
+        if not isinstance(targetTs, tuple): targetTs = [targetTs]
+        for srcT in srcTs:
+            for targetT in targetTs:
+                anyAdded = _weakenings.add(srcT, targetT) or anyAdded
+    if anyAdded: sys._gtm.generation += 1
+
+def weakeningStats():
+    return _weakenings.stats()
+
+def setTransitiveWeakenings(transitive):
+    # opt in (or back out) of fitting via weakenings reachable in more than one step
+    global TRANSITIVE_WEAKENINGS
+    if bool(transitive) != TRANSITIVE_WEAKENINGS:
+        TRANSITIVE_WEAKENINGS = bool(transitive)
+        _weakenings._closureDirty = True
+        sys._gtm.generation += 1
+
+
+FITS_CACHE_CAPACITY = 65536
+USE_DENSE_FITS = True
+DENSE_FITS_MAX_TYPES = 2048         # types beyond this many are left to the dict cache
 
 U_U = 1
 I_U = 2
@@ -167,6 +273,9 @@ O_O = 9
 
 SCHEMA_PENALTY = 0.5
 
+_CASE_NAMES = {U_U: 'U_U', I_U: 'I_U', O_U: 'O_U', I_I: 'I_I', U_I: 'U_I', O_I: 'O_I', U_O: 'U_O', I_O: 'I_O', O_O: 'O_O'}
+_CASE_BY_KINDS = ((U_U, U_I, U_O), (I_U, I_I, I_O), (O_U, O_I, O_O))      # [kind of a][kind of b], U - 0, I - 1, O - 2
+
 
 # dm should be independent of coppertop so any types needed in coppertop or bone should be created there
 # dm depends on coppertop which intern depends on bones which depends on jones
@@ -174,9 +283,208 @@ SCHEMA_PENALTY = 0.5
 # bones has the function selection which uses py
 
 
-IDENTICAL = Fits(True, {}, 0)
+class _NoTByT(dict):
+    # the tByT shared by every Fits that binds nothing - a dict (so the C side and dict(tByT) are happy) that refuses
+    # to be changed from Python. PyDict_SetItem would bypass the overrides but jones never writes to a Fits' tByT -
+    # it only gets one as the answer of its fitsWithin callback and hands it on, read only, to updateSchemaVarsWith,
+    # and the tByTs it passes to implementations come from updateSchemaVarsWith's running dict, which is never the
+    # result's. tests/conftest.py checks NO_TBYT is still empty after every test
+    __slots__ = ()
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('The empty tByT of a shared Fits is immutable')
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _immutable
+    def __repr__(self):
+        return '{}'
+
+NO_TBYT = _NoTByT()
+USE_INTERNED_FITS = True
+BINDING_FITS_CAPACITY = 4096
+DISTANCE_FITS_CAPACITY = 256
+
+IDENTICAL = Fits(True, NO_TBYT, 0)
 DOES_NOT_FIT = Fits(False, Missing, Missing)    # or Fits(False, {}, 100000)?
 
+_fitsByDistance = {0: IDENTICAL}
+_fitsByBinding = {}
+
+def _fitsAt(distance):
+    # answers Fits(True, NO_TBYT, distance), interned for integer distances - usually small so the table stays tiny
+    # but it is capped (beyond which answers are fresh) as are fractional distances which could be anything. Only ints
+    # are looked up as 1.0 would otherwise find the Fits for 1
+    if distance.__class__ is not int or (fits := _fitsByDistance.get(distance, Missing)) is Missing:
+        if not USE_INTERNED_FITS: return Fits(True, {}, distance)
+        fits = Fits(True, NO_TBYT, distance)
+        if distance.__class__ is int and len(_fitsByDistance) < DISTANCE_FITS_CAPACITY: _fitsByDistance[distance] = fits
+    return fits
+
+def _fitsWith(schemaVars, distance):
+    return Fits(True, schemaVars, distance) if schemaVars else _fitsAt(distance)
+
+def _bindingFits(T, t, distance):
+    # answers the interned Fits(True, {T: t}, distance) for a single schema variable binding - the tByT must not be
+    # changed by the receiver (updateSchemaVarsWith copies on change). The table is simply emptied when full. The key
+    # includes the distance's class so 1.0 and 1 don't share a Fits
+    if not USE_INTERNED_FITS: return Fits(True, {T: t}, distance)
+    if (fits := _fitsByBinding.get(key := (T, t, distance.__class__, distance), Missing)) is Missing:
+        if len(_fitsByBinding) >= BINDING_FITS_CAPACITY: _fitsByBinding.clear()
+        fits = _fitsByBinding[key] = Fits(True, {T: t}, distance)
+    return fits
+
+
+class _FitsCache:
+    # (a.id or a's Python class, b.id or b's Python class) -> Fits
+    #
+    # Answers depend on _weakenings and on what names are bound to so the whole cache is dropped when the type
+    # manager's generation moves (weaken() and rebinding both bump it). Size is bounded - eviction is CLOCK over the
+    # dict's insertion order, i.e. when full the oldest entries are visited, referenced ones are given a second chance
+    # by moving them to the end and the rest are dropped until a quarter of the capacity is free.
+
+    __slots__ = ['capacity', 'generation', '_entries', 'hits', 'misses', 'evictions', 'invalidations', 'hitsByCase',
+                 'missesByCase']
+
+    def __init__(self, capacity=FITS_CACHE_CAPACITY):
+        self.capacity = capacity
+        self.generation = sys._gtm.generation
+        self._entries = {}          # cacheId -> [fits, case, ref]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.hitsByCase = dict.fromkeys(_CASE_NAMES, 0)
+        self.missesByCase = dict.fromkeys(_CASE_NAMES, 0)
+
+    def get(self, cacheId):
+        if self.generation != sys._gtm.generation:
+            if self._entries: self.invalidations += 1
+            self._entries.clear()
+            self.generation = sys._gtm.generation
+            self.misses += 1
+            return Missing
+        if (entry := self._entries.get(cacheId, Missing)) is Missing:
+            self.misses += 1
+            return Missing
+        entry[2] = True
+        self.hits += 1
+        self.hitsByCase[entry[1]] += 1
+        return entry[0]
+
+    def put(self, cacheId, fits, a, b):
+        # called after a miss so this is where the misses are attributed to their case
+        case = _CASE_BY_KINDS[_kindOf(a)][_kindOf(b)]
+        self.missesByCase[case] += 1
+        if self.capacity <= 0: return
+        entries = self._entries
+        if len(entries) >= self.capacity: self._sweep()
+        entries[cacheId] = [fits, case, False]
+
+    def _sweep(self):
+        entries, target, freed = self._entries, max(1, self.capacity // 4), 0
+        while freed < target and entries:
+            cacheId = next(iter(entries))
+            entry = entries.pop(cacheId)
+            if entry[2]:
+                entry[2] = False
+                entries[cacheId] = entry
+            else:
+                freed += 1
+        self.evictions += freed
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(
+            size=len(self._entries), capacity=self.capacity, hits=self.hits, misses=self.misses,
+            hitRate=self.hits / lookups if lookups else 0.0, evictions=self.evictions,
+            invalidations=self.invalidations, generation=self.generation,
+            hitsByCase={_CASE_NAMES[c]: n for c, n in self.hitsByCase.items()},
+            missesByCase={_CASE_NAMES[c]: n for c, n in self.missesByCase.items()},
+        )
+
+class _DenseFits:
+    # BType <: BType answers that don't bind schema variables (so have no tByT) held in a 2-D table indexed by
+    # compact ordinals assigned to type ids as they are first seen, i.e. a hit is two list indexations rather than
+    # building a tuple key and hashing it. Each cell holds a code into fitsByCode (0 - unknown) as a Fits can't be
+    # stored in an array. Rows are array('H') grown on demand so a row is only as wide as the largest ordinal it has
+    # been asked about. Like _FitsCache the whole table is dropped when the type manager's generation moves.
+
+    __slots__ = ['maxTypes', 'generation', 'ordById', 'rows', 'fitsByCode', 'codeByKey', 'hits', 'puts']
+
+    def __init__(self, maxTypes=DENSE_FITS_MAX_TYPES):
+        self.maxTypes = maxTypes
+        self.generation = sys._gtm.generation
+        self.ordById = []           # type id -> ordinal, -1 if not assigned
+        self.rows = []              # ordinal of a -> array('H') of codes by ordinal of b
+        self.fitsByCode = [Missing]
+        self.codeByKey = {}         # (fits, distance) -> code
+        self.hits = 0
+        self.puts = 0
+
+    def get(self, idA, idB):
+        if self.generation != sys._gtm.generation:
+            self.__init__(self.maxTypes)
+            return Missing
+        ordById = self.ordById
+        if idA >= len(ordById) or idB >= len(ordById): return Missing
+        if (ordA := ordById[idA]) < 0 or (ordB := ordById[idB]) < 0: return Missing
+        row = self.rows[ordA]
+        if ordB >= len(row) or not (code := row[ordB]): return Missing
+        self.hits += 1
+        return self.fitsByCode[code]
+
+    def rowFor(self, idA):
+        # answers (row, ordById) for a so a batch can probe many b without repeating a's lookups, or Missing
+        if self.generation != sys._gtm.generation:
+            self.__init__(self.maxTypes)
+            return Missing
+        if idA >= len(self.ordById) or (ordA := self.ordById[idA]) < 0: return Missing
+        return self.rows[ordA], self.ordById
+
+    def put(self, idA, idB, fits):
+        # answers True if fits was stored - i.e. it has no tByT and there's room for the types
+        if fits.tByT: return False
+        if self.generation != sys._gtm.generation: self.__init__(self.maxTypes)
+        if (ordA := self._ordFor(idA)) < 0 or (ordB := self._ordFor(idB)) < 0: return False
+        if (code := self.codeByKey.get(key := (bool(fits.fits), fits.distance), Missing)) is Missing:
+            if len(self.fitsByCode) > 0xFFFF: return False
+            code = self.codeByKey[key] = len(self.fitsByCode)
+            self.fitsByCode.append(fits)
+        row = self.rows[ordA]
+        if ordB >= len(row): row.extend([0] * (ordB + 1 - len(row)))
+        row[ordB] = code
+        self.puts += 1
+        return True
+
+    def _ordFor(self, id):
+        ordById = self.ordById
+        if id >= len(ordById): ordById.extend([-1] * (id + 1 - len(ordById)))
+        if (ord := ordById[id]) < 0 and len(self.rows) < self.maxTypes:
+            ord = ordById[id] = len(self.rows)
+            self.rows.append(array.array('H'))
+        return ord
+
+    def stats(self):
+        return dict(
+            types=len(self.rows), hits=self.hits, puts=self.puts, codes=len(self.fitsByCode) - 1,
+            bytes=sum(row.itemsize * len(row) for row in self.rows)
+        )
+
+def _kindOf(t):
+    # U - 0, I - 1, O - 2 as per the case analysis in _fitsWithin (Python classes are O)
+    return 0 if isinstance(t, BTUnion) else 1 if t.__class__ == BTIntersection else 2
+
+_fitsCache = _FitsCache()
+_denseFits = _DenseFits()
+
+def fitsCacheStats():
+    # answers the size, hit rate, etc of the fitsWithin cache including the hits and misses for each U_U..O_O case
+    return dict(_fitsCache.stats(), dense=_denseFits.stats(), lattice=_lattice.stats())
+
+def setFitsCacheCapacity(capacity):
+    global _fitsCache
+    _fitsCache = _FitsCache(capacity)
+
 
 def _BTypeToPyBType(bt):
     bmtid = sys._gtm.bmtid(bt)
@@ -197,7 +505,7 @@ def fitsWithin(a, b, *, fittingSigs=False):
             # most fitsWithin calls in coppertop will be Python type <: BType so this is the first case
             if b == pytype:
                 # any Python type <: pytype
-                return (Fits(True, {}, 0))
+                return _fitsAt(0)
             else:
                 cacheId = (a, b.id)
         elif isinstance(b, type):
@@ -215,11 +523,11 @@ def fitsWithin(a, b, *, fittingSigs=False):
         elif isinstance(b, BType):
             if b == btype:
                 # any BType <: btype but pydict <: pydict is exact
-                return Fits(True, {}, 0.25)
+                return _fitsAt(0.25)
             elif a.id == b.id:
                 return IDENTICAL
             else:
-                cacheId = (a.id, b.id)
+                cacheId = Missing if USE_DENSE_FITS else (a.id, b.id)       # Missing - try _denseFits first
         else:
             raise TypeError('fitsWithin only supports Python types and BTypes')
         if a.hasT:
@@ -230,17 +538,63 @@ def fitsWithin(a, b, *, fittingSigs=False):
     else:
         raise TypeError('fitsWithin only supports Python types and BTypes')
 
-    fits = _fitsCache.get(cacheId, Missing)
+    if (dense := cacheId is Missing):
+        # _DenseFits.get inlined as this is the hottest path - a method call costs as much as the probe itself
+        idA, idB, table = a.id, b.id, _denseFits
+        if table.generation != sys._gtm.generation:
+            table.__init__(table.maxTypes)
+        elif idA < len(ordById := table.ordById) and idB < len(ordById) \
+                and (ordA := ordById[idA]) >= 0 and (ordB := ordById[idB]) >= 0 \
+                and ordB < len(row := table.rows[ordA]) and (code := row[ordB]):
+            table.hits += 1
+            return table.fitsByCode[code]
+        cacheId = (idA, idB)
+    fits = _fitsCache.get(cacheId)
     if fits is not Missing: return fits
 
     try:
-        _fitsCache[cacheId] = answer = _fitsWithin(a, b, fittingSigs=fittingSigs)
+        answer = _fitsWithin(a, b, fittingSigs=fittingSigs)
+        if not (dense and _denseFits.put(a.id, b.id, answer)):
+            _fitsCache.put(cacheId, answer, a, b)
         return answer
     except SchemaError as ex:
         return DOES_NOT_FIT
 
 sys._fitsWithin = fitsWithin        # for coercion - do not remove
 
+
+def fitsWithinMany(a, bs, *, fittingSigs=False):
+    # answers (flags, distances, fitses) for a <: b for each b in bs - flags is a bytearray of 1 where a fits, distances
+    # an array('d') (0.0 where a doesn't fit) and fitses the Fits themselves (for their tByT). a is cleaned up once and,
+    # for a BType a without schema variables, its row of the dense table is fetched once and probed directly for each
+    # BType b, only the misses going through fitsWithin
+    if not isinstance(a, BType) and not isinstance(a, type): a = _BTypeToPyBType(a)
+    n = len(bs)
+    flags, distances, fitses = bytearray(n), array.array('d', bytes(8 * n)), [Missing] * n
+    rowAndOrds = Missing
+    if USE_DENSE_FITS and isinstance(a, BType) and not a.hasT: rowAndOrds = _denseFits.rowFor(a.id)
+    if rowAndOrds is not Missing:
+        row, ordById = rowAndOrds
+        fitsByCode, idA, btypeId = _denseFits.fitsByCode, a.id, btype.id
+        for i, b in enumerate(bs):
+            if isinstance(b, BType) and (idB := b.id) != idA and idB != btypeId and idB < len(ordById) \
+                    and 0 <= (ordB := ordById[idB]) < len(row) and (code := row[ordB]):
+                _denseFits.hits += 1
+                fitses[i] = fits = fitsByCode[code]
+            else:
+                fitses[i] = fits = fitsWithin(a, b, fittingSigs=fittingSigs)
+            if fits:
+                flags[i] = 1
+                distances[i] = fits.distance
+    else:
+        for i, b in enumerate(bs):
+            if (fits := fitsWithin(a, b, fittingSigs=fittingSigs)):
+                flags[i] = 1
+                distances[i] = fits.distance
+            fitses[i] = fits
+    return flags, distances, fitses
+
+
 def _fitsWithin(a, b, fittingSigs=False):
     # answers a Fits named tuple
 
@@ -249,7 +603,7 @@ def _fitsWithin(a, b, fittingSigs=False):
         if (hasattr(a, 'explicit') and a.explicit) or (a.__class__ == BTIntersection and _anyExplicit(a.types)):
             return DOES_NOT_FIT
         else:
-            return Fits(True, {b:a}, SCHEMA_PENALTY)  # exact match must beat wildcard
+            return _bindingFits(b, a, SCHEMA_PENALTY)  # exact match must beat wildcard
         # if b.base is T:
         #     # anything (except explicits) <: a wildcard
         #     if (hasattr(a, 'explicit') and a.explicit) or (a.__class__ == BTIntersection and _anyExplicit(a.types)):
@@ -267,8 +621,8 @@ def _fitsWithin(a, b, fittingSigs=False):
 
 
     # check the coercions
-    if (o := _find(b, _weakenings.get(a, ()))) >= 0:
-        return Fits(True, {}, o + 1)
+    if (distance := _weakenings.distance(a, b)) is not Missing:
+        return _fitsAt(distance)
 
 
     if isinstance(b, BTUnion):
@@ -309,7 +663,7 @@ def _fitsWithin(a, b, fittingSigs=False):
                 # next line will through an error for cases 2 & 3
                 schemaVars, _ = updateSchemaVarsWith(schemaVars, 0, fits)
                 results.append(fits)
-            return Fits(True, schemaVars, statistics.mean([r.distance for r in results]))
+            return _fitsWith(schemaVars, statistics.mean([r.distance for r in results]))
         elif a.__class__ == BTIntersection: # I O
             case = I_O
         else:                               # O O
@@ -328,15 +682,16 @@ def _fitsWithin(a, b, fittingSigs=False):
             schemaVars, _ = updateSchemaVarsWith(schemaVars, 0, fits)
             results.append(fits)
         # OPEN: U_U_Metric
-        return Fits(True, schemaVars, statistics.mean([r.distance for r in results]))
+        return _fitsWith(schemaVars, statistics.mean([r.distance for r in results]))
         # return Fits(True, schemaVars, statistics.min([r.distance for r in results]))
 
     elif case == O_U:
         # a just needs to fit any element in b - select the closest match (for distance we could return mean but
         # schemaVars would be a problem)
         schemVars, results = {}, []
-        for t in b.types:
-            if (fits := fitsWithin(a, t, fittingSigs=fittingSigs)):
+        flags, _, fitses = fitsWithinMany(a, b.types, fittingSigs=fittingSigs)
+        for i, fits in enumerate(fitses):
+            if flags[i]:
                 schemVars, _ = updateSchemaVarsWith(schemVars, 0, fits)  # to the update to wheedle out conflicts
                 results.append(fits)
         if results:
@@ -354,14 +709,14 @@ def _fitsWithin(a, b, fittingSigs=False):
         # 1 - intersection is a union member - (num&fred)  <:  (num&fred) + (str&joe)
         for t in b.types:
             doesFit, schemaVars, distance = fred(fitsWithin(a, t, fittingSigs=fittingSigs), schemaVars, distance)
-            if doesFit: return Fits(True, schemaVars, distance)
+            if doesFit: return _fitsWith(schemaVars, distance)
         # 2 - intersecting the union with another type - (num+str) & fred  <:  (num+str)
         a_, ab, b_, weakenings = _partitionIntersectionTLs(a.types, (b,))
         if _anyNotImplicit(b_):  # check for (matrix) <: (matrix & aliased) etc
             return DOES_NOT_FIT  # i.e. there is something missing in a that is required by b
         if len(a_) == 0:                          # exact match is always fine
             raise PathNotTested()
-            return Fits(True, schemaVars, 0 + len(weakenings))
+            return _fitsWith(schemaVars, 0 + len(weakenings))
         else:
             raise PathNotTested()
             return _processA_(a_, schemaVars, len(weakenings))
@@ -387,8 +742,8 @@ def _fitsWithin(a, b, fittingSigs=False):
                     for TNew, tNew in schemaVars_.items():
                         t = schemaVars.get(TNew, Missing)
                         if t is not Missing:
-                            if tNew is not t and t not in _weakenings.get(tNew, ()):
-                                if tNew in _weakenings.get(t, ()):
+                            if tNew is not t and not _weakenings.weakensTo(tNew, t):
+                                if _weakenings.weakensTo(t, tNew):
                                     raise PathNotTested()
                                     schemaVars[TNew] = tNew
                                 else:
@@ -399,7 +754,7 @@ def _fitsWithin(a, b, fittingSigs=False):
                 if len(a_) == 0:  # exact match is always fine
                     if len(Ts) ==1:
                         return DOES_NOT_FIT
-                    return Fits(True, schemaVars, distance)
+                    return _fitsWith(schemaVars, distance)
                 else:
                     if len(Ts) == 0:
                         # a match but a simple type from the intersection is dropped and we'd prefer that it was caught
@@ -423,26 +778,16 @@ def _fitsWithin(a, b, fittingSigs=False):
                 else:
                     # wildcard match is fine, metric is SCHEMA_PENALTY to loose against exact match
                     matchedT = a_[0] if len(a_) == 1 else BTIntersection.noSpaceCheck(a_)
-                    return Fits(True, {Ts[0]: matchedT}, SCHEMA_PENALTY + len(weakenings) + len(a_))
+                    return _bindingFits(Ts[0], matchedT, SCHEMA_PENALTY + len(weakenings) + len(a_))
         else:
-            a_, ab, b_, weakenings = _partitionIntersectionTLs(a.types, b.types)
-            if _anyNotImplicit(b_):         # check for (matrix) <: (matrix & aliased) etc
-                return DOES_NOT_FIT   # i.e. there is something missing in a that is required by b
-            if len(a_) == 0:                          # exact match is always fine
-                return Fits(True, {}, len(weakenings))
-            else:
-                return _processA_(a_, {}, len(weakenings) + len(a_))
+            if USE_LATTICE and (fits := _lattice.fits(a, b)) is not Missing: return fits
+            return _fitsViaPartition(a.types, b.types)
 
     elif case == I_O:
         # isT(b) has already been handled above in the BTSchemaVariable check
         # (num & col) <: (num)
-        a_, ab, b_, weakenings = _partitionIntersectionTLs(a.types, (b,))
-        if _anyNotImplicit(b_):  # check for (matrix) <: (matrix & aliased) etc
-            return DOES_NOT_FIT  # i.e. there is something missing in a that is required by b
-        if len(a_) == 0:                          # exact match is always fine
-            return Fits(True, {}, len(weakenings))
-        else:
-            return _processA_(a_, {}, len(weakenings) + len(a_))
+        if USE_LATTICE and (fits := _lattice.fits(a, b)) is not Missing: return fits
+        return _fitsViaPartition(a.types, (b,))
 
     elif case == O_I:
         # str <: (str&aliased)    (remember aliased is implicit)
@@ -454,23 +799,18 @@ def _fitsWithin(a, b, fittingSigs=False):
                     if len(a_) > 0:
                         # wildcard match is always fine, metric is SCHEMA_PENALTY to loose against exact match
                         matchedT = a_[0] if len(a_) == 1 else BTIntersection.noSpaceCheck(a_)
-                        return Fits(True, {b_[0]: matchedT}, SCHEMA_PENALTY + len(weakenings) + len(a_))
+                        return _bindingFits(b_[0], matchedT, SCHEMA_PENALTY + len(weakenings) + len(a_))
                     else:
-                        return Fits(True, {b_[0]: sys._gtm.fromId(0)}, SCHEMA_PENALTY + len(weakenings) + len(a_))
+                        return _bindingFits(b_[0], sys._gtm.fromId(0), SCHEMA_PENALTY + len(weakenings) + len(a_))
                 if _anyNotImplicit(b_):  # check for (matrix) <: (matrix & aliased) etc
                     return DOES_NOT_FIT  # i.e. there is something missing in a that is required by b
             if len(a_) == 0:                          # exact match is always fine
-                return Fits(True, {}, 0 + len(weakenings))
+                return _fitsAt(0 + len(weakenings))
             else:
                 return _processA_(a_, {}, len(weakenings) + len(a_))
         else:
-            a_, ab, b_, weakenings = _partitionIntersectionTLs((a,), b.types)
-            if _anyNotImplicit(b_):  # check for (matrix) <: (matrix & aliased) etc
-                return DOES_NOT_FIT  # i.e. there is something missing in a that is required by b
-            if len(a_) == 0:                          # exact match is always fine
-                return Fits(True, {}, 0 + len(weakenings))
-            else:
-                return _processA_(a_, {}, len(weakenings) + len(a_))
+            if USE_LATTICE and (fits := _lattice.fits(a, b)) is not Missing: return fits
+            return _fitsViaPartition((a,), b.types)
 
     else:
         raise ProgrammerError()
@@ -489,10 +829,10 @@ def _fitsWithin(a, b, fittingSigs=False):
             #           a : (i+t+s,  t+s) ->  n          a can take in more in arg1, and arg2 and will output less - therefore it fits
 
             if isinstance(b.tRet, BTSchemaVariable):
-                doesFit, schemaVars, distance = fred(Fits(True, {b.tRet:a.tRet}, SCHEMA_PENALTY), schemaVars, distance)
+                doesFit, schemaVars, distance = fred(_bindingFits(b.tRet, a.tRet, SCHEMA_PENALTY), schemaVars, distance)
             elif isinstance(a.tRet, BTSchemaVariable):
                 # e.g. T1 < txt or T1 < T1 - discard the info as it really needs some deeper analysis
-                doesFit, schemaVars, distance = fred(Fits(True, {}, 0), schemaVars, distance)
+                doesFit, schemaVars, distance = fred(_fitsAt(0), schemaVars, distance)
             else:
                 doesFit, schemaVars, distance = fred(fitsWithin(a.tRet, b.tRet, fittingSigs=fittingSigs), schemaVars, distance)
             if not doesFit:
@@ -501,10 +841,10 @@ def _fitsWithin(a, b, fittingSigs=False):
 
             for aT, bT in zip(a.tArgs, b.tArgs):
                 if isinstance(bT, BTSchemaVariable):
-                    doesFit, schemaVars, distance = fred(Fits(True, {bT: aT}, SCHEMA_PENALTY), schemaVars, distance)
+                    doesFit, schemaVars, distance = fred(_bindingFits(bT, aT, SCHEMA_PENALTY), schemaVars, distance)
                 elif isinstance(aT, BTSchemaVariable):
                     # e.g. T1 < txt or T1 < T1 - discard the info as it really needs some deeper analysis
-                    doesFit, schemaVars, distance = fred(Fits(True, {}, 0), schemaVars, distance)
+                    doesFit, schemaVars, distance = fred(_fitsAt(0), schemaVars, distance)
                 else:
                     doesFit, schemaVars, distance = fred(fitsWithin(bT, aT, fittingSigs=fittingSigs), schemaVars, distance)
                 if not doesFit:
@@ -513,7 +853,7 @@ def _fitsWithin(a, b, fittingSigs=False):
 
             # there may be additional checks here
             # print(f'{a} <: {b} is true')
-            return Fits(True, schemaVars, distance)
+            return _fitsWith(schemaVars, distance)
 
         elif isinstance(a, BTFamily):
             # we don't do soft typing in coppertop
@@ -530,17 +870,18 @@ def _fitsWithin(a, b, fittingSigs=False):
                 doesFit, local_schemaVars, distance = fred(fitsWithin(aT, b, fittingSigs=fittingSigs), dict(schemaVars), distance)
                 if doesFit: break
             if doesFit:
-                return Fits(True, schemaVars, distance)
+                return _fitsWith(schemaVars, distance)
             else:
                 return DOES_NOT_FIT
 
         elif isinstance(b, BTFamily):
             # a must fit with every one of b
             schemaVars, distance = {}, 0
-            for bT in b.types:
-                doesFit, local_schemaVars, distance = fred(fitsWithin(a, bT, fittingSigs=fittingSigs), dict(schemaVars), distance)
-                if not doesFit: return DOES_NOT_FIT
-            return Fits(True, schemaVars, distance)
+            flags, _, fitses = fitsWithinMany(a, b.types, fittingSigs=fittingSigs)
+            if not all(flags): return DOES_NOT_FIT
+            for fits in fitses:
+                doesFit, local_schemaVars, distance = fred(fits, dict(schemaVars), distance)
+            return _fitsWith(schemaVars, distance)
 
         else:
             return DOES_NOT_FIT
@@ -548,7 +889,7 @@ def _fitsWithin(a, b, fittingSigs=False):
     elif type(a) is not type(b):
         # the two types are not the same so they cannot fit (we don't allow inheritance - except in case of Ordinals)
         if a in BType._arrayOrdinalTypes and b in BType._arrayOrdinalTypes:
-            return Fits(True, {}, 0)
+            return _fitsAt(0)
         else:
             return DOES_NOT_FIT
 
@@ -563,7 +904,7 @@ def _fitsWithin(a, b, fittingSigs=False):
         for i, aT in enumerate(aTs):
             doesFit, schemaVars, distance = fred(fitsWithin(aT, bTs[i], fittingSigs=fittingSigs), schemaVars, distance)
             if not doesFit: return DOES_NOT_FIT
-        return Fits(True, schemaVars, distance)
+        return _fitsWith(schemaVars, distance)
 
     elif isinstance(b, BTStruct):
         # b defines what is required, a defines what is available
@@ -574,7 +915,7 @@ def _fitsWithin(a, b, fittingSigs=False):
             if nA != nB: return DOES_NOT_FIT
             doesFit, schemaVars, distance = fred(fitsWithin(tA, tB, fittingSigs=fittingSigs), schemaVars, distance)
             if not doesFit: return DOES_NOT_FIT
-        return Fits(True, schemaVars, distance)
+        return _fitsWith(schemaVars, distance)
 
     # elif isinstance(b, BTRec):
     #     # b defines what is required, a defines what is available
@@ -592,7 +933,7 @@ def _fitsWithin(a, b, fittingSigs=False):
         schemaVars, distance = {}, 0
         doesFit2, schemaVars, distance = fred(fitsWithin(a.mappedType, b.mappedType, fittingSigs=fittingSigs), schemaVars, distance)
         if not doesFit2: return DOES_NOT_FIT
-        return Fits(True, schemaVars, distance)
+        return _fitsWith(schemaVars, distance)
 
     elif isinstance(b, BTMap):
         schemaVars, distance = {}, 0
@@ -600,12 +941,23 @@ def _fitsWithin(a, b, fittingSigs=False):
         if not doesFit1: return DOES_NOT_FIT
         doesFit2, schemaVars, distance = fred(fitsWithin(a.mappedType, b.mappedType, fittingSigs=fittingSigs), schemaVars, distance)
         if not doesFit2: return DOES_NOT_FIT
-        return Fits(True, schemaVars, distance)
+        return _fitsWith(schemaVars, distance)
 
     else:
         raise ProgrammerError(f'Unhandled case {a} <: {b}')
 
 
+def _fitsViaPartition(aTypes, bTypes):
+    # I_I, I_O and O_I when b has no schema variables
+    a_, ab, b_, weakenings = _partitionIntersectionTLs(aTypes, bTypes)
+    if _anyNotImplicit(b_):         # check for (matrix) <: (matrix & aliased) etc
+        return DOES_NOT_FIT         # i.e. there is something missing in a that is required by b
+    if len(a_) == 0:                # exact match is always fine
+        return _fitsAt(len(weakenings))
+    else:
+        return _processA_(a_, {}, len(weakenings) + len(a_))
+
+
 def fred(fits, schemaVars, distance):
     if not fits.fits:
         return False, schemaVars, distance
@@ -657,7 +1009,7 @@ def _processA_(a_, schemaVars, lenWeakenings):
         except:
             print('ponder some more', file=sys.stderr)
             # raise BTypeError("OPEN: Needs description")
-    return Fits(True, schemaVars, len(a_) + lenWeakenings)
+    return _fitsWith(schemaVars, len(a_) + lenWeakenings)
 
 
 # prior to 2025.05.25
@@ -682,26 +1034,31 @@ def _processA_(a_, schemaVars, lenWeakenings):
 
 
 def updateSchemaVarsWith(runningSchemaVars, runningDistance, result):
+    # answers runningSchemaVars itself unless a binding is added or weakened, in which case a copy is made (once), so
+    # the common calls from fred, _distancesEtAl, etc - no schema vars, or ones already bound to the same type - don't
+    # allocate. runningSchemaVars is never mutated so may be shared between callers
     resultFits, resultSVRs, resultDistance = result
     if not resultFits: raise ValueError(f'Can only update schemaVars when a <: b which is not the case here')
-    runningSchemaVars = dict(runningSchemaVars)
+    updated = Missing
     for TNew, tNew in resultSVRs.items():
         if TNew is T:
             continue   # OPEN: implies that T cannot be part of a schema only a general placeholder. ponder this some more
         if (tRunning := runningSchemaVars.get(TNew, Missing)) is Missing:
-            runningSchemaVars[TNew] = tNew
+            if updated is Missing: updated = dict(runningSchemaVars)
+            updated[TNew] = tNew
         elif tNew != tRunning:
             weakened = False
-            if tRunning not in _weakenings.get(tNew, ()):
-                if tNew in _weakenings.get(tRunning, ()):
-                    runningSchemaVars[TNew] = tNew
+            if not _weakenings.weakensTo(tNew, tRunning):
+                if _weakenings.weakensTo(tRunning, tNew):
+                    if updated is Missing: updated = dict(runningSchemaVars)
+                    updated[TNew] = tNew
                     weakened = True
             if not weakened:
                 raise SchemaError(f'{TNew} could be {tRunning} or {tNew} but currently we don\'t support analysing conflicting schema vars - can be probably be done with unions')
         else:
             # no change
             pass
-    return runningSchemaVars, runningDistance + resultDistance
+    return (runningSchemaVars if updated is Missing else updated), runningDistance + resultDistance
 
 
 def _partitionIntersectionTLs(A:tuple, B:tuple):
@@ -748,13 +1105,12 @@ def _partitionIntersectionTLs(A:tuple, B:tuple):
     if oAB < nAB:
         for iA, tA in enumerate(outA):
             if not tA: break
-            found = False
-            for ctA in _weakenings.get(tA, ()):
-                for iB, tB in enumerate(outB):
-                    if ctA == tB:
-                        found = True
-                        break
-                if found: break
+            # pair tA with the tB it weakens to most cheaply
+            found, best = False, Missing
+            if (closure := _weakenings.closureOf(tA)):
+                for iB_, tB_ in enumerate(outB):
+                    if tB_ and (d := closure.get(tB_, Missing)) is not Missing and (best is Missing or d < best):
+                        found, best, iB, tB = True, d, iB_, tB_
             if found:
                 anyFound = True
                 weakenings[tA] = tB
@@ -834,11 +1190,110 @@ def determineRetType(md, schemaVars, sigCaller):
     raise NotYetImplemented()
 
 
-def _find(needle, haystack):
-    try:
-        return haystack.index(needle)
-    except:
-        return -1
+# **********************************************************************************************************************
+# subtype lattice
+# **********************************************************************************************************************
+
+class _Lattice:
+    # The members of intersections (mostly atoms) are given ordinals so that an intersection, or any other type taken
+    # as an intersection of one, is a bitset. The I_I, I_O and O_I fits without schema variables then become a few
+    # integer ops rather than a merge walk of the sorted type lists followed by scans of _weakenings:
+    #   onlyB = b & ~a      - anything required by b that a doesn't have means no fit
+    #   onlyA = a & ~b      - a's extra types cost 2 each (as _processA_) and none may be explicit
+    # Alongside we keep bitsets of the explicit members, of those in a space and of those with any weakening, and
+    # weakeningClosure answers the bitset of the types a member weakens to (see _WeakeningGraph). When onlyB is left
+    # and none of onlyA's weakenings reach it nothing can be paired so there's no fit. _partitionIntersectionTLs is
+    # still used where a weakening could pair a type in onlyA with one in onlyB (that pairing is greedy and order
+    # dependent so we don't second guess it), where more than one of a's extra types is in a space (as _processA_ asks
+    # the type manager about them) and for members that aren't BTypes. Everything is dropped when the type manager's
+    # generation moves, i.e. on weaken() or a name being rebound to a different btype.
+
+    __slots__ = ['generation', 'ordById', 'typeByOrd', 'maskById', 'explicitMask', 'spacedMask', 'weakenableMask',
+                 'closureByOrd', 'hits', 'fallbacks']
+
+    def __init__(self):
+        self.generation = sys._gtm.generation
+        self.ordById = {}
+        self.typeByOrd = []
+        self.maskById = {}          # type id -> bitset of members, -1 if it has a member that isn't a BType
+        self.explicitMask = 0
+        self.spacedMask = 0
+        self.weakenableMask = 0
+        self.closureByOrd = {}
+        self.hits = 0
+        self.fallbacks = 0
+
+    def fits(self, a, b):
+        # answers the Fits for a <: b where b has no schema variables, or Missing if the answer must come from
+        # _fitsViaPartition
+        if self.generation != sys._gtm.generation: self.__init__()
+        if _implicitTypes or not isinstance(a, BType) or not isinstance(b, BType) \
+                or (maskA := self.maskOf(a)) < 0 or (maskB := self.maskOf(b)) < 0:
+            self.fallbacks += 1
+            return Missing
+        onlyA, onlyB = maskA & ~maskB, maskB & ~maskA
+        if onlyB:
+            if weakenable := onlyA & self.weakenableMask:
+                reachable = 0
+                for t in self.typesIn(weakenable):
+                    reachable |= self.weakeningClosure(t)
+                if reachable & onlyB:
+                    self.fallbacks += 1
+                    return Missing
+            self.hits += 1
+            return DOES_NOT_FIT
+        if not onlyA:
+            self.hits += 1
+            return _fitsAt(0)
+        if onlyA & self.explicitMask:
+            self.hits += 1
+            return DOES_NOT_FIT
+        if (onlyA & self.spacedMask).bit_count() > 1:
+            self.fallbacks += 1
+            return Missing
+        self.hits += 1
+        return _fitsAt(2 * onlyA.bit_count())
+
+    def maskOf(self, t):
+        if (mask := self.maskById.get(t.id, Missing)) is Missing:
+            mask = 0
+            for member in (t.types if t.__class__ == BTIntersection else (t,)):
+                if not isinstance(member, BType):
+                    mask = -1
+                    break
+                mask |= 1 << self.ordOf(member)
+            self.maskById[t.id] = mask
+        return mask
+
+    def ordOf(self, t):
+        if (i := self.ordById.get(t.id, Missing)) is Missing:
+            i = self.ordById[t.id] = len(self.typeByOrd)
+            self.typeByOrd.append(t)
+            if t.explicit: self.explicitMask |= 1 << i
+            if t.rootSpace: self.spacedMask |= 1 << i
+            if _weakenings.get(t): self.weakenableMask |= 1 << i
+        return i
+
+    def weakeningClosure(self, t):
+        # answers the bitset of the types t weakens to (as per _WeakeningGraph.closureOf)
+        if (closure := self.closureByOrd.get(i := self.ordOf(t), Missing)) is Missing:
+            closure = 0
+            for target in _weakenings.closureOf(t):
+                if isinstance(target, BType): closure |= 1 << self.ordOf(target)
+            self.closureByOrd[i] = closure
+        return closure
+
+    def typesIn(self, mask):
+        return tuple(self.typeByOrd[i] for i in range(mask.bit_length()) if (mask >> i) & 1)
+
+    def stats(self):
+        return dict(
+            ordinals=len(self.typeByOrd), masks=len(self.maskById), hits=self.hits, fallbacks=self.fallbacks,
+            generation=self.generation
+        )
+
+USE_LATTICE = True
+_lattice = _Lattice()
 
 
 # **********************************************************************************************************************
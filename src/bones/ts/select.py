@@ -10,14 +10,14 @@
 import sys
 if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
 
-import builtins
+import builtins, collections
 
 from bones import jones
 from bones.core.context import context
 from bones.core.sentinels import Missing, function
 from bones.core.errors import ProgrammerError, ErrSite, NotYetImplemented
 from bones.ts.metatypes import updateSchemaVarsWith, fitsWithin, BTFamily, BType, _btypeByClass, _BTypeById, BTUnion, \
-    BTFn, BTTuple, btype, pytype, TBI
+    BTFn, BTTuple, btype, pytype, TBI, fitsWithinMany
 from bones.ts.core import SchemaError, BTypeError
 from bones.core.utils import raiseLess, firstValue
 from bones.ts import metatypes
@@ -30,6 +30,10 @@ py = BType('py: atom in mem')
 DISABLE_RETURN_CHECK = False
 DISABLE_ARG_CHECK_FOR_SOLE_FN = False
 SHOW_ARGNAMES = True
+SELECTION_CACHE_L1_SIZE = 256               # slots in each overload's C selection cache (allocated once)
+SELECTION_CACHE_CAPACITY = 4096             # max distinct caller signatures remembered per overload
+VERIFY_DISTANCES_EVERY = 0                  # 0 - off (production), 1 - every cache miss (tests), N - 1 in N misses
+MAX_DISTANCE_DIVERGENCES = 1000             # number of divergences kept in the report (read as each one is added)
 
 
 # OPEN: small to moderate effort - implement the function/overload/family call in C so the user doesn't have to step
@@ -86,6 +90,213 @@ class _tvfunc(jones.JFunc):
             return f'{self.name}({", ".join([f"{n}:{_ppType(t)}" for t, n in zip(self.sig, self.argNames)])}) -> {self.tRet}'
 
 
+# **********************************************************************************************************************
+# selection cache
+# **********************************************************************************************************************
+
+class _SelectionCache:
+    # two level cache of caller signature -> (tvfunc, tByT)
+    #
+    # L1 is the fixed size C cache which answers a result id for the caller's arg types without leaving C. jones can
+    # neither delete individual entries nor free a cache so L1 is allocated once per overload and never replaced - a
+    # query put into it stays bound to its result id for good, i.e. the id is pinned to those tArgs. Once L1 is full
+    # further results live only in L2.
+    #
+    # L2 is the authoritative Python side map of tArgs -> result id. Eviction is CLOCK (second chance) - a hit in
+    # either level sets the result's ref bit, and the sweep evicts unreferenced unpinned results (clearing the bits of
+    # the referenced ones as the hand passes) until a quarter of the capacity is free. Result ids are recycled via a
+    # free list so the ids held by L1 are always small and dense.
+    #
+    # When the selections go stale (weaken(), a rebind or a new signature) the results are dropped but the tArgs <->
+    # id bindings are kept, so each is reselected lazily on its next hit without touching L1.
+
+    __slots__ = [
+        'numargs', 'size', 'capacity', 'pSC', 'results', 'refs', 'pinned', 'tArgsById', 'idByTArgs', 'freeIds',
+        'hand', 'hits', 'l2Hits', 'misses', 'evictions', 'invalidations', 'generation'
+    ]
+
+    def __init__(self, numargs, capacity=Missing, size=Missing):
+        self.numargs = numargs
+        self.generation = sys._gtm.generation       # the selections are stale once weaken() or a rebind bumps this
+        self.capacity = SELECTION_CACHE_CAPACITY if capacity is Missing else capacity
+        self.size = min(SELECTION_CACHE_L1_SIZE if size is Missing else size, self.capacity)
+        if self.size < 1: raise ProgrammerError(f'Selection cache capacity must be at least 1 - got {self.capacity}')
+        self.pSC = jones.sc_new(numargs, self.size)
+        self.results = []               # result id - 1 -> (tvfunc, tByT) or Missing if it needs (re)selecting
+        self.refs = []                  # result id - 1 -> CLOCK ref bit
+        self.pinned = []                # result id - 1 -> True if L1 holds the id
+        self.tArgsById = []             # result id - 1 -> tArgs or Missing if the id is free
+        self.idByTArgs = {}             # tArgs -> result id
+        self.freeIds = []
+        self.hand = 0
+        self.hits = 0
+        self.l2Hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def resultFor(self, overload, args):
+        # called on an L1 miss - answers (tvfunc, tByT) putting the result into L2 and, whilst it has room, L1
+        tArgs = tuple(jones.sc_tArgsFromQuery(self.pSC, _BTypeById))
+        if (resultId := self.idByTArgs.get(tArgs, Missing)) is Missing:
+            self.misses += 1
+            tvfunc, tByT, distance, argDistances = overload._selectFunction(tArgs)
+            result = (tvfunc, tByT)
+            if (resultId := self._newResultId(tArgs, result)) is Missing:
+                return result           # L2 is full of pinned results so answer it uncached
+        elif (result := self.results[resultId - 1]) is Missing:
+            result = self.reselect(overload, resultId)
+        else:
+            self.l2Hits += 1
+            self.refs[resultId - 1] = True
+        if not self.pinned[resultId - 1] and (iNext := jones.sc_nextFreeArrayIndex(self.pSC)) != 0:
+            jones.sc_atArrayPut(self.pSC, iNext, jones.sc_queryPtr(self.pSC), resultId)
+            self.pinned[resultId - 1] = True
+        return result
+
+    def reselect(self, overload, resultId):
+        # the result was dropped by invalidate() but the id is still bound to its tArgs so just select again
+        self.misses += 1
+        self.refs[resultId - 1] = True
+        tvfunc, tByT, distance, argDistances = overload._selectFunction(self.tArgsById[resultId - 1])
+        self.results[resultId - 1] = result = (tvfunc, tByT)
+        return result
+
+    def invalidate(self):
+        self.generation = sys._gtm.generation
+        self.results = [Missing] * len(self.results)
+        self.invalidations += 1
+
+    def _newResultId(self, tArgs, result):
+        if len(self.idByTArgs) >= self.capacity and not self._sweep():
+            return Missing
+        if self.freeIds:
+            resultId = self.freeIds.pop()
+            self.results[resultId - 1] = result
+            self.refs[resultId - 1] = False
+            self.pinned[resultId - 1] = False
+            self.tArgsById[resultId - 1] = tArgs
+        else:
+            self.results.append(result)
+            self.refs.append(False)
+            self.pinned.append(False)
+            self.tArgsById.append(tArgs)
+            resultId = len(self.results)
+        self.idByTArgs[tArgs] = resultId
+        return resultId
+
+    def _sweep(self):
+        # CLOCK - advance the hand evicting unreferenced unpinned results until a quarter of the capacity is free (or
+        # two turns find nothing more to evict), answering the number evicted. L1 never holds the evicted ids so
+        # needn't be touched
+        target, freed, n = max(1, self.capacity // 4), 0, len(self.results)
+        for _ in range(2 * n):
+            if freed >= target: break
+            i = self.hand
+            self.hand = (self.hand + 1) % n
+            if self.tArgsById[i] is Missing or self.pinned[i]:
+                continue
+            if self.refs[i]:
+                self.refs[i] = False
+            else:
+                del self.idByTArgs[self.tArgsById[i]]
+                self.results[i] = Missing
+                self.tArgsById[i] = Missing
+                self.freeIds.append(i + 1)
+                freed += 1
+        self.evictions += freed
+        return freed
+
+    def stats(self):
+        return dict(
+            hits=self.hits, l2Hits=self.l2Hits, misses=self.misses, evictions=self.evictions,
+            invalidations=self.invalidations, size=len(self.idByTArgs), l1Size=self.size, l1Used=sum(self.pinned),
+            capacity=self.capacity
+        )
+
+
+
+# **********************************************************************************************************************
+# dispatch table
+# **********************************************************************************************************************
+
+class _DispatchTable:
+    # an Overload compiled for cold selection - rather than scanning every signature and calling fitsWithin for each
+    # arg, each arg position keeps a map of caller type -> (mask of the signatures the type fits, Fits by signature
+    # index) which is filled lazily the first time a type is seen in that position. Fallback (py) args are
+    # precomputed as masks so a selection is the AND of one mask per arg followed by a distance calculation for the
+    # few surviving candidates. Signatures with schema variables are the only ones needing the tByT merge.
+    #
+    # The table is discarded by Overload.__setitem__ so it never needs to handle a signature being added, and is
+    # rebuilt when the type manager's generation moves as the cached fits may then be stale.
+
+    __slots__ = ['sigs', 'fns', 'allMask', 'fallbackMasks', 'entriesByTByArg', 'generation', 'jsAndTFnArgsByArg']
+
+    def __init__(self, tvfuncBySig, numargs):
+        self.generation = sys._gtm.generation
+        self.sigs = list(tvfuncBySig.keys())
+        self.fns = list(tvfuncBySig.values())
+        self.allMask = (1 << len(self.sigs)) - 1
+        self.fallbackMasks = [0] * numargs
+        for j, fnSig in enumerate(self.sigs):
+            for i, tFnArg in enumerate(fnSig):
+                if tFnArg == py:
+                    self.fallbackMasks[i] |= 1 << j
+        self.entriesByTByArg = [{} for i in range(numargs)]
+        # per arg the indices of the non-fallback signatures and their types in that position, for fitsWithinMany
+        self.jsAndTFnArgsByArg = []
+        for i in range(numargs):
+            js = [j for j in range(len(self.sigs)) if not (self.fallbackMasks[i] >> j) & 1]
+            self.jsAndTFnArgsByArg.append((js, [self.sigs[j][i] for j in js]))
+
+    def fitsByArg(self, callerSig):
+        # answers the (fitsMask, fitsByJ) for each arg of callerSig
+        answer = []
+        for i, tArg in enumerate(callerSig):
+            if (entry := self.entriesByTByArg[i].get(tArg, Missing)) is Missing:
+                fitsMask, fitsByJ = self.fallbackMasks[i], {}
+                js, tFnArgs = self.jsAndTFnArgsByArg[i]
+                flags, _, fitses = fitsWithinMany(tArg, tFnArgs)
+                for k, j in enumerate(js):
+                    if flags[k]:
+                        fitsMask |= 1 << j
+                        fitsByJ[j] = fitses[k]
+                entry = self.entriesByTByArg[i][tArg] = (fitsMask, fitsByJ)
+            answer.append(entry)
+        return answer
+
+    def candidates(self, fitsByArg):
+        # answers the indices, in order of definition, of the signatures that every arg fits (or falls back to)
+        mask = self.allMask
+        for fitsMask, _ in fitsByArg:
+            mask &= fitsMask
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            yield low.bit_length() - 1
+
+    def distancesEtAl(self, j, fitsByArg):
+        # same answer as _distancesEtAl(callerSig, self.sigs[j]) but from the precomputed fits
+        fallback, schemaVars, argDistances = False, {}, []
+        for fitsMask, fitsByJ in fitsByArg:
+            if (fits := fitsByJ.get(j, Missing)) is Missing:
+                if (fitsMask >> j) & 1:
+                    fallback = True
+                    argDistances.append(0.5)
+                else:
+                    return False, fallback, schemaVars, argDistances
+            elif fits.tByT:
+                try:
+                    schemaVars, argDistance = updateSchemaVarsWith(schemaVars, 0, fits)
+                except SchemaError:
+                    return False, fallback, schemaVars, argDistances
+                argDistances.append(argDistance)
+            else:
+                argDistances.append(fits.distance)
+        return True, fallback, schemaVars, argDistances
+
+
+
 # **********************************************************************************************************************
 # Overload
 # **********************************************************************************************************************
@@ -93,7 +304,7 @@ class _tvfunc(jones.JFunc):
 class Overload(jones.JOverload):
     # limited dictionary style interface object that stores tvfunc by sig for a given name and number of args
 
-    __slots__ = ['_fnsTBI', '_t_', '_tUpperBounds_', 'cache']
+    __slots__ = ['_fnsTBI', '_t_', '_tUpperBounds_', 'cache', 'cacheCapacity', '_dispatch']
 
     @classmethod
     def newForMutation(cls, name, numargs):
@@ -106,6 +317,14 @@ class Overload(jones.JOverload):
         instance._tUpperBounds_ = Missing           # set else where
         instance._tvfuncBySig = {}
         instance.cache = Missing
+        instance.cacheCapacity = Missing            # Missing means use SELECTION_CACHE_CAPACITY
+        instance._dispatch = Missing                # _DispatchTable compiled on the first cache miss
+        return instance
+
+    def copyForMutation(self):
+        instance = Overload.newForMutation(self.name, self.numargs)
+        instance._tvfuncBySig = dict(self._tvfuncBySig)
+        instance.cacheCapacity = self.cacheCapacity
         return instance
 
     def __new__(self):
@@ -125,6 +344,9 @@ class Overload(jones.JOverload):
         if tvfunc.numargs != self.numargs: raise ProgrammerError()
         self._t_ = Missing
         self._tUpperBounds_ = Missing
+        if self.cache is not Missing:
+            self.cache.invalidate()     # cached selections may no longer be the nearest
+        self._dispatch = Missing
         needsInferring = False
         for tArg in tvfunc.tArgs:
             if tArg == TBI:
@@ -193,38 +415,59 @@ class Overload(jones.JOverload):
             if DISABLE_ARG_CHECK_FOR_SOLE_FN and len(fns := self._tvfuncBySig) == 1:
                 return firstValue(fns), {}, True
 
-            if self.cache is Missing:
-                pSC = jones.sc_new(self.numargs, 100)
-                self.cache = (pSC, [])
-            pSC, results = self.cache
+            if (cache := self.cache) is Missing:
+                cache = self.cache = _SelectionCache(self.numargs, self.cacheCapacity)
+            elif cache.generation != sys._gtm.generation:
+                cache.invalidate()
+            pSC = cache.pSC
 
             hasValue = jones.sc_fillQuerySlotWithBTypesOf(pSC, args, _btypeByClass, py, _CoWProxy)
 
             resultId = jones.sc_getFnId(pSC)
 
             if resultId == 0:
-                tArgs = jones.sc_tArgsFromQuery(pSC, _BTypeById)
-                tvfunc, tByT, distance, argDistances = self._selectFunction(tArgs)
-                results.append((tvfunc, tByT))
-                pQuery = jones.sc_queryPtr(pSC)
-                iNext = jones.sc_nextFreeArrayIndex(pSC)
-                if iNext == 0:
-                    raise RuntimeError("Array not big enough")
-                jones.sc_atArrayPut(pSC, iNext, pQuery, len(results))
+                tvfunc, tByT = cache.resultFor(self, args)
             else:
-                tvfunc, tByT = results[resultId - 1]
+                if (result := cache.results[resultId - 1]) is Missing:
+                    tvfunc, tByT = cache.reselect(self, resultId)
+                else:
+                    cache.hits += 1
+                    cache.refs[resultId - 1] = True
+                    tvfunc, tByT = result
         return tvfunc, tByT, hasValue
 
+    def cacheStats(self):
+        # answers the selection cache counters - hits (L1), l2Hits, misses (i.e. calls to _selectFunction), evictions
+        # and invalidations (the selections going stale)
+        if self.cache is Missing:
+            capacity = SELECTION_CACHE_CAPACITY if self.cacheCapacity is Missing else self.cacheCapacity
+            return dict(
+                hits=0, l2Hits=0, misses=0, evictions=0, invalidations=0, size=0, l1Size=0, l1Used=0, capacity=capacity
+            )
+        return self.cache.stats()
+
+    def setCacheCapacity(self, capacity):
+        # the C cache is kept (jones can't free it) - a smaller L2 is swept down as new results arrive
+        if capacity < 1: raise ProgrammerError(f'Selection cache capacity must be at least 1 - got {capacity}')
+        self.cacheCapacity = capacity
+        if self.cache is not Missing: self.cache.capacity = capacity
+        return self
+
     def _selectFunction(self, callerSig):
         # OPEN: implement this section in C
         fallbacks, matches = [], []
-        # search though each function in _tvfuncBySig recording catchAll matches separately from actual matches
+        if (table := self._dispatch) is Missing or table.generation != sys._gtm.generation:
+            table = self._dispatch = _DispatchTable(self._tvfuncBySig, self.numargs)
+        fitsByArg = table.fitsByArg(callerSig)
+        if _sampleDistanceVerification():
+            for j, fnSig in enumerate(table.sigs):
+                _verifyDistances(self, callerSig, fnSig, table.distancesEtAl(j, fitsByArg))
+        # search though each candidate function recording catchAll matches separately from actual matches
         distance = 10000
-        for fnSig, fn in self._tvfuncBySig.items():
+        for j in table.candidates(fitsByArg):
+            fn = table.fns[j]
             distance = 10000
-            actual = match, fallback, schemaVars, argDistances = jones._distancesEtAl(callerSig, fnSig)
-            expected = _distancesEtAl(callerSig, fnSig)
-            assert actual == expected, f'{actual} != {expected} for {fnSig} vs {callerSig}'
+            match, fallback, schemaVars, argDistances = table.distancesEtAl(j, fitsByArg)
             if match:
                 distance = sum(argDistances)
                 if fallback:
@@ -283,13 +526,71 @@ class Overload(jones.JOverload):
 
 
 
+# **********************************************************************************************************************
+# BoundFn
+# **********************************************************************************************************************
+
+class BoundFn:
+    # a tvfunc with its selection already resolved and its tByT baked in so that loops over homogeneous data can hoist
+    # dispatch out of the loop - calls the implementation directly, i.e. without the return type check
+    #
+    # in guard mode each call checks type(x) is the class seen at resolution (or on the first call if resolved from
+    # BTypes), falling back to a full selection, raising if that would choose a different tvfunc. Args whose type isn't
+    # determined by their class alone (tvs, CoW proxies, fns, BTypes) always take the full selection.
+
+    __slots__ = ['tvfunc', 'tByT', '_v', '_pass_tByT', '_overload', '_guard', '_classes']
+
+    def __init__(self, tvfunc, tByT, overload, guard, classes=Missing):
+        self.tvfunc = tvfunc
+        self.tByT = tByT
+        self._v = tvfunc._v
+        self._pass_tByT = tvfunc.pass_tByT
+        self._overload = overload
+        self._guard = guard
+        self._classes = classes
+
+    def __call__(self, *args):
+        if self._guard:
+            classes = self._classes
+            if classes is Missing or len(args) != len(classes):
+                self._checkArgs(args)
+            else:
+                for x, c in zip(args, classes):
+                    if builtins.type(x) is not c:
+                        self._checkArgs(args)
+                        break
+        if self._pass_tByT:
+            return self._v(*args, tByT=self.tByT)
+        else:
+            return self._v(*args)
+
+    def _checkArgs(self, args):
+        if len(args) != self.tvfunc.numargs:
+            raise TypeError(f'{self.tvfunc.name} takes {self.tvfunc.numargs} args but {len(args)} were given')
+        if args:
+            # via the overload's selection cache so a guard miss costs the same as a normal dispatch
+            tvfunc, tByT, hasValue = self._overload.selectFunction(*args)
+            if tvfunc is not self.tvfunc or tByT != self.tByT:
+                callerSig = tuple(_typeOf(x) for x in args)
+                raiseLess(BTypeError(
+                    f'{_ppCall(self.tvfunc.name, callerSig)} would dispatch to {tvfunc.ppSig()} not {self.tvfunc.ppSig()}',
+                    ErrSite("#1")
+                ))
+        if self._classes is Missing and all(_typeIsClassDetermined(x) for x in args):
+            self._classes = tuple(builtins.type(x) for x in args)
+
+    def __repr__(self):
+        return f'BoundFn({self.tvfunc.ppSig()}{", guarded" if self._guard else ""})'
+
+
+
 # **********************************************************************************************************************
 # Family
 # **********************************************************************************************************************
 
 class Family(jones.JFamily):
 
-    __slots__ = ['style', '_t', '_doc']
+    __slots__ = ['style', '_t_', '_doc', '_ownedNumArgs']
 
     # we provide two construction interfaces - one used by the parser to create a new family for a function that can
     # hold just a single function and the other used coppertop to create which is the intersection of two or more
@@ -301,39 +602,45 @@ class Family(jones.JFamily):
         instance._overloadByNumArgs = []
         instance.name = name
         instance.style = style
-        instance._t = Missing
+        instance._t_ = Missing
         instance._doc = Missing
+        instance._ownedNumArgs = set()
         return instance
 
     def __new__(cls, *args, name=Missing):
+        # extends incrementally - the overloads of the first family are shared with the new family and only those
+        # overloads that gain a tvfunc are copied, so registering N overloads one at a time is O(N) rather than O(N^2).
+        # _ownedNumArgs records the overloads a family doesn't share, and getOverload copies any other before handing
+        # it out for mutation
 
-        name, style, tvfuncs, maxNumArgs = Missing, Missing, [], 0
+        name, style, _overloadByNumArgs, copied = Missing, Missing, [], set()
 
         for arg in args:
             if not arg: continue
-            if name is Missing: name, style = arg.name, arg.style
+            if name is Missing:
+                name, style = arg.name, arg.style
+                if isinstance(arg, Family):
+                    # the tvfuncs in arg were checked when it was constructed
+                    _overloadByNumArgs = list(arg._overloadByNumArgs)
+                    arg._ownedNumArgs = set()       # arg now shares all its overloads
+                    continue
             if isinstance(arg, Family):
                 for overload in arg._overloadByNumArgs:
                     for _, tvfunc in overload.items():
                         if isinstance(tvfunc, _tvfunc):
                             cls._checkTvfunc(tvfunc, name, style)
-                            tvfuncs.append(tvfunc)
+                            cls._addTvfunc(_overloadByNumArgs, copied, name, tvfunc)
                         else:
                             raiseLess(ProgrammerError("unknown dispatcher class", ErrSite(cls, "#5")))
-                if len(arg._overloadByNumArgs) > maxNumArgs: maxNumArgs = len(arg._overloadByNumArgs) - 1  # don't forget 0 args
+                if len(arg._overloadByNumArgs) > len(_overloadByNumArgs):
+                    cls._ensureOverloads(_overloadByNumArgs, copied, name, len(arg._overloadByNumArgs) - 1)
             elif isinstance(arg, _tvfunc):
                 cls._checkTvfunc(arg, name, style)
-                if len(arg.sig) > maxNumArgs: maxNumArgs = len(arg.sig)
-                tvfuncs.append(arg)
+                cls._addTvfunc(_overloadByNumArgs, copied, name, arg)
             else:
                 raiseLess(ProgrammerError("unhandled dispatcher class", ErrSite(cls, "#11")))
 
-        _overloadByNumArgs = [Overload.newForMutation(name, numargs) for numargs in range(maxNumArgs + 1)]
-        for tvfunc in tvfuncs:
-            # oldD = _overloadByNumArgs[len(tvfunc.sig)].get(tvfunc.sig, Missing)
-            # if oldD is not Missing and oldD.modname != tvfunc.modname:
-            #     raise CoppertopError(f'Found definition of {_ppFn(name, tvfunc.sig)} in "{tvfunc.modname}" and "{oldD.modname}"', ErrSite(cls, "#12"))
-            _overloadByNumArgs[len(tvfunc.sig)][tvfunc.sig] = tvfunc
+        cls._ensureOverloads(_overloadByNumArgs, copied, name, 0)
         # if len(_overloadByNumArgs) == 1 and len(_overloadByNumArgs[0]) == 1:
         #     # this can occur in a REPL where a function is being redefined
         #     # SHOULDDO think this through as potentially we could overload functions in the repl accidentally which
@@ -343,25 +650,89 @@ class Family(jones.JFamily):
         instance.name = name
         instance.style = style
         instance._overloadByNumArgs = _overloadByNumArgs
-        ts = []
-        for overload in _overloadByNumArgs:
-            for sig, fn in overload.items():
-                ts.append(fn._t)
-        if ts:
-            instance._t = BTFamily(*ts)
-        else:
-            instance._t = Missing    # Empty Family is being constructed
+        instance._t_ = Missing      # the BTFamily is only built when _t is first asked for
         instance._doc = None
+        instance._ownedNumArgs = copied
         return instance
 
+    @classmethod
+    def _ensureOverloads(cls, overloads, copied, name, numargs):
+        while len(overloads) <= numargs:
+            copied.add(len(overloads))
+            overloads.append(Overload.newForMutation(name, len(overloads)))
+
+    @classmethod
+    def _addTvfunc(cls, overloads, copied, name, tvfunc):
+        numargs = len(tvfunc.sig)
+        cls._ensureOverloads(overloads, copied, name, numargs)
+        if numargs not in copied:
+            overloads[numargs] = overloads[numargs].copyForMutation()
+            copied.add(numargs)
+        # oldD = overloads[numargs].get(tvfunc.sig, Missing)
+        # if oldD is not Missing and oldD.modname != tvfunc.modname:
+        #     raise CoppertopError(f'Found definition of {_ppFn(name, tvfunc.sig)} in "{tvfunc.modname}" and "{oldD.modname}"', ErrSite(cls, "#12"))
+        overloads[numargs][tvfunc.sig] = tvfunc
+
+    @property
+    def _t(self):
+        if self._t_ is Missing:
+            ts = [fn._t for overload in self._overloadByNumArgs for sig, fn in overload.items()]
+            if ts:
+                self._t_ = BTFamily(*ts)
+            # else an empty Family so leave as Missing
+        return self._t_
+
     # def __call__(self, *args):
     #     implemented in C
 
     def getOverload(self, numargs):
+        self._t_ = Missing      # the caller may be about to mutate the overload
         if numargs >= len(self._overloadByNumArgs):
+            self._ownedNumArgs.update(range(len(self._overloadByNumArgs), numargs + 1))
             self._overloadByNumArgs = self._overloadByNumArgs + [Overload.newForMutation(self.name, numargs) for numargs in range(len(self._overloadByNumArgs), numargs + 1)]
+        elif numargs not in self._ownedNumArgs:
+            # may be shared with the family this one was extended from (or that was extended from this one)
+            overloads = list(self._overloadByNumArgs)
+            overloads[numargs] = overloads[numargs].copyForMutation()
+            self._overloadByNumArgs = overloads
+            self._ownedNumArgs.add(numargs)
         return self._overloadByNumArgs[numargs]
 
+    def select(self, tArgs, *, guard=False):
+        # resolve once, call many - answers a BoundFn for the tvfunc that would be dispatched to for args of types
+        # tArgs (BTypes or Python classes)
+        numargs = len(tArgs)
+        if numargs >= len(self._overloadByNumArgs) or not (overload := self._overloadByNumArgs[numargs]):
+            raiseLess(BTypeError(f'No matches for {_ppCall(self.name, tArgs)} - {self.name} has no {numargs} arg overload', ErrSite("#1")))
+        classes = tuple(tArgs) if all(builtins.type(t) is type for t in tArgs) else Missing
+        callerSig = tuple(_btypeByClass.get(t, t) if builtins.type(t) is type else t for t in tArgs)
+        if numargs == 0:
+            tvfunc, tByT = overload._tvfuncBySig[()], {}
+        else:
+            tvfunc, tByT, distance, argDistances = overload._selectFunction(callerSig)
+        return BoundFn(tvfunc, tByT, overload, guard, classes)
+
+    def map(self, xs):
+        # batched dispatch of the 1 arg overload over a list, tuple or NumPy object array - each element type's tvfunc
+        # is selected once and the implementations are then called in input order, checking the return type (unless
+        # DISABLE_RETURN_CHECK) just as `fn(x)` would. Answers the results in the same kind of container as xs
+        isArray = builtins.type(xs).__module__ == 'numpy' and hasattr(xs, 'shape')
+        values = list(xs.flat) if isArray else xs
+        boundByT, answer, checkReturn = {}, [], not DISABLE_RETURN_CHECK
+        for x in values:
+            if (bound := boundByT.get(t := _typeOf(x), Missing)) is Missing:
+                bound = boundByT[t] = self.select((t,))
+            ret = bound._v(x, tByT=bound.tByT) if bound._pass_tByT else bound._v(x)
+            if checkReturn and not fitsWithin(_typeOf(ret), bound.tvfunc.tRet):
+                _tvfuncErrorCallback2(bound.tvfunc, ret)
+            answer.append(ret)
+        if isArray:
+            import numpy as np
+            array = np.empty(len(answer), dtype=object)
+            array[:] = answer
+            return array.reshape(xs.shape)
+        return tuple(answer) if isinstance(xs, tuple) else answer
+
     def _tPartial(self, num_args, o_tbc):
         # if this is a bottleneck cache it with an invalidation mechanism if an underlying overload changes
         ts = []
@@ -455,6 +826,12 @@ def _typeOf(x) -> pytype + btype:
             t = builtins.type(x._target)    # return the type of thing being proxied
         return _btypeByClass.get(t, t)      # type python types as their bones equivalent
 
+def _typeIsClassDetermined(x):
+    # True if _typeOf(x) depends only on builtins.type(x)
+    return not (
+        hasattr(x, '_t') or isinstance(x, (jones._fn, jones._pfn, BType)) or builtins.type(x) is _CoWProxy
+    )
+
 def _tvfuncErrorCallback1(ex, tvfunc):
     if ex.args and ' required positional argument' in ex.args[0]:
         # instead of TypeError: createHelper() missing 1 required positional argument: 'otherHandSizesById'
@@ -492,6 +869,61 @@ def _distancesEtAl(callerSig, fnSig):
             argDistances.append(argDistance)
     return match, fallback, schemaVars, argDistances
 
+
+# distance verification - checks the dispatch table's distance calculation, and the Python _distancesEtAl it's derived
+# from, against jones' implementation
+
+DistanceDivergence = collections.namedtuple(
+    'DistanceDivergence', ['overload', 'callerSig', 'fnSig', 'implementation', 'actual', 'expected']
+)
+
+_distanceVerification = dict(misses=0, verified=0, divergences=Missing)
+
+def _sampleDistanceVerification():
+    if not (everyN := VERIFY_DISTANCES_EVERY): return False
+    _distanceVerification['misses'] += 1
+    return _distanceVerification['misses'] % everyN == 0
+
+def _verifyDistances(overload, callerSig, fnSig, actual):
+    _distanceVerification['verified'] += 1
+    expected = _distancesOrException(jones._distancesEtAl, callerSig, fnSig)
+    for implementation, answer in (('table', actual), ('python', _distancesOrException(_distancesEtAl, callerSig, fnSig))):
+        if _comparableDistances(answer) != _comparableDistances(expected):
+            if (divergences := _distanceVerification['divergences']) is Missing \
+                    or divergences.maxlen != MAX_DISTANCE_DIVERGENCES:
+                divergences = _distanceVerification['divergences'] = collections.deque(
+                    divergences or (), maxlen=MAX_DISTANCE_DIVERGENCES
+                )
+            divergences.append(DistanceDivergence(
+                f'{overload.name}_{overload.numargs}', tuple(callerSig), tuple(fnSig), implementation, answer, expected
+            ))
+
+def _distancesOrException(distancesEtAl, callerSig, fnSig):
+    try:
+        return distancesEtAl(callerSig, fnSig)
+    except Exception as ex:
+        return ex
+
+def _comparableDistances(x):
+    # the partial results of a non-match are incidental so only compare them on a match, and jones may answer a list
+    # for the distances and exceptions are equal if they're of the same type
+    if isinstance(x, Exception): return type(x)
+    match, fallback, schemaVars, argDistances = x
+    return (True, bool(fallback), dict(schemaVars), tuple(argDistances)) if match else (False,)
+
+def distanceDivergences():
+    # answers the report of dispatch table and Python distance calculations that disagreed with jones, oldest first
+    return dict(
+        misses=_distanceVerification['misses'],
+        verified=_distanceVerification['verified'],
+        divergences=list(_distanceVerification['divergences'] or ())
+    )
+
+def clearDistanceDivergences():
+    _distanceVerification['misses'] = 0
+    _distanceVerification['verified'] = 0
+    _distanceVerification['divergences'] = Missing
+
 class DummyDb():
     def disable_tracing(self):
         pass
@@ -7,34 +7,63 @@
 # License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
 # **********************************************************************************************************************
 
-import antlr4, traceback as tb, sys
+import traceback as tb, sys
 from typing import Text
 
 from bones.jones import BTypeError
 from bones.core.sentinels import Missing
 from bones.ts.core import TLError
-from bones.ts._type_lang.TypeLangLexer import TypeLangLexer
-from bones.ts._type_lang.TypeLangParser import TypeLangParser
-from bones.ts._type_lang.ast_builder import TypeLangAstBuilder
+from bones.ts._type_lang.tl_snapshot import TLSnapshot
+from bones.ts._type_lang.ast_nodes import ReturnNode
 
+# the antlr4 runtime and generated parser are only imported when a source isn't in the snapshot and the fast parser is
+# turned off
+
+
+USE_SNAPSHOT = True
+USE_FAST_PARSER = True      # False to parse with the ANTLR generated parser
+USE_EVAL_MEMO = True
+EVAL_MEMO_CAPACITY = 10000
 
 
 class TypeLangInterpreter:
     def __init__(self, tm):
         self._tm = tm
+        self._snapshot = Missing if USE_SNAPSHOT else False
+        # pure sources, i.e. a single expression or lookup that binds nothing, are memoised as normalised src -> btype
+        # id - the id rather than the btype so that the answer reflects any replaceWith done by BType.__new__
+        self._memo = {} if USE_EVAL_MEMO else False
+        self._memoGeneration = tm.generation if USE_EVAL_MEMO else Missing
+        self._memoStats = dict(hits=0, misses=0, invalidations=0)
 
     def eval(self, src):
-        if isinstance(src, Text): src = antlr4.InputStream(src)
-        l = TypeLangLexer(src)
-        stream = antlr4.CommonTokenStream(l)
-        p = TypeLangParser(stream)
-        tree = p.tl_body()
-
-        w = antlr4.ParseTreeWalker()
-        b = TypeLangAstBuilder()
-        w.walk(b, tree)
+        if (memo := self._memo) is False or not isinstance(src, Text):
+            return self._eval(self.parse(src))
+        if self._memoGeneration != (generation := self._tm.generation):
+            # a name has been rebound so lookups may now answer differently
+            if memo: self._memoStats['invalidations'] += 1
+            memo.clear()
+            self._memoGeneration = generation
+        key = src if '//' in src else ' '.join(src.split())
+        if (id := memo.get(key, Missing)) is not Missing:
+            self._memoStats['hits'] += 1
+            return self._tm.fromId(id)
+        self._memoStats['misses'] += 1
+        ast = self.parse(src)
+        answer = self._eval(ast)
+        # atoms defined in parentheses are bound before the return so a single ReturnNode means nothing was bound
+        if len(ast) == 1 and isinstance(ast[0], ReturnNode) and answer is not Missing \
+                and self._tm.generation == generation:
+            if len(memo) >= EVAL_MEMO_CAPACITY: del memo[next(iter(memo))]
+            memo[key] = answer.id
+        return answer
+
+    def memoStats(self):
+        return dict(self._memoStats, size=len(self._memo) if self._memo is not False else 0)
+
+    def _eval(self, ast):
         last = Missing
-        for element in b.ast:
+        for element in ast:
             try:
                 last = element.eval(self._tm) or last
             except BTypeError as ex:
@@ -42,6 +71,49 @@ class TypeLangInterpreter:
                 raise TLError(f'{element} {element.loc.l1}:{element.loc.l2}') from ex
         return last
 
+    def evalFile(self, path):
+        with open(path) as f:
+            return self.eval(f.read())
+
+    def parse(self, src):
+        if not isinstance(src, Text):
+            return parseTl(src)
+        if (snapshot := self._snapshot) is Missing:
+            snapshot = self._snapshot = TLSnapshot.load()
+            if snapshot is Missing: snapshot = self._snapshot = False
+        if snapshot is False:
+            return parseTl(src)
+        if (ast := snapshot.get(src)) is Missing:
+            ast = parseTl(src)
+            snapshot.put(src, ast)
+        return ast
+
+
+def parseTl(src):
+    # answers the list of AST nodes for src (a str or an antlr4 stream)
+    if USE_FAST_PARSER and isinstance(src, Text):
+        from bones.ts._type_lang.fast_parser import parseTl as parseTlFast
+        return parseTlFast(src)
+    return parseTlWithAntlr(src)
+
+
+def parseTlWithAntlr(src):
+    import antlr4
+    from bones.ts._type_lang.TypeLangLexer import TypeLangLexer
+    from bones.ts._type_lang.TypeLangParser import TypeLangParser
+    from bones.ts._type_lang.ast_builder import TypeLangAstBuilder
+
+    if isinstance(src, Text): src = antlr4.InputStream(src)
+    l = TypeLangLexer(src)
+    stream = antlr4.CommonTokenStream(l)
+    p = TypeLangParser(stream)
+    tree = p.tl_body()
+
+    w = antlr4.ParseTreeWalker()
+    b = TypeLangAstBuilder()
+    w.walk(b, tree)
+    return b.ast
+
 
 def stackAndTbToStderr(ex, title):
     s_fss = list(reversed(tb.StackSummary.extract(tb.walk_stack(None))))
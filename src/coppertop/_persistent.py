@@ -0,0 +1,396 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Persistent (immutable, structurally shared) collections for _CoWScope - an update answers a new collection sharing
+# all but O(log32 n) nodes with the old one so there is never a need to copy the whole thing.
+#
+# PVector - a 32 way trie plus a tail (as in Clojure's PersistentVector), appends go to the tail which is pushed into
+# the trie when full, set copies the path from the root to the leaf.
+#
+# PMap - a hash array mapped trie, each node holds a 32 bit bitmap of the 5 bit hash fragments present and a packed
+# list of entries, each either a (key, value) pair or a child node. Keys whose 64 bit hashes are equal end up in a
+# collision node.
+#
+# Nodes are plain lists that are never mutated once they are reachable from a collection.
+
+
+import sys
+if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
+
+from bones.core.sentinels import Missing
+
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_HASH_BITS = 64
+
+
+
+# **********************************************************************************************************************
+# PVector
+# **********************************************************************************************************************
+
+class PVector:
+    __slots__ = ['_count', '_shift', '_root', '_tail']
+
+    def __init__(self, xs=()):
+        v = _EMPTY_VECTOR_PARTS if not xs else PVector._fromIterable(xs)
+        self._count, self._shift, self._root, self._tail = v
+
+    @staticmethod
+    def _fromIterable(xs):
+        count, shift, root, tail = _EMPTY_VECTOR_PARTS
+        for x in xs:
+            count, shift, root, tail = PVector._appended(count, shift, root, tail, x)
+        return count, shift, root, tail
+
+    @classmethod
+    def _new(cls, count, shift, root, tail):
+        v = object.__new__(cls)
+        v._count, v._shift, v._root, v._tail = count, shift, root, tail
+        return v
+
+    def _tailOffset(self):
+        return 0 if self._count < _WIDTH else ((self._count - 1) >> _BITS) << _BITS
+
+    def _leafFor(self, i):
+        if i >= self._tailOffset(): return self._tail
+        node = self._root
+        for level in range(self._shift, 0, -_BITS):
+            node = node[(i >> level) & _MASK]
+        return node
+
+    def _index(self, i):
+        if i < 0: i += self._count
+        if not 0 <= i < self._count: raise IndexError('PVector index out of range')
+        return i
+
+    # reading
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return PVector([self[j] for j in range(*i.indices(self._count))])
+        i = self._index(i)
+        return self._leafFor(i)[i & _MASK]
+
+    def __iter__(self):
+        for start in range(0, self._count, _WIDTH):
+            yield from self._leafFor(start)
+
+    def __reversed__(self):
+        for i in range(self._count - 1, -1, -1):
+            yield self[i]
+
+    def __contains__(self, x):
+        return any(e == x for e in self)
+
+    def index(self, x):
+        for i, e in enumerate(self):
+            if e == x: return i
+        raise ValueError(f'{x!r} is not in PVector')
+
+    def count(self, x):
+        return sum(1 for e in self if e == x)
+
+    def __eq__(self, other):
+        if isinstance(other, (PVector, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __add__(self, rhs):
+        return self.extend(rhs)
+
+    def __repr__(self):
+        return f'PVector({list(self)!r})'
+
+    def tolist(self):
+        return list(self)
+
+    # updating - each answers a new PVector
+
+    def set(self, i, x):
+        i = self._index(i)
+        if i >= self._tailOffset():
+            tail = list(self._tail)
+            tail[i & _MASK] = x
+            return PVector._new(self._count, self._shift, self._root, tail)
+        return PVector._new(self._count, self._shift, _assoc(self._shift, self._root, i, x), self._tail)
+
+    def append(self, x):
+        return PVector._new(*PVector._appended(self._count, self._shift, self._root, self._tail, x))
+
+    def extend(self, xs):
+        count, shift, root, tail = self._count, self._shift, self._root, self._tail
+        for x in xs:
+            count, shift, root, tail = PVector._appended(count, shift, root, tail, x)
+        return PVector._new(count, shift, root, tail)
+
+    def delete(self, i):
+        # O(n) - rebuilds from the elements either side of i
+        i = self._index(i)
+        return PVector(x for j, x in enumerate(self) if j != i)
+
+    @staticmethod
+    def _appended(count, shift, root, tail, x):
+        tailOffset = 0 if count < _WIDTH else ((count - 1) >> _BITS) << _BITS
+        if count - tailOffset < _WIDTH:
+            return count + 1, shift, root, tail + [x]
+        # the tail is full so push it into the trie
+        if (count >> _BITS) > (1 << shift):
+            root, shift = [root, _newPath(shift, tail)], shift + _BITS
+        else:
+            root = _pushTail(count, shift, root, tail)
+        return count + 1, shift, root, [x]
+
+
+_EMPTY_VECTOR_PARTS = (0, _BITS, [], [])
+
+def _newPath(level, node):
+    return node if level == 0 else [_newPath(level - _BITS, node)]
+
+def _pushTail(count, level, parent, tail):
+    i = ((count - 1) >> level) & _MASK
+    node = list(parent)
+    if level == _BITS:
+        child = tail
+    elif i < len(parent):
+        child = _pushTail(count, level - _BITS, parent[i], tail)
+    else:
+        child = _newPath(level - _BITS, tail)
+    if i < len(node):
+        node[i] = child
+    else:
+        node.append(child)
+    return node
+
+def _assoc(level, node, i, x):
+    node = list(node)
+    if level == 0:
+        node[i & _MASK] = x
+    else:
+        j = (i >> level) & _MASK
+        node[j] = _assoc(level - _BITS, node[j], i, x)
+    return node
+
+
+
+# **********************************************************************************************************************
+# PMap
+# **********************************************************************************************************************
+
+class _Collision:
+    # the (key, value) pairs whose keys have the same full hash
+    __slots__ = ['hash', 'pairs']
+
+    def __init__(self, h, pairs):
+        self.hash = h
+        self.pairs = pairs
+
+
+class PMap:
+    __slots__ = ['_count', '_root']      # _root is [bitmap, entry, entry, ...]
+
+    def __init__(self, kvs=()):
+        m = _EMPTY_MAP if not kvs else PMap._new(0, [0]).update(kvs)
+        self._count, self._root = m._count, m._root
+
+    @classmethod
+    def _new(cls, count, root):
+        m = object.__new__(cls)
+        m._count, m._root = count, root
+        return m
+
+    # reading
+
+    def __len__(self):
+        return self._count
+
+    def get(self, k, default=None):
+        h, node, shift = _hash(k), self._root, 0
+        while True:
+            if node.__class__ is _Collision:
+                for k2, v in node.pairs:
+                    if k2 == k: return v
+                return default
+            bit = 1 << ((h >> shift) & _MASK)
+            bitmap = node[0]
+            if not bitmap & bit: return default
+            entry = node[1 + (bitmap & (bit - 1)).bit_count()]
+            if entry.__class__ is tuple:
+                return entry[1] if entry[0] is k or entry[0] == k else default
+            node, shift = entry, shift + _BITS
+
+    def __getitem__(self, k):
+        if (v := self.get(k, Missing)) is Missing: raise KeyError(k)
+        return v
+
+    def __contains__(self, k):
+        return self.get(k, Missing) is not Missing
+
+    def items(self):
+        return _iterPairs(self._root)
+
+    def keys(self):
+        return (k for k, v in _iterPairs(self._root))
+
+    def values(self):
+        return (v for k, v in _iterPairs(self._root))
+
+    def __iter__(self):
+        return self.keys()
+
+    def __eq__(self, other):
+        if isinstance(other, (PMap, dict)):
+            return len(self) == len(other) and all(k in other and other[k] == v for k, v in self.items())
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __repr__(self):
+        return f'PMap({dict(self.items())!r})'
+
+    def todict(self):
+        return dict(self.items())
+
+    # updating - each answers a new PMap (or self if nothing changed)
+
+    def set(self, k, v):
+        root, added = _setIn(self._root, 0, _hash(k), k, v)
+        return self if root is self._root else PMap._new(self._count + added, root)
+
+    def delete(self, k):
+        root = _deleteIn(self._root, 0, _hash(k), k)
+        if root is self._root: raise KeyError(k)
+        return PMap._new(self._count - 1, root if root is not Missing else [0])
+
+    def discard(self, k):
+        return self.delete(k) if k in self else self
+
+    def update(self, kvs):
+        m = self
+        for k, v in (kvs.items() if hasattr(kvs, 'items') else kvs):
+            m = m.set(k, v)
+        return m
+
+
+_EMPTY_MAP = PMap._new(0, [0])
+
+def _hash(k):
+    return hash(k) & 0xFFFF_FFFF_FFFF_FFFF
+
+def _iterPairs(node):
+    if node.__class__ is _Collision:
+        yield from node.pairs
+        return
+    for entry in node[1:]:
+        if entry.__class__ is tuple:
+            yield entry
+        else:
+            yield from _iterPairs(entry)
+
+def _setIn(node, shift, h, k, v):
+    # answers (node, 1 if k was added else 0) - node is the original if nothing changed
+    if node.__class__ is _Collision:
+        if h != node.hash:
+            # split by placing the collision node into a new bitmap node and adding the pair to that
+            return _setIn([1 << ((node.hash >> shift) & _MASK), node], shift, h, k, v)
+        for i, (k2, v2) in enumerate(node.pairs):
+            if k2 == k:
+                if v2 is v: return node, 0
+                pairs = list(node.pairs)
+                pairs[i] = (k, v)
+                return _Collision(h, pairs), 0
+        return _Collision(h, node.pairs + [(k, v)]), 1
+    bit = 1 << ((h >> shift) & _MASK)
+    bitmap = node[0]
+    pos = 1 + (bitmap & (bit - 1)).bit_count()
+    if not bitmap & bit:
+        return [bitmap | bit] + node[1:pos] + [(k, v)] + node[pos:], 1
+    entry = node[pos]
+    if entry.__class__ is tuple:
+        k2, v2 = entry
+        if k2 is k or k2 == k:
+            if v2 is v: return node, 0
+            child, added = (k, v), 0
+        else:
+            child, added = _merge(shift + _BITS, _hash(k2), entry, h, (k, v)), 1
+    else:
+        child, added = _setIn(entry, shift + _BITS, h, k, v)
+        if child is entry: return node, 0
+    node = list(node)
+    node[pos] = child
+    return node, added
+
+def _merge(shift, h1, pair1, h2, pair2):
+    # answers a node holding two pairs whose keys differ
+    if h1 == h2 or shift >= _HASH_BITS: return _Collision(h1, [pair1, pair2])
+    i1, i2 = (h1 >> shift) & _MASK, (h2 >> shift) & _MASK
+    if i1 == i2: return [1 << i1, _merge(shift + _BITS, h1, pair1, h2, pair2)]
+    return [(1 << i1) | (1 << i2)] + ([pair1, pair2] if i1 < i2 else [pair2, pair1])
+
+def _deleteIn(node, shift, h, k):
+    # answers the node without k, the original node if k isn't present or Missing if the node is now empty
+    if node.__class__ is _Collision:
+        pairs = [p for p in node.pairs if p[0] != k]
+        if len(pairs) == len(node.pairs): return node
+        return pairs[0] if len(pairs) == 1 else _Collision(node.hash, pairs)
+    bit = 1 << ((h >> shift) & _MASK)
+    bitmap = node[0]
+    if not bitmap & bit: return node
+    pos = 1 + (bitmap & (bit - 1)).bit_count()
+    entry = node[pos]
+    if entry.__class__ is tuple:
+        if not (entry[0] is k or entry[0] == k): return node
+        child = Missing
+    else:
+        child = _deleteIn(entry, shift + _BITS, h, k)
+        if child is entry: return node
+        if child is not Missing and child.__class__ is list and len(child) == 2 and child[1].__class__ is tuple:
+            child = child[1]            # collapse a node left with a single pair
+    if child is Missing:
+        if bitmap == bit: return Missing
+        return [bitmap & ~bit] + node[1:pos] + node[pos + 1:]
+    node = list(node)
+    node[pos] = child
+    return node
+
+
+
+# **********************************************************************************************************************
+# conversion
+# **********************************************************************************************************************
+
+def persist(x):
+    # answers x with any lists and dicts (recursively) converted to PVectors and PMaps
+    if x.__class__ is list:
+        return PVector(persist(e) for e in x)
+    elif x.__class__ is dict:
+        return PMap((k, persist(v)) for k, v in x.items())
+    else:
+        return x
+
+def unpersist(x):
+    # the inverse of persist
+    if x.__class__ is PVector:
+        return [unpersist(e) for e in x]
+    elif x.__class__ is PMap:
+        return {k: unpersist(v) for k, v in x.items()}
+    else:
+        return x
+
+
+
+if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__ + ' - done')
@@ -11,12 +11,12 @@
 import sys
 if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
 
-import copy
-from ctypes import c_long
+import copy, threading
+from bones.core.context import context
 from bones.core.errors import ProgrammerError, NotYetImplemented
 from bones.core.sentinels import Missing
+from coppertop._persistent import PVector, PMap, persist
 
-_from_address = c_long.from_address
 _numCopies = 0
 _numNotCopied = 0
 
@@ -24,152 +24,275 @@ _numNotCopied = 0
 ANON_NAME = "<anon>"
 ROOT_NAME = "<root>"
 
+USE_PERSISTENT = False          # _CoWScope holds lists and dicts as PVectors and PMaps so updates needn't copy - off by
+                                # default as the PVectors and PMaps would be seen by dispatch, list ops, etc
+_PERSISTENT = (PVector, PMap)
+_ATOMIC = (int, float, complex, str, bytes, bool, type(None))     # can't contain (and so leak) an owned value
+_ATOMIC_TYPES = frozenset(_ATOMIC)
+_UNOWNABLE = _ATOMIC + _PERSISTENT
+_NON_ESCAPING = frozenset(('__contains__', '__len__', 'count', 'index', 'keys', '__class__', '__repr__', '__str__'))
+
 
 # **********************************************************************************************************************
 # _CoWScope - copy on write - https://stackoverflow.com/questions/628938/what-is-copy-on-write
 # **********************************************************************************************************************
 
-def _targetCount(p):
-    return c_long.from_address(p._targetId).value
+# Ownership - rather than inferring from the target's ref count whether anything outside the scope can see it (which
+# ties us to the CPython object layout and is meaningless under free-threading where the count is split) each scope
+# keeps _owned, id -> [value, numViews, ownedAt, contentsEscapedAt], for the values only it can reach - the copies it
+# has made and any handed over with _adopt. A value assigned in (`_.fred = x`, `_.fred[1] = x`) may still be held by
+# the caller so isn't owned and, as before, the first write to it copies it. Each proxy onto an owned value adds a
+# view (and takes it away again in __del__) so a write through the only view updates in place and a write while
+# another proxy is held copies, keeping the held proxy's value as it was. A write checks the path down to it from the
+# scope, copying anything on the way that isn't owned. When a raw value escapes (e.g. `_.fred._target`, `_.joe =
+# _.fred`, calling it) just that value is disowned. When its contents do (e.g. iterating over it, `_.fred.values()`,
+# `_.fred + x`, or it being copied, as the copy shares them) it's stamped with the scope's clock rather than visiting
+# each of them, and a value owned before its container's stamp is no longer owned there. A value adopted that is
+# already owned is reachable twice so is disowned instead. _owned holds the values so an id can't be reused while
+# it's in there, and its lock serialises the view counts, the clock and the decisions made on them.
+
+class _Owned(dict):
+    __slots__ = ['lock', 'clock']
 
-class _CoWProxy:
-    __slots__ = ['_parentProxy', '_k', '_target', '_targetId']
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.RLock()       # reentrant as a proxy's __del__ can run in a gc while the lock is held
+        self.clock = 0
+
+def _rawTarget(p):
+    # the proxied value without disowning it - for reads that don't hand the value on
+    return object.__getattribute__(p, '_target')
+
+def _own(owned, value):
+    # value was made by (or handed over to) the scope so nothing else can see it
+    if type(value) in _ATOMIC_TYPES or isinstance(value, _UNOWNABLE): return
+    with owned.lock:
+        if owned.pop(id(value), Missing) is Missing:
+            owned[id(value)] = [value, 0, owned.clock, -1]
+
+def _disown(owned, value):
+    # value may be seen outside the scope so the next write to it (or to anything in it) copies it
+    owned.pop(id(value), None)
+
+def _disownContents(owned, c):
+    # c's contents may be seen outside the scope - if c isn't owned then any write to them copies c first and so
+    # stamps it anyway
+    if (entry := owned.get(id(c), Missing)) is not Missing:
+        with owned.lock:
+            owned.clock += 1
+            entry[3] = owned.clock
+
+def _release(owned, old):
+    # old has been overwritten or deleted - it's forgotten unless a held proxy is still viewing it (which may go on
+    # updating it in place just as a plain Python reference would)
+    if (entry := owned.get(id(old), Missing)) is not Missing and entry[0] is old:
+        with owned.lock:
+            if entry[1] == 0 and owned.get(id(old)) is entry: del owned[id(old)]
+
+def _replaceIn(proxy, newTarget):
+    # puts newTarget where proxy's target was found in its parent (a _CoWProxy or the _CoWScope) - by setattr if it was
+    # an object's attribute else by setitem. A persistent parent answers a new collection which is in turn put into its
+    # parent and so on up to the scope
+    parent = _parentProxyOf(proxy)
+    if isinstance(parent, _CoWProxy) and not _viaAttrOf(proxy):
+        parent._setItem(_kOf(proxy), newTarget)
+    else:
+        parent._setAttr(_kOf(proxy), newTarget)
+
+def _itemAt(c, k):
+    # answers c[k] or Missing if there isn't one
+    if isinstance(c, dict): return c.get(k, Missing)
+    try:
+        return c[k]
+    except (LookupError, TypeError):
+        return Missing
 
-    def __init__(self, parentProxy, k, target):
-        super().__setattr__('_parentProxy', parentProxy)
-        super().__setattr__('_k', k)
-        super().__setattr__('_target', target)
-        super().__setattr__('_targetId', id(target))
+class _CoWProxy:
+    __slots__ = ['_parentProxy', '_k', '_target', '_owned', '_entry', '_viaAttr']
+
+    def __init__(self, parentProxy, k, target, viaAttr=False):
+        _owned = object.__getattribute__(parentProxy, '_owned')     # shared with the scope and all its proxies
+        if (entry := _owned.get(id(target), Missing)) is not Missing:
+            with _owned.lock:
+                entry[1] += 1
+        _setSlot(self, '_parentProxy', parentProxy)
+        _setSlot(self, '_k', k)
+        _setSlot(self, '_target', target)
+        _setSlot(self, '_owned', _owned)
+        _setSlot(self, '_entry', entry)
+        _setSlot(self, '_viaAttr', viaAttr)
+
+    @property
+    def _targetId(self):
+        return id(_targetOf(self))
+
+    def __del__(self):
+        if (entry := _entryOf(self)) is not Missing:
+            with _ownedOf(self).lock:
+                entry[1] -= 1
 
     def _copyIfNeeded(self, eId):
-        _targetId = super().__getattribute__('_targetId')
+        _targetId = id(_targetOf(self))
         if eId == _targetId:
             raise ValueError('Cycle to parent detected - needs a better error message')
-        parentProxy = super().__getattribute__('_parentProxy')
+        if isinstance(_targetOf(self), _PERSISTENT):
+            return      # never changed in place - updates are rebound into the parent by _rebind instead
+        parentProxy, parentEntry = _parentProxyOf(self), Missing
         if isinstance(parentProxy, _CoWProxy):
             parentProxy._copyIfNeeded(eId)
-        if _from_address(_targetId).value > 2:  # 1 plus 1 for the proxy
-            targetRefCount = _from_address(_targetId).value
-            # newTarget = copy.copy(super().__getattribute__('_target'))
-            super().__setattr__('_target', copy.copy(super().__getattribute__('_target')))
-            newTargetId = id(super().__getattribute__('_target'))
-            super().__setattr__('_targetId', newTargetId)
-            newTargetRefCount = _from_address(newTargetId).value
-            parentProxy._target[super().__getattribute__('_k')] = super().__getattribute__('_target')
-            newTargetRefCount2 = _from_address(newTargetId).value
-            global _numCopies
-            _numCopies += 1
-        else:
-            global _numNotCopied
-            _numNotCopied += 1
+            parentEntry = _entryOf(parentProxy)
+        _owned = _ownedOf(self)
+        with _owned.lock:
+            entry = _entryOf(self)
+            if entry is Missing or entry[1] > 1 or _owned.get(_targetId) is not entry \
+                    or (parentEntry is not Missing and entry[2] < parentEntry[3]):
+                # not owned, it's escaped since or another proxy is holding on to it, so copy
+                oldTarget = _targetOf(self)
+                newTarget = copy.copy(oldTarget)
+                if entry is not Missing:
+                    entry[1] -= 1
+                    if _owned.get(_targetId) is entry: del _owned[_targetId]
+                _owned.clock += 1           # the copy shares oldTarget's contents
+                _setSlot(self, '_target', newTarget)
+                _setSlot(self, '_entry', entry := [newTarget, 1, _owned.clock, _owned.clock])
+                _owned[id(newTarget)] = entry
+                _replaceIn(self, newTarget)
+                global _numCopies
+                _numCopies += 1
+                if context.recordCoWStats: _cowStats.record(self, oldTarget)
+            else:
+                global _numNotCopied
+                _numNotCopied += 1
 
     def __delitem__(self, k):  # del _.fred[1]    k = 1, target is the indexable fred
-        super().__getattribute__('_copyIfNeeded')(0)
-        del super().__getattribute__('_target')[k]
+        if isinstance(_target := _targetOf(self), _PERSISTENT):
+            return _CoWProxy._rebind(self, _target.delete(k))
+        with (_owned := _ownedOf(self)).lock:    # so another thread can't copy the target from under the write
+            _CoWProxy._copyIfNeeded(self, 0)
+            _target = _targetOf(self)
+            if (old := _itemAt(_target, k)) is not Missing: _release(_owned, old)
+            del _target[k]
 
     def __getitem__(self, k):  # _.fred[1]      k = 1, target is the indexable fred
-        _target = super().__getattribute__('_target')
-        # answer a new proxy every time (rather than answering an already created proxy) so ref count keeps going up
-        # if the caller holds on to it just like a normal python object
-        return _CoWProxy(self, k, _target[k])
+        # answer a new proxy every time (rather than answering an already created proxy) so a held one keeps its view
+        # just like a normal python object - atomic values are answered as is
+        return _proxyOn(self, k, _targetOf(self)[k])
 
     def __iter__(self):
-        return super().__getattribute__('_target').__iter__()
+        _disownContents(_ownedOf(self), _target := _targetOf(self))      # the elements escape
+        return _target.__iter__()
 
     def __next__(self):
-        return super().__getattribute__('_target').__next__()
+        _disownContents(_ownedOf(self), _target := _targetOf(self))
+        return _target.__next__()
 
     def __setitem__(self, k, newTarget):  # _.fred[1] = x      k = 1, target is the indexable fred
-        newTarget = newTarget._target if isinstance(newTarget, _CoWProxy) else newTarget
-        super().__getattribute__('_copyIfNeeded')(id(newTarget))
-        super().__getattribute__('_target')[k] = newTarget   # target has not changed just the element the target contains
+        newTarget = newTarget._target if isinstance(newTarget, _CoWProxy) else newTarget    # now shared so disowned
+        if isinstance(_target := _targetOf(self), _PERSISTENT):
+            return _CoWProxy._rebind(self, _target.set(k, persist(newTarget)))
+        with (_owned := _ownedOf(self)).lock:    # so another thread can't copy the target from under the write
+            _CoWProxy._copyIfNeeded(self, id(newTarget))
+            _target = _targetOf(self)
+            if (old := _itemAt(_target, k)) is not Missing: _release(_owned, old)
+            _target[k] = newTarget   # target has not changed just the element the target contains
 
     def __getattribute__(self, k):
         # if context('print'):
         #     print(k)
-        if k in ('_target', '_copyIfNeeded', '_targetId', '_parentProxy', '__len__', '_nRefs', '_setAttr', '_setItem'):
-            return super().__getattribute__(k)
+        if k in _PROXY_ATTRS:
+            return object.__getattribute__(self, k)
+        _target = _targetOf(self)
+        if k == '_target':
+            # handing out the raw value means we can no longer tell who else is looking at it (or anything in it)
+            _disown(_ownedOf(self), _target)
+            return _target
         elif k == '_t':
-            return super().__getattribute__('_target')._t
+            return _target._t
+        if (actions := _ACTIONS_BY_TYPE.get(type(_target), Missing)) is Missing:
+            actions = _actionsFor(type(_target))
+        if actions is None:
+            # an attribute of an object - proxied so that writes to it copy the object
+            return _proxyOn(self, k, getattr(_target, k), True)
+        name, actionByAttr = actions
+        if (action := actionByAttr.get(k, Missing)) is Missing:
+            # __contains__, __iter__, __add__, __mul__, __reversed__, copy, count, index, get, items, keys, values
+            if k not in _NON_ESCAPING: _disownContents(_ownedOf(self), _target)
+            return getattr(_target, k)
+        elif action == _DISABLED:
+            raise ProgrammerError(f'{name}>>{k} is disabled for _CoWScope')
+        elif action == _NYI:
+            raise NotYetImplemented()
+        elif action == _COPY_THEN_GET:
+            _CoWProxy._copyIfNeeded(self, 0)        # could append a parent!!! TODO fix
+            # if a copy was needed then _target has changed so get it again
+            return getattr(_targetOf(self), k)
         else:
-            # _target = super().__getattribute__('_target')
-            if isinstance(super().__getattribute__('_target'), list):
-                if k in ('clear', 'extend', 'pop', 'remove', 'insert', 'reverse'):
-                    raise ProgrammerError(f'list>>{k} is disabled for _CoWScope')
-                elif k in ('append', 'sort'):
-                    # _target = None
-                    super().__getattribute__('_copyIfNeeded')(0)        # could append a parent!!! TODO fix
-                    # if a copy was needed then _target has changed so get it again
-                    return getattr(super().__getattribute__('_target'), k)
-                else:
-                    # __contains__, __iter__, __add__, __mul__, __reversed__, copy, count, index
-                    return super().__getattribute__('_target').__getattribute__(k)
-            if isinstance(super().__getattribute__('_target'), dict):
-                if k in ('clear', 'pop', 'popitem', 'update'):
-                    raise ProgrammerError(f'dict>>{k} is disabled for _CoWScope')
-                elif k in ('setdefault'):
-                    raise NotYetImplemented()
-                    # _target = None
-                    super().__getattribute__('_copyIfNeeded')(0)  # could append a parent!!! TODO fix
-                    # if a copy was needed then _target has changed so get it again
-                    return getattr(super().__getattribute__('_target'), k)
-                else:
-                    # __contains__, __iter__, __reversed__, __ror__, fromkeys, get, items, keys, values
-                    return super().__getattribute__('_target').__getattribute__(k)
-            return _CoWProxy(self, k, super().__getattribute__('_target').__getattribute__(k))
+            return object.__getattribute__(self, action)    # the _xxxPersistent rebinding version
 
     def __setattr__(self, k, newElement):    # _.fred.name = x      _target=fred, k=name, newElement=x
-        super().__getattribute__('_copyIfNeeded')(newElement._targetId if isinstance(newElement, _CoWProxy) else id(newElement))
-        setattr(super().__getattribute__('_target'), k, newElement)  # target has not changed just the element the target contains
+        newElement = newElement._target if isinstance(newElement, _CoWProxy) else newElement   # now shared so disowned
+        with (_owned := _ownedOf(self)).lock:    # so another thread can't copy the target from under the write
+            _CoWProxy._copyIfNeeded(self, id(newElement))
+            _target = _targetOf(self)
+            if (old := getattr(_target, k, Missing)) is not Missing: _release(_owned, old)
+            setattr(_target, k, newElement)  # target has not changed just the element the target contains
 
     def __str__(self):
-        return super().__getattribute__('_target').__str__()
+        return _targetOf(self).__str__()
 
     def __repr__(self):
-        return f"[{super().__getattribute__('_k')}]{{{super().__getattribute__('_target').__repr__()}}}"
+        return f"[{super().__getattribute__('_k')}]{{{_targetOf(self).__repr__()}}}"
 
     def __len__(self):
-        return super().__getattribute__('_target').__len__()
+        return _targetOf(self).__len__()
 
     def __bool__(self):
-        _target = super().__getattribute__('_target')
+        _target = _targetOf(self)
         if hasattr(_target, '__bool__'):
             return _target.__bool__()
         else:
             return _target.__len__() > 0
 
     def __call__(self, *args, **kwargs):
-        return super().__getattribute__('_target')(*args, **kwargs)
+        # may answer (or stash) the target or, for a method, the object it's bound to
+        _target, _owned = _targetOf(self), _ownedOf(self)
+        _disown(_owned, _target)
+        if (obj := getattr(_target, '__self__', Missing)) is not Missing: _disown(_owned, obj)
+        return _target(*args, **kwargs)
 
     def __add__(self, rhs):
-        return super().__getattribute__('_target') + rhs
+        _CoWProxy._escape(self)
+        return _targetOf(self) + rhs
 
     def __radd__(self, lhs):
-        return lhs + super().__getattribute__('_target')
+        _CoWProxy._escape(self)
+        return lhs + _targetOf(self)
 
     def __sub__(self, rhs):
-        return super().__getattribute__('_target') - rhs
+        return _targetOf(self) - rhs
 
     def __rsub__(self, lhs):
-        return lhs - super().__getattribute__('_target')
+        return lhs - _targetOf(self)
 
     def __mul__(self, rhs):
-        return super().__getattribute__('_target') * rhs
+        _CoWProxy._escape(self)
+        return _targetOf(self) * rhs
 
     def __rmul__(self, lhs):
-        return lhs - super().__getattribute__('_target')
+        _CoWProxy._escape(self)
+        return lhs - _targetOf(self)
 
     def __truediv__(self, rhs):
-        return super().__getattribute__('_target') / rhs
+        return _targetOf(self) / rhs
 
     # def __rdiv__(self, lhs):
-    #     return lhs / super().__getattribute__('_target')
+    #     return lhs / _targetOf(self)
 
     def __rtruediv__(self, lhs):
-        return lhs / super().__getattribute__('_target')
+        return lhs / _targetOf(self)
 
     def __iadd__(self, rhs):          # _.fred.age += rhs       _target=age, k=age
-        oldTarget = super().__getattribute__('_target')
+        oldTarget = _targetOf(self)
         newTarget = oldTarget + rhs
         newtargetId = id(newTarget)
         assert not isinstance(newTarget, _CoWProxy)  # unlikely but just in case
@@ -177,55 +300,126 @@ class _CoWProxy:
         _parentProxy = super().__getattribute__('_parentProxy')
         if isinstance(_parentProxy, _CoWProxy):
             _parentProxy._copyIfNeeded(newtargetId)
-        k = super().__getattribute__('_k')
-        _parentProxy._setAttr(k, newTarget)
+        _replaceIn(self, newTarget)
+        _own(_ownedOf(self), newTarget)
         return newTarget        #__iadd__ must return the new value
 
     def __imul__(self, rhs):        # self *= rhs
         raise NotYetImplemented()
 
     def __eq__(self, rhs):          # self == rhs
-        return super().__getattribute__('_target') == (rhs._target if isinstance(rhs, _CoWProxy) else rhs)
+        return _targetOf(self) == (_rawTarget(rhs) if isinstance(rhs, _CoWProxy) else rhs)
 
     def _nRefs(self):
-        return _from_address(super().__getattribute__('_targetId')).value
+        return sys.getrefcount(_targetOf(self)) - 1
+
+    def _escape(self):
+        # the answer of an operator on a container (e.g. list + list) shares the elements
+        _disownContents(_ownedOf(self), _targetOf(self))
 
     def _setAttr(self, k, v):
-        setattr(super().__getattribute__('_target'), k, v)
+        if isinstance(_target := _targetOf(self), _PERSISTENT):
+            _CoWProxy._rebind(self, _target.set(k, v))
+        else:
+            setattr(_target, k, v)
 
     def _setItem(self, k, v):
-        super().__getattribute__('_target')[k] = v
+        if isinstance(_target := _targetOf(self), _PERSISTENT):
+            _CoWProxy._rebind(self, _target.set(k, v))
+        else:
+            _target[k] = v
+
+    def _appendPersistent(self, x):
+        x = x._target if isinstance(x, _CoWProxy) else x
+        _CoWProxy._rebind(self, _targetOf(self).append(persist(x)))
+
+    def _sortPersistent(self, *, key=None, reverse=False):
+        _target = _targetOf(self)
+        _CoWProxy._rebind(self, PVector(sorted(_target, key=key, reverse=reverse)))
+
+    def _rebind(self, newTarget):
+        # the target is persistent and has been updated so newTarget replaces it here and in the parent
+        _setSlot(self, '_target', newTarget)
+        _replaceIn(self, newTarget)
+
+
+_targetOf = _CoWProxy._target.__get__       # the slot getters - cheaper than super().__getattribute__
+_ownedOf = _CoWProxy._owned.__get__
+_entryOf = _CoWProxy._entry.__get__
+_kOf = _CoWProxy._k.__get__
+_parentProxyOf = _CoWProxy._parentProxy.__get__
+_viaAttrOf = _CoWProxy._viaAttr.__get__
+_setSlot = object.__setattr__
+
+_PROXY_ATTRS = frozenset(
+    ('_copyIfNeeded', '_targetId', '_parentProxy', '__len__', '_nRefs', '_setAttr', '_setItem', '_rebind')
+)
+
+# method tables - what a proxy does for each attribute of its target's type, attributes not in a table are delegated
+_DISABLED, _NYI, _COPY_THEN_GET = 1, 2, 3
+_LIST_DISABLED = dict.fromkeys(('clear', 'extend', 'pop', 'remove', 'insert', 'reverse'), _DISABLED)
+_DICT_DISABLED = dict(dict.fromkeys(('clear', 'pop', 'popitem', 'update'), _DISABLED), setdefault=_NYI)
+_ACTIONS_BY_TYPE = {
+    PVector: ('list', dict(_LIST_DISABLED, append='_appendPersistent', sort='_sortPersistent')),
+    PMap: ('dict', _DICT_DISABLED),
+    list: ('list', dict(_LIST_DISABLED, append=_COPY_THEN_GET, sort=_COPY_THEN_GET)),
+    dict: ('dict', _DICT_DISABLED),
+}
+
+def _actionsFor(t):
+    # subclasses use their base's table, anything else is an object whose attributes are proxied (None)
+    for base in (PVector, PMap, list, dict):
+        if issubclass(t, base):
+            _ACTIONS_BY_TYPE[t] = answer = _ACTIONS_BY_TYPE[base]
+            return answer
+    _ACTIONS_BY_TYPE[t] = None
+    return None
+
+def _proxyOn(parent, k, value, viaAttr=False):
+    # atomic values can't be changed in place so are answered as is, saving a proxy allocation on most reads, e.g.
+    # `_.fred[1] += 1` becomes `_.fred[1] = _.fred[1] + 1` and `_.age += 1` becomes `_.age = _.age + 1`
+    return value if type(value) in _ATOMIC_TYPES else _CoWProxy(parent, k, value, viaAttr)
 
 
 # to decrease any ref count object deletion must be detected thus we need to create an object on access - this is
 # the cost of the optimisation in Python
 
+_SCOPE_ATTRS = frozenset(('__class__', '__module__', '_setAttr', '_adopt', '_freeze', '_owned'))
+
 class _CoWScope:
-    _slots__ = ['_vars', '_name']
+    _slots__ = ['_vars', '_name', '_persistent', '_owned']
 
-    def __init__(self):
+    def __init__(self, persistent=Missing):
         super().__setattr__('_vars', {})
+        super().__setattr__('_persistent', USE_PERSISTENT if persistent is Missing else persistent)
+        super().__setattr__('_owned', _Owned())
 
     def __getattribute__(self, k):      # _.fred or
         if k == '_target': # _._target
+            super().__getattribute__('_owned').clear()
             return super().__getattribute__('_vars')
-        if k in ('__class__', '__module__', '_setAttr'):
-            return super().__getattribute__(k)
-        _vars = super().__getattribute__('_vars')
+        if k in _SCOPE_ATTRS:
+            return object.__getattribute__(self, k)
+        _vars = object.__getattribute__(self, '_vars')
         if k in _vars: # _.fred
-            # answer a new proxy every time so ref count goes up
-            return _CoWProxy(self, k, _vars[k])
+            # answer a new proxy every time so a held one keeps its view - atomic values are answered as is
+            return _proxyOn(self, k, _vars[k])
         else:
             raise AttributeError(k)
 
     def __setattr__(self, k, newValue):
         if isinstance(newValue, _CoWProxy):
-            newValue = newValue._target
-        super().__getattribute__('_vars')[k] = newValue
+            newValue = newValue._target     # _.joe = _.fred - fred's value is now shared so disowned
+        if super().__getattribute__('_persistent'):
+            newValue = persist(newValue)
+        _vars = super().__getattribute__('_vars')
+        if (old := _vars.get(k, Missing)) is not Missing: _release(super().__getattribute__('_owned'), old)
+        _vars[k] = newValue
 
     def __delattr__(self, k):
         vars = super().__getattribute__('_vars')
         if k in vars:
+            _release(super().__getattribute__('_owned'), vars[k])
             del vars[k]
             return
         raise AttributeError(k)
@@ -240,6 +434,16 @@ class _CoWScope:
     def _setAttr(self, k, v):
         super().__getattribute__('_vars')[k] = v
 
+    def _adopt(self, k, value):
+        # as `_.k = value` but the caller hands over its only reference to value (not to anything in it) so it's owned,
+        # and updated in place, from the start rather than being copied on the first write
+        setattr(self, k, value)
+        _own(super().__getattribute__('_owned'), super().__getattribute__('_vars')[k])
+
+    def _freeze(self):
+        # the values may be seen elsewhere so each must be copied on its next write
+        super().__getattribute__('_owned').clear()
+
 
 
 class _ContextualScopeManager:
@@ -314,6 +518,79 @@ class _MutableContextualScope:
         return list(super().__getattribute__('_vars').keys())
 
 
+# **********************************************************************************************************************
+# CoW instrumentation - `with context(recordCoWStats=True):` records each copy made by a _CoWProxy against the path of
+# the value copied (e.g. fred.1.name), with its size and the call sites that triggered it. Only the copying branch
+# looks at the flag so there is nothing to pay when it's off (or when nothing copies). cowReport() can be called at
+# any time, e.g. from a debugger attached to a live process
+# **********************************************************************************************************************
+
+COW_STATS_MAX_SITES = 100       # per path - the rest are lumped together as <other>
+
+class _CoWStats:
+    __slots__ = ['numCopiesByPath', 'bytesByPath', 'numCopiesBySiteByPath']
+
+    def __init__(self):
+        self.numCopiesByPath = {}
+        self.bytesByPath = {}
+        self.numCopiesBySiteByPath = {}
+
+    def record(self, proxy, copied):
+        path = _pathOf(proxy)
+        self.numCopiesByPath[path] = self.numCopiesByPath.get(path, 0) + 1
+        self.bytesByPath[path] = self.bytesByPath.get(path, 0) + sys.getsizeof(copied)
+        numCopiesBySite = self.numCopiesBySiteByPath.setdefault(path, {})
+        site = _siteOf(sys._getframe(1))
+        if site not in numCopiesBySite and len(numCopiesBySite) >= COW_STATS_MAX_SITES: site = '<other>'
+        numCopiesBySite[site] = numCopiesBySite.get(site, 0) + 1
+
+    def worst(self, n):
+        # answers the n paths that have copied the most bytes
+        return sorted(self.bytesByPath, key=self.bytesByPath.__getitem__, reverse=True)[:n]
+
+_cowStats = _CoWStats()
+
+def _pathOf(proxy):
+    ks = []
+    while isinstance(proxy, _CoWProxy):
+        ks.append(str(_kOf(proxy)))
+        proxy = _parentProxyOf(proxy)
+    return '.'.join(reversed(ks))
+
+def _siteOf(frame):
+    # the first frame outside this module
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    return '<unknown>' if frame is None else f'{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}'
+
+def cowStats():
+    return dict(
+        numCopies=_numCopies,
+        numNotCopied=_numNotCopied,
+        numCopiesByPath=dict(_cowStats.numCopiesByPath),
+        bytesByPath=dict(_cowStats.bytesByPath),
+        numCopiesBySiteByPath={path: dict(bySite) for path, bySite in _cowStats.numCopiesBySiteByPath.items()},
+    )
+
+def cowReport(n=10, numSites=3):
+    # answers a report of the n paths that have copied the most bytes along with their numSites busiest call sites
+    lines = [
+        f'CoW copies: {_numCopies}, not copied: {_numNotCopied}, recorded: '
+        f'{sum(_cowStats.numCopiesByPath.values())} copies, {sum(_cowStats.bytesByPath.values())} bytes'
+    ]
+    for path in _cowStats.worst(n):
+        lines.append(f'  {path}: {_cowStats.numCopiesByPath[path]} copies, {_cowStats.bytesByPath[path]} bytes')
+        bySite = _cowStats.numCopiesBySiteByPath[path]
+        for site in sorted(bySite, key=bySite.__getitem__, reverse=True)[:numSites]:
+            lines.append(f'    {bySite[site]:>8}  {site}')
+    return '\n'.join(lines)
+
+def resetCowStats():
+    global _cowStats, _numCopies, _numNotCopied
+    _cowStats = _CoWStats()
+    _numCopies = 0
+    _numNotCopied = 0
+
 
 if not hasattr(sys, '_UNDERSCORE'):
     sys._UNDERSCORE = _ContextualScopeManager()     # kept on sys so its identity isn't changed on reload (as happens in Jupyter)
@@ -47,7 +47,7 @@
 #   builtins.__import__ but instead use importlib.import_module() or similar
 # - overload type BType "count" (including schema variables) and the JFunc "count" and ideally the module "count"
 # - allow a call from Python to trigger building of a new function
-# - add a binary `selectFn` that returns the tvfunc but doesn't call it, e.g. to get the details of a call could do
+# - make `selectFn` a binary that returns the tvfunc but doesn't call it, e.g. to get the details of a call could do
 #   `PP >> selectFn >> (cluedoHelper) >> details >> PP` or `cluedoHelper` >> selectFn >> PP >> details >> PP`
 
 
@@ -56,7 +56,8 @@ if hasattr(sys, '_TRACE_IMPORTS') and sys._TRACE_IMPORTS: print(__name__)
 
 __all__ = [
     'coppertop', 'nullary', 'unary', 'binary', 'ternary', '_', 'sig', 'context', 'typeOf', 'makeFn',
-    'fitsWithin', 'type'
+    'fitsWithin', 'type', 'selectFn', 'mapFn', 'trackModule', 'scopeImportHook', 'installImportHook',
+    'uninstallImportHook'
 ]
 
 
@@ -107,6 +108,7 @@ def coppertop(*args, style=Missing, name=Missing, typeHelper=Missing, dispatchEv
         # answer a jones fn (i.e. that can be partialed, piped or called) that may contain an overload
         style_ = unary if style is Missing else style
         modname, fnname, pymodFn, enclosingFnName, argNames, sig, tRet, pass_tByT = _fnContext(pyfn, 'registerFn', name)
+        _modsWithFns.add(pyfn.__module__)
 
         fn = _tvfunc(
             name=fnname, modname=modname, style=style_, _v=pyfn, dispatchEvenIfAllTypes=dispatchEvenIfAllTypes,
@@ -257,12 +259,32 @@ def _tArgFromAnnotation(annotation, modname, fnnameForErr, msgForErr):
 # IMPORT HOOK
 # **********************************************************************************************************************
 
+# The hook is process wide so it is kept cheap for the common case of a module that has nothing to do with coppertop
+# importing from another such module. _modsWithFns holds the names of modules whose globals may contain jones fns -
+# a module is added when @coppertop or makeFn defines a fn in it, or when it from-imports from a module in the set.
+# Only importers in the set (or importing from one) take the slow path. Importers are added even when outside the
+# scope (see scopeImportHook) so a package re-exporting jones fns, e.g. `from ._impl import f` in an __init__, is
+# noticed by the in-scope modules importing from it. A jones fn that arrives some other way, e.g. `import x; f = x.f`,
+# via a module __getattr__, or whilst the hook is uninstalled, isn't noticed - call trackModule(__name__) so later
+# imports overload it.
+
+_modsWithFns = set()
+_hookScope = Missing            # Missing for every module, else a tuple of package names - see scopeImportHook
+_hookInstalled = False          # True until uninstallImportHook even if another hook has been installed over ours
+_inScopeByModName = {}
+
+
 def _coppertopImportFn(name, globals=None, locals=None, fromlist=(), level=0):
     mod = sys._preCoppertopImportFn(name, globals, locals, fromlist, level)
     if not fromlist or not name or not globals: return mod
+    modName = globals.get("__name__", "????")
+    if modName not in _modsWithFns:
+        if getattr(mod, '__name__', Missing) not in _modsWithFns: return mod
+        _modsWithFns.add(modName)
+    if _hookScope is not Missing and not _inScope(modName): return mod
     if fromlist == ('*',):
         if (namesToImport := getattr(mod, '__all__', Missing)) is Missing:
-            namesToImport = sorted([k for k in mod.__dict__.keys() if not k.startswith('__')])
+            namesToImport = [k for k in mod.__dict__.keys() if not k.startswith('__')]
     else:
         namesToImport = fromlist
     namesToOverloaded = {}
@@ -277,22 +299,55 @@ def _coppertopImportFn(name, globals=None, locals=None, fromlist=(), level=0):
         dummyMod = builtins.type(mod)(name)
         for n in namesToImport:
             dummyMod.__dict__[n] = getattr(mod, n)
-        modName = globals.get("__name__", "????")
         for n, (current, new) in namesToOverloaded.items():
             dummyMod.__dict__[n] = current.__class__(n, modName, Family(current.d, new.d), _UNDERSCORE)
         if context.LogWhenOverloading:
             s = "', '"
-            msg = f'overloaded \'{s.join(namesToOverloaded.keys())}\' whilst importing from {name} into {globals.get("__name__", "????")}'
+            msg = f'overloaded \'{s.join(namesToOverloaded.keys())}\' whilst importing from {name} into {modName}'
             _logger.warning(msg)
         return dummyMod
     else:
         return mod
 
+def _inScope(modName):
+    if (inScope := _inScopeByModName.get(modName, Missing)) is Missing:
+        inScope = _inScopeByModName[modName] = any(modName == p or modName.startswith(p + '.') for p in _hookScope)
+    return inScope
+
+def trackModule(modName):
+    # have imports into the named module overload any jones fns it holds
+    _modsWithFns.add(modName)
+
+def scopeImportHook(*packageNames):
+    # only imports into modules in the named packages (or any module if none are given) are overloaded
+    global _hookScope
+    _hookScope = tuple(packageNames) if packageNames else Missing
+    _inScopeByModName.clear()
+
+def installImportHook():
+    global _hookInstalled
+    if not _hookInstalled and builtins.__import__ is not sys._coppertopImportFn:
+        sys._preCoppertopImportFn = builtins.__import__
+        builtins.__import__ = sys._coppertopImportFn
+    _hookInstalled = True
+
+def uninstallImportHook():
+    # imports no longer overload - @coppertop still extends any prior definition
+    global _hookInstalled
+    if not _hookInstalled: return
+    if builtins.__import__ is not sys._coppertopImportFn:
+        # restoring ours would drop the hook installed over it, and leaving it would keep ours running beneath it
+        raise CoppertopImportError(
+            f'Cannot uninstall the coppertop import hook - {builtins.__import__} has been installed over it',
+            ErrSite("#1")
+        )
+    builtins.__import__ = sys._preCoppertopImportFn
+    _hookInstalled = False
+
 sys._coppertopImportFn = _coppertopImportFn
 
 if not hasattr(sys, '_coppertopImportFnHolder'):
-    sys._preCoppertopImportFn = builtins.__import__
-    builtins.__import__ = _coppertopImportFn
+    installImportHook()
 
 
 
@@ -314,6 +369,7 @@ def makeFn(*args):
     else:
         raise TypeError('Wrong number of args passed to partial', ErrSite("#1"))
     modname, fnname, _, _, argNames, _, _, pass_tByT = _fnContext(pyfn, 'anon', name)
+    _modsWithFns.add(pyfn.__module__)
     if _t is Missing:
         _t = BTFn(BTTuple(*[_py] * len(argNames)), _py)
     tvfunc = _tvfunc(
@@ -322,6 +378,26 @@ def makeFn(*args):
     )
     return jones._unary(fnname, modname, Family(tvfunc), _UNDERSCORE)
 
+def selectFn(fn, *tArgs, guard=False):
+    # answers a BoundFn that calls the implementation fn would dispatch to for args of types tArgs, e.g.
+    # `addOne_ = selectFn(addOne, int)` then `[addOne_(x) for x in xs]`
+    if isinstance(fn, jones._pfn):
+        raise TypeError(f'Cannot select from a partial - {fn}', ErrSite("#1"))
+    family = fn.d if isinstance(fn, jones._fn) else fn
+    if not isinstance(family, Family):
+        raise TypeError(f'Expected a jones fn or Family - got {builtins.type(fn)}', ErrSite("#2"))
+    return family.select(tArgs, guard=guard)
+
+def mapFn(fn, xs):
+    # answers [fn(x) for x in xs] but dispatching once per distinct type in xs rather than once per element - see
+    # Family.map
+    if isinstance(fn, jones._pfn):
+        raise TypeError(f'Cannot map a partial - {fn}', ErrSite("#1"))
+    family = fn.d if isinstance(fn, jones._fn) else fn
+    if not isinstance(family, Family):
+        raise TypeError(f'Expected a jones fn or Family - got {builtins.type(fn)}', ErrSite("#2"))
+    return family.map(xs)
+
 @coppertop
 def sig(x):
     return ppSig(x)
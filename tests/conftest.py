@@ -0,0 +1,33 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import os, sys, pytest
+
+# the packages live in src and aren't installed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+def pytest_configure(config):
+    # check every dispatch's distances against jones' while testing
+    try:
+        from bones.ts import select
+    except ImportError:
+        return                          # no jones so nothing dispatches
+    select.VERIFY_DISTANCES_EVERY = 1
+
+
+@pytest.fixture(autouse=True)
+def _checkDispatchInvariants():
+    yield
+    if (metatypes := sys.modules.get('bones.ts.metatypes')) is not None:
+        assert not metatypes.NO_TBYT, 'the shared empty tByT has been written to'
+    if (select := sys.modules.get('bones.ts.select')) is None: return
+    divergences = select.distanceDivergences()['divergences']
+    select.clearDistanceDivergences()
+    assert not divergences, divergences
@@ -0,0 +1,67 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import asyncio, contextvars, threading
+
+from bones.core.context import context
+from bones.core.sentinels import Missing
+
+
+def test_nested_with_restores():
+    with context(_testFred=1):
+        with context(_testFred=2, _testJoe=3):
+            context._testFred += 1
+            assert (context._testFred, context._testJoe) == (3, 3)
+        assert (context._testFred, context._testJoe) == (1, Missing)
+    assert context._testFred is Missing
+
+
+def test_generator_resumed_in_another_context():
+    def gen():
+        with context(_testGen=1):
+            yield context._testGen
+        yield context._testGen
+
+    g = gen()
+    assert next(g) == 1
+    # the with exits in a copy of the context rather than the one it was entered in
+    assert contextvars.copy_context().run(next, g) is Missing
+    assert context._testGen == 1        # the generator's with was entered here and never exited here
+    with context(_testGen=2):
+        def nested():
+            with context(_testGen=3):
+                yield
+            yield context._testGen
+        n = nested()
+        next(n)
+        assert contextvars.copy_context().run(next, n) == 2
+
+
+def test_threads_and_tasks_are_isolated():
+    seen = {}
+    def inThread():
+        seen['thread'] = context._testIsolated
+        with context(_testIsolated='thread'):
+            seen['threadInside'] = context._testIsolated
+    with context(_testIsolated='main'):
+        t = threading.Thread(target=inThread)
+        t.start()
+        t.join()
+        assert context._testIsolated == 'main'
+
+    async def task(name):
+        with context(_testIsolated=name):
+            await asyncio.sleep(0)
+            return context._testIsolated
+    async def both():
+        return await asyncio.gather(task('a'), task('b'))
+
+    assert seen == {'thread': Missing, 'threadInside': 'thread'}
+    assert asyncio.run(both()) == ['a', 'b']
+    assert context._testIsolated is Missing
@@ -0,0 +1,122 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# the hand-written TypeLang parser must produce the same AST (SrcLocs included) as the ANTLR parser plus
+# TypeLangAstBuilder - and fail where it fails
+
+import pytest
+
+pytest.importorskip('antlr4')
+pytest.importorskip('bones.jones')
+
+from bones.ts.type_lang import parseTlWithAntlr
+from bones.ts._type_lang.ast_nodes import SrcLoc
+from bones.ts._type_lang.fast_parser import parseTl
+
+
+CONFORMANCE_SRCS = (
+    'a: atom',
+    'a: atom explicit',
+    'a: atom explicit in mem',
+    'a: atom in mem',
+    'a: atom implicitly b',
+    'a: atom in mem implicitly b',
+    'a: b: c: atom',
+    'a: b: atom in mem',
+    'a: atom in (b: atom in mem)',
+    'a: atom in (b: atom explicit in (c: atom))',
+    'a: tbc',
+    'a: tbc in mem',
+    'a: tbc in (m: atom)',
+    'a: b',
+    'a: b & c & d',
+    'a: b && c && d',
+    'a: b && c & d && e',
+    'a: b & c + d & e',
+    'a: b + c + d * e * f',
+    'a: b * c + d',
+    'a: (b & c) & d',
+    'a: (b + c) + (d + e)',
+    'a: b [c] [d]',
+    'a: b & c [d & e]',
+    'a: b [c + d]',
+    'a: b & c in d',
+    'a: b && c in d',
+    'a: b [c] in d',
+    'a: (b & c) in d',
+    'a: ((b [c])) in d',
+    'a: b & c in d & e',
+    'a: b & c in (d: atom)',
+    'a: b ^ c',
+    'a: b * c ^ d',
+    'a: b ^ c ^ d',
+    'a: b ** c ^ d ** e',
+    'a: b ** c ** d',
+    'a: N ** b',
+    'a: N1 ** b + c ^ d',
+    'a: Na ** N ** b',
+    'a: T1 ^ T2',
+    'a: T12 * T1a * T123 * Tx',
+    'a: {x: b, y: c & d, z: N ** e}',
+    'a: {{x: b, y: (c ^ d)}}',
+    'a: { x: {y: b} }',
+    'a: *(b)',
+    'a: *(b & c) + d',
+    'a: (b: atom) & c',
+    'a: atoms & tbcs & ins',
+    'a: atom\nb: a & c\n',
+    'a: atom\n  // a comment\nb: tbc\nb: a + b\n',
+    'a: atom\r\nb: a\r\n',
+    'b & c',
+    'a: atom\nb & c',
+    '(a: atom)',
+    'T1',
+    '((b))',
+    'a: atom\n*(b)',
+    'a: b\n{x: c}',
+    'a: b\nN ** c',
+    'a: b ** c & d [e] ^ f * g + h && i',
+    'a: b ** c ^ d & e [f] in g',
+    # errors
+    '',
+    'a:',
+    'a: b )',
+    'N: atom',
+    'a: Na',
+    'a: {x: {y: b}}',
+    'a: b in c',
+    'a: b: c',
+    'a: b: atom explicit',
+    'a: b *(c)',
+    'a: 1',
+)
+
+
+def _shape(x):
+    # a structural, comparable picture of an AST
+    if isinstance(x, (list, tuple)):
+        return type(x).__name__, tuple(_shape(e) for e in x)
+    if isinstance(x, SrcLoc):
+        return 'SrcLoc', x.l1, x.l2, x.s1, x.s2
+    if hasattr(x, '__slots__') and hasattr(x, 'loc'):
+        slots = [s for c in type(x).__mro__ for s in getattr(c, '__slots__', ())]
+        return type(x).__name__, tuple((s, _shape(getattr(x, s))) for s in slots)
+    return x
+
+
+def _shapeOrError(parse, src):
+    try:
+        return _shape(parse(src))
+    except Exception as ex:
+        return Exception
+
+
+@pytest.mark.parametrize('src', CONFORMANCE_SRCS)
+def test_conforms_with_antlr(src):
+    assert _shapeOrError(parseTl, src) == _shapeOrError(parseTlWithAntlr, src)
@@ -0,0 +1,78 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+pytest.importorskip('bones.jones')
+
+from bones.core.sentinels import Missing
+from bones.ts._type_lang import jones_type_manager
+from bones.ts._type_lang.jones_type_manager import JonesTypeManager, _OpMemo, opMemoStats
+from bones.ts.metatypes import BTAtom, weaken
+
+
+def _byId(types):
+    return tuple(sorted(types, key=lambda t: t.id))
+
+
+@pytest.fixture
+def tm():
+    return JonesTypeManager()       # a scratch type manager so nothing here leaks into sys._gtm
+
+
+def test_generation_moves_only_when_a_name_gets_a_different_btype(tm):
+    a = tm.atom('_tmGenA')
+    generation = tm.generation
+    assert tm.atom('_tmGenA').id == a.id            # re-declaring the same atom
+    assert tm.bind('_tmGenA', a).id == a.id
+    assert tm.generation == generation
+    # reserving then filling in a recursive type keeps the name on the same btype
+    r = tm.reserve()
+    tm.bind('_tmGenList', r)
+    assert tm.union(_byId((a, tm.seq(r))), btype=r).id == r.id
+    assert tm.bind('_tmGenList', r).id == r.id
+    assert tm.generation == generation
+
+
+def test_op_memo_is_bounded_and_dropped_when_the_generation_moves():
+    a, b = BTAtom('_tmMemoA'), BTAtom('_tmMemoB')
+    assert _OpMemo.keyFor('+', a, b) == ('+', a.id, b.id)
+    assert _OpMemo.keyFor('+', a, int) == ('+', a.id, int)
+    assert _OpMemo.keyFor('^', [a], b) is Missing
+    memo = _OpMemo(capacity=2)
+    assert memo.get(Missing) is Missing and memo.get(('+', 0, 0)) is Missing      # syncs the generation
+    for n, t in enumerate((a, b, a)):
+        memo.put(('+', n, n), t)
+    assert memo.get(('+', 0, 0)) is Missing and memo.get(('+', 2, 2)) is a      # the oldest was dropped
+    assert memo.stats()['evictions'] == 1 and memo.stats()['size'] == 2
+    weaken(BTAtom('_tmMemoGenA'), BTAtom('_tmMemoGenB'))
+    assert memo.get(('+', 2, 2)) is Missing and memo.stats()['size'] == 0
+    empty = _OpMemo(capacity=0)
+    empty.put(('+', 0, 0), a)
+    assert empty.stats()['size'] == 0
+
+
+def test_operators_answer_from_the_memo():
+    a, b = BTAtom('_tmMemoOpA'), BTAtom('_tmMemoOpB')
+    first = a + b
+    hits = opMemoStats()['hits']
+    assert (a + b).id == first.id and (a & b).id == (a & b).id
+    assert opMemoStats()['hits'] >= hits + 2
+
+
+def test_btype_by_id_grows_in_place():
+    registry, chunk = jones_type_manager._BTypeById, jones_type_manager.BTYPE_BY_ID_CHUNK
+    size, grows = len(registry), jones_type_manager.btypeByIdStats()['grows']
+    jones_type_manager._growBTypeById(size + 3)
+    assert jones_type_manager._BTypeById is registry          # the C side and importers hold the one list
+    assert len(registry) == size + chunk and len(registry) % chunk == 0
+    assert registry[size + 3] is Missing
+    assert jones_type_manager.btypeByIdStats()['grows'] == grows + 1
+    t = BTAtom('_tmRegistryNew')
+    assert registry[t.id] is not Missing
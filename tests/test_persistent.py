@@ -0,0 +1,142 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+from coppertop._persistent import PVector, PMap, persist, unpersist, _Collision, _WIDTH
+
+
+class _Key:
+    # a key whose hash is chosen so keys can be made to collide
+    __slots__ = ['name', 'h']
+
+    def __init__(self, name, h):
+        self.name, self.h = name, h
+
+    def __hash__(self):
+        return self.h
+
+    def __eq__(self, other):
+        return isinstance(other, _Key) and other.name == self.name
+
+    def __repr__(self):
+        return f'_Key({self.name!r})'
+
+
+def _assertMatches(v, xs):
+    assert len(v) == len(xs)
+    assert list(v) == xs
+    assert [v[i] for i in range(len(xs))] == xs
+    if xs: assert v[-1] == xs[-1]
+
+
+# the tail fills at 32, the root fills at 1024 + 32 and grows a level on the next append
+_BOUNDARIES = (0, 1, _WIDTH - 1, _WIDTH, _WIDTH + 1, 2 * _WIDTH, 2 * _WIDTH + 1, _WIDTH * _WIDTH + _WIDTH,
+    _WIDTH * _WIDTH + _WIDTH + 1, 2 * _WIDTH * _WIDTH + 3)
+
+
+@pytest.mark.parametrize('n', _BOUNDARIES)
+def test_vector_agrees_with_list_across_boundaries(n):
+    xs = list(range(n))
+    v = PVector(xs)
+    _assertMatches(v, xs)
+    _assertMatches(PVector().extend(xs), xs)
+    _assertMatches(v.append(-1), xs + [-1])
+    with pytest.raises(IndexError):
+        v[n]
+    for i in sorted({0, n // 2, n - 1}) if n else ():
+        ys = list(xs)
+        ys[i] = 'x'
+        _assertMatches(v.set(i, 'x'), ys)
+        _assertMatches(v.delete(i), xs[:i] + xs[i + 1:])
+    _assertMatches(v, xs)                       # untouched by the updates
+
+
+def test_vector_trie_depth():
+    v = PVector(range(_WIDTH))
+    assert (len(v._tail), v._root) == (_WIDTH, [])
+    v = v.append(_WIDTH)
+    assert len(v._root) == 1 and len(v._tail) == 1
+    v = PVector(range(_WIDTH * _WIDTH + _WIDTH))
+    assert (v._shift, len(v._root), len(v._tail)) == (5, _WIDTH, _WIDTH)
+    w = v.append('x')
+    assert (w._shift, len(w._root), len(w._tail)) == (10, 2, 1)
+    assert w._root[0] is v._root                # the old root is pushed down intact
+    assert w[_WIDTH * _WIDTH + _WIDTH - 1] == _WIDTH * _WIDTH + _WIDTH - 1 and w[-1] == 'x'
+
+
+def test_vector_updates_share_structure():
+    v = PVector(range(10 * _WIDTH + 1))
+    w = v.set(0, 'x')
+    assert w._root is not v._root and w._root[0] is not v._root[0]
+    assert all(w._root[i] is v._root[i] for i in range(1, len(v._root)))
+    assert w._tail is v._tail
+    u = v.set(-1, 'y')                          # in the tail so the trie is shared whole
+    assert u._root is v._root and u._tail is not v._tail
+    a = v.append('z')                           # the tail isn't full so only it is copied
+    assert a._root is v._root and v._tail == [10 * _WIDTH]
+    full = PVector(range(10 * _WIDTH))
+    pushed = full.append('z')                   # pushing the full tail into the trie keeps the leaves
+    assert all(pushed._root[i] is full._root[i] for i in range(len(full._root))) and pushed._root[-1] is full._tail
+    assert (v[0], v[-1], len(v)) == (0, 10 * _WIDTH, 10 * _WIDTH + 1)
+
+
+def test_map_collisions():
+    a, b, c = _Key('a', 42), _Key('b', 42), _Key('c', 42)
+    m = PMap().set(a, 1).set(b, 2).set(c, 3)
+    assert len(m) == 3 and (m[a], m[b], m[c]) == (1, 2, 3)
+    assert m.get(_Key('d', 42), 'none') == 'none'
+    assert m._root[1].__class__ is _Collision
+    assert m.set(b, 2) is m
+    m2 = m.set(b, 20)
+    assert (m2[b], m[b], len(m2)) == (20, 2, 3)
+    # a key whose hash shares the first fragment but not the whole hash splits the collision node
+    d = _Key('d', 42 + _WIDTH)
+    m3 = m.set(d, 4)
+    assert len(m3) == 4 and m3.todict() == {a: 1, b: 2, c: 3, d: 4}
+    m4 = m3.delete(a).delete(c)
+    assert len(m4) == 2 and m4.todict() == {b: 2, d: 4} and a not in m4
+    with pytest.raises(KeyError):
+        m4.delete(a)
+    assert m4.discard(a) is m4
+    assert m.todict() == {a: 1, b: 2, c: 3}    # untouched by the updates
+    empty = m4.delete(b).delete(d)
+    assert len(empty) == 0 and empty == {}
+
+
+def test_map_agrees_with_dict():
+    d, m = {}, PMap()
+    for i in range(3000):
+        k = i * 7919 % 2000
+        d[k], m = i, m.set(k, i)
+    for k in range(0, 2000, 3):
+        d.pop(k, None)
+        m = m.discard(k)
+    assert len(m) == len(d) and m == d and m.todict() == d
+    assert all(m[k] == v for k, v in d.items())
+
+
+def test_map_updates_share_structure():
+    m = PMap((i, i) for i in range(1000))
+    m2 = m.set(0, 'x')
+    shared = [e for e, e2 in zip(m._root[1:], m2._root[1:]) if e is e2]
+    assert len(shared) == len(m._root) - 2      # only the path to 0 was copied
+    assert (m[0], m2[0]) == (0, 'x')
+
+
+def test_persist_round_trips():
+    x = {'a': [1, 2, {'b': [3, (4, 5)]}], 'c': {'d': []}, 'e': 'f', 'g': list(range(100))}
+    p = persist(x)
+    assert p.__class__ is PMap and p['a'].__class__ is PVector and p['a'][2].__class__ is PMap
+    assert p['a'][2]['b'][1] == (4, 5)          # tuples are left as they are
+    assert p['c']['d'].__class__ is PVector and len(p['c']['d']) == 0
+    back = unpersist(p)
+    assert back == x and back['a'][2]['b'].__class__ is list
+    assert unpersist(persist([[], {}, 1])) == [[], {}, 1]
+    assert persist(1) == 1 and unpersist('s') == 's'
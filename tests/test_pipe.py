@@ -0,0 +1,92 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import builtins, importlib, json, sys
+import pytest
+
+pytest.importorskip('bones.jones')
+
+from coppertop import pipe
+from coppertop.pipe import installImportHook, uninstallImportHook, scopeImportHook, CoppertopImportError
+
+
+@pytest.fixture
+def hookInstalled():
+    installImportHook()
+    yield
+    installImportHook()
+
+
+def test_install_and_uninstall(hookInstalled):
+    assert builtins.__import__ is sys._coppertopImportFn
+    uninstallImportHook()
+    assert builtins.__import__ is sys._preCoppertopImportFn
+    uninstallImportHook()                   # already uninstalled so nothing to do
+    installImportHook()
+    installImportHook()                     # already installed so mustn't chain onto itself
+    assert builtins.__import__ is sys._coppertopImportFn
+    assert sys._preCoppertopImportFn is not sys._coppertopImportFn
+
+
+def test_uninstall_under_another_hook_raises(hookInstalled):
+    ours = builtins.__import__
+    def otherHook(*args, **kwargs):
+        return ours(*args, **kwargs)
+    builtins.__import__ = otherHook
+    try:
+        with pytest.raises(CoppertopImportError):
+            uninstallImportHook()
+        installImportHook()                 # still installed beneath otherHook
+        assert builtins.__import__ is otherHook
+    finally:
+        builtins.__import__ = ours
+    uninstallImportHook()
+    assert builtins.__import__ is sys._preCoppertopImportFn
+
+
+def test_fast_path_answers_the_module_untouched(hookInstalled):
+    g = {'__name__': '_testPipeUntracked'}
+    assert pipe._coppertopImportFn('json', g, None, ('dumps',), 0) is json
+    assert '_testPipeUntracked' not in pipe._modsWithFns
+
+
+def _writePackage(root, name, files):
+    (root / name).mkdir()
+    for filename, source in files.items():
+        (root / name / filename).write_text(source)
+
+_DEFINES_F = '''
+from coppertop.pipe import coppertop
+@coppertop
+def f(x: {0}) -> {0}:
+    return x
+'''
+
+
+def test_reexports_from_packages_outside_the_scope_are_tracked(hookInstalled, tmp_path, monkeypatch):
+    # _testPipeLibA and _testPipeLibB each re-export an f defined in their _impl, _testPipeApp.main imports both
+    for name, tArg in (('_testPipeLibA', 'int'), ('_testPipeLibB', 'str')):
+        _writePackage(tmp_path, name, {'__init__.py': 'from ._impl import f\n', '_impl.py': _DEFINES_F.format(tArg)})
+    _writePackage(tmp_path, '_testPipeApp', {
+        '__init__.py': '',
+        'main.py': 'from _testPipeLibA import f\nfrom _testPipeLibB import f\n',
+    })
+    monkeypatch.syspath_prepend(str(tmp_path))
+    scopeImportHook('_testPipeApp')
+    try:
+        main = importlib.import_module('_testPipeApp.main')
+        assert '_testPipeLibA' in pipe._modsWithFns and '_testPipeApp.main' in pipe._modsWithFns
+        assert main.f(1) == 1 and main.f('a') == 'a'
+        assert len(main.f.d._overloadByNumArgs[1]) == 2
+        # the libraries are out of scope so weren't overloaded into
+        assert len(sys.modules['_testPipeLibA'].f.d._overloadByNumArgs[1]) == 1
+    finally:
+        scopeImportHook()
+        for name in [n for n in sys.modules if n.startswith(('_testPipeLib', '_testPipeApp'))]:
+            del sys.modules[name]
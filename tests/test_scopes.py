@@ -0,0 +1,143 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import threading
+
+import coppertop._scopes as scopes
+from coppertop._scopes import _CoWScope, _rawTarget
+
+
+class Obj: pass
+
+
+def _copiesDuring(fn):
+    numCopies = scopes._numCopies
+    fn()
+    return scopes._numCopies - numCopies
+
+
+def test_unique_write_is_in_place():
+    _ = _CoWScope()
+    def writes():
+        _._adopt('big', list(range(1000)))
+        _.big[0] = 5
+        for i in range(10): _.big[i] = -i
+    assert _copiesDuring(writes) == 0
+    # assigned values are copied on the first write only
+    _.d = {'a': 1}
+    def writeD():
+        _.d['b'] = [1, 2]
+        _.d['b'][0] = 3
+        _.d['a'] = 2
+    assert _copiesDuring(writeD) == 2       # d then the [1, 2] put in it
+    assert _copiesDuring(writeD) == 1       # just the new [1, 2]
+    assert _rawTarget(_.big)[0:3] == [0, -1, -2] and _.d['b'][0] == 3
+
+
+def test_assigned_values_are_not_changed():
+    _ = _CoWScope()
+    myList, obj, nested = [1, 2], Obj(), {'a': {'b': 1}}
+    obj.v = [1]
+    _.l, _.o, _.n = myList, obj, nested
+    _.l[0] = 10
+    _.o.v[0] = 10
+    _.o.w = 2
+    _.n['a']['b'] = 10
+    assert myList == [1, 2] and obj.v == [1] and not hasattr(obj, 'w') and nested == {'a': {'b': 1}}
+    assert _rawTarget(_.l) == [10, 2] and _rawTarget(_.o.v) == [10] and _.o.w == 2 and _.n['a']['b'] == 10
+
+
+def test_write_copies_while_a_view_is_held():
+    _ = _CoWScope()
+    _.fred = [1, [2, 3]]
+    held, heldInner = _.fred, _.fred[1]
+    def write(): _.fred[0] = 10
+    assert _copiesDuring(write) == 1
+    _.fred[1][0] = 20
+    assert _rawTarget(held) == [1, [2, 3]] and _rawTarget(heldInner) == [2, 3]
+    assert _rawTarget(_.fred) == [10, [20, 3]]
+    del held, heldInner
+    assert _copiesDuring(write) == 0
+
+
+def test_raw_handout_freezes_just_that_value():
+    _ = _CoWScope()
+    _._adopt('fred', [1, [2]])
+    _._adopt('joe', [3])
+    raw = _.fred._target
+    def writeJoe(): _.joe[0] = 5
+    assert _copiesDuring(writeJoe) == 0     # untouched by fred escaping so still in place
+    _.fred[1][0] = 9
+    assert raw == [1, [2]] and _rawTarget(_.fred) == [1, [9]]
+    elements = [e for e in _.fred]
+    _.fred[1][0] = 10
+    assert elements[1] == [9]
+    joe = _._target['joe']
+    _.joe[0] = 6
+    assert joe == [5] and _rawTarget(_.joe) == [6]
+    _._freeze()
+    assert _copiesDuring(writeJoe) == 1
+
+
+def test_containers_reached_through_an_attribute():
+    _ = _CoWScope()
+    _.o = Obj()
+    _.o.v = [1, 2, 3]
+    _.o.v[0] = 9
+    assert _rawTarget(_.o.v) == [9, 2, 3]
+    held = _.o.v
+    _.o.v[1] = 7
+    assert _rawTarget(held) == [9, 2, 3] and _rawTarget(_.o.v) == [9, 7, 3]
+    raw = _.o._target
+    _.o.v[2] = 8
+    assert raw.v == [9, 7, 3] and _rawTarget(_.o.v) == [9, 7, 8]
+
+
+def test_assigning_a_value_twice_shares_it():
+    _ = _CoWScope()
+    x = [1]
+    _.a = x
+    _.b = x
+    _.a[0] = 2
+    assert _rawTarget(_.b) == [1] and _rawTarget(_.a) == [2]
+
+
+def test_views_across_threads():
+    # concurrent writers to the same value may each see the other's proxy as a view, and so each copy, but a held
+    # view must never change under its holder and the view counts must come back to zero
+    _ = _CoWScope()
+    _.fred = list(range(100))
+    changed = []
+    def readAndWrite(i):
+        for j in range(200):
+            held = _.fred
+            before = list(_rawTarget(held))
+            _.fred[i] = j
+            if _rawTarget(held) != before: changed.append((i, j))
+    threads = [threading.Thread(target=readAndWrite, args=(i,)) for i in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not changed
+    assert all(entry[1] == 0 for entry in _._owned.values())
+
+
+def test_escaping_reads_keep_the_container_owned():
+    _ = _CoWScope()
+    _.d = dict.fromkeys(range(1000), 0)
+    _.d[0] = [1]
+    def readsAndWrites():
+        for i in range(1000):
+            _.d.get(i)
+            for k in _.d: break
+            _.d[i] = i
+    assert _copiesDuring(readsAndWrites) == 0
+    _.d['x'] = [1]
+    inner = _.d.get('x')
+    _.d['x'][0] = 2
+    assert inner == [1] and _rawTarget(_.d)['x'] == [2]
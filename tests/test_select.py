@@ -0,0 +1,338 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import builtins, itertools
+import pytest
+
+pytest.importorskip('bones.jones')
+
+from bones import jones
+from bones.core.errors import ProgrammerError
+from bones.core.sentinels import Missing
+from bones.lang.types import unary, binary
+from bones.ts.core import BTypeError
+from bones.ts.metatypes import BTAtom, BTFn, BTTuple, BTUnion, BTIntersection, _btypeByClass, weaken
+from bones.ts import select
+from bones.ts.select import Family, Overload, BoundFn, _tvfunc, _SelectionCache, _distancesEtAl, _comparableDistances, \
+    py
+from coppertop._scopes import _UNDERSCORE
+from coppertop.pipe import selectFn, mapFn
+
+
+class Cat: pass
+class Dog: pass
+class Word(str): pass
+
+catT, dogT, wordT = (BTAtom(f'_testSelect{c.__name__}') for c in (Cat, Dog, Word))
+_btypeByClass.update({Cat: catT, Dog: dogT, Word: wordT})
+
+
+def _tvfuncFor(name, pyfn, tArgs, tRet, style=unary):
+    return _tvfunc(
+        name=name, modname=__name__, style=style, _v=pyfn, dispatchEvenIfAllTypes=False, typeHelper=Missing,
+        _t=BTFn(BTTuple(*tArgs), tRet), argNames=[f'x{i}' for i in range(len(tArgs))], pass_tByT=False
+    )
+
+def _speakFns():
+    # cat, dog and the py fallback
+    return (
+        _tvfuncFor('speak', lambda x: Word('meow'), (catT,), wordT),
+        _tvfuncFor('speak', lambda x: Word('woof'), (dogT,), wordT),
+        _tvfuncFor('speak', lambda x: Word('...'), (py,), wordT),
+    )
+
+def _classesWithTypes(prefix, n):
+    # n classes each with its own BType, all of which fall back to py
+    classes = [builtins.type(f'{prefix}{i}', (), {}) for i in range(n)]
+    _btypeByClass.update({c: BTAtom(f'_testSelect{prefix}{i}') for i, c in enumerate(classes)})
+    return classes
+
+
+# **********************************************************************************************************************
+# _SelectionCache
+# **********************************************************************************************************************
+
+def test_cache_counts_hits_and_misses():
+    catFn, dogFn, pyFn = _speakFns()
+    overload = Family(catFn, dogFn, pyFn)._overloadByNumArgs[1]
+    for _ in range(3):
+        assert overload.selectFunction(Cat())[0] is catFn
+    assert overload.selectFunction(Dog())[0] is dogFn
+    stats = overload.cacheStats()
+    assert (stats['misses'], stats['hits'], stats['size']) == (2, 2, 2)
+
+
+def test_cache_is_bounded_with_l1_pinned():
+    pyFn = _speakFns()[2]
+    overload = Family(pyFn)._overloadByNumArgs[1]
+    overload.cache = cache = _SelectionCache(1, capacity=8, size=2)
+    classes = _classesWithTypes('Bounded', 30)
+    for c in classes:
+        assert overload.selectFunction(c())[0] is pyFn
+    stats = overload.cacheStats()
+    assert stats['size'] <= 8 and stats['evictions'] > 0 and stats['l1Used'] == 2
+    # the pinned results are answered from L1 without a further selection
+    idOf = lambda c: cache.idByTArgs.get((_btypeByClass[c],), Missing)
+    pinned = [c for c in classes if idOf(c) is not Missing and cache.pinned[idOf(c) - 1]]
+    assert len(pinned) == 2
+    for c in pinned:
+        assert overload.selectFunction(c())[0] is pyFn
+    assert overload.cacheStats()['hits'] == stats['hits'] + 2
+    assert overload.cacheStats()['misses'] == stats['misses']
+
+
+def test_cache_eviction_gives_referenced_results_a_second_chance():
+    pyFn = _speakFns()[2]
+    overload = Family(pyFn)._overloadByNumArgs[1]
+    overload.cache = cache = _SelectionCache(1, capacity=4, size=1)
+    classes = _classesWithTypes('Clock', 5)
+    for c in classes[:4]:
+        overload.selectFunction(c())
+    idOf = lambda c: cache.idByTArgs.get((_btypeByClass[c],), Missing)
+    unpinned = [c for c in classes[:4] if not cache.pinned[idOf(c) - 1]]
+    touched = unpinned[0]
+    overload.selectFunction(touched())          # an L2 hit sets its ref bit
+    assert cache.refs[idOf(touched) - 1]
+    overload.selectFunction(classes[4]())       # the cache is full so this sweeps
+    assert cache.evictions >= 1
+    assert idOf(touched) is not Missing
+    assert all(idOf(c) is not Missing for c in classes[:4] if c not in unpinned)
+    assert sum(idOf(c) is Missing for c in unpinned[1:]) == cache.evictions
+
+
+def test_cache_is_invalidated_by_the_generation():
+    catFn, dogFn, pyFn = _speakFns()
+    overload = Family(catFn, dogFn, pyFn)._overloadByNumArgs[1]
+    overload.selectFunction(Cat())
+    before = overload.cacheStats()
+    weaken(BTAtom('_testSelectGenA'), BTAtom('_testSelectGenB'))
+    assert overload.selectFunction(Cat())[0] is catFn
+    after = overload.cacheStats()
+    assert after['invalidations'] == before['invalidations'] + 1
+    assert after['misses'] == before['misses'] + 1      # reselected rather than answered from the stale result
+    assert overload.selectFunction(Cat())[0] is catFn
+    assert overload.cacheStats()['misses'] == after['misses']
+
+
+def test_reselect_after_adding_a_nearer_fn():
+    catFn, dogFn, pyFn = _speakFns()
+    overload = Family(pyFn)._overloadByNumArgs[1]
+    assert overload.selectFunction(Cat())[0] is pyFn
+    overload[catFn.sig] = catFn
+    assert overload.selectFunction(Cat())[0] is catFn
+    assert overload.cacheStats()['invalidations'] == 1
+
+
+# **********************************************************************************************************************
+# _DispatchTable
+# **********************************************************************************************************************
+
+def _priorSelect(overload, callerSig):
+    # the linear scan over every signature that _DispatchTable replaced, answering (fn, schemaVars, distance) or the
+    # type of the exception it would raise
+    fallbacks, matches = [], []
+    for fnSig, fn in overload.items():
+        match, fallback, schemaVars, argDistances = _distancesEtAl(callerSig, fnSig)
+        if match:
+            if (distance := sum(argDistances)) == 0: return fn, schemaVars, distance
+            (fallbacks if fallback else matches).append((fn, schemaVars, distance))
+    for found in (matches, fallbacks):
+        if found:
+            found.sort(key=lambda x: x[2])
+            return found[0] if len(found) == 1 or found[0][2] != found[1][2] else TypeError
+    return BTypeError
+
+def _select(overload, callerSig):
+    try:
+        fn, schemaVars, distance, argDistances = overload._selectFunction(callerSig)
+        return fn, schemaVars, distance
+    except Exception as ex:
+        return builtins.type(ex)
+
+
+def test_table_agrees_with_the_linear_scan():
+    a, b, c, d = (BTAtom(f'_testSelectTable{n}') for n in 'ABCD')
+    weaken(a, b)
+    aOrB = BTUnion(a, b)
+    sigs = [(a, a), (aOrB, b), (py, c), (aOrB, py), (c, aOrB), (BTIntersection(a, c), py), (py, py)]
+    fns = [_tvfuncFor('pair', lambda x, y: Word('.'), sig, wordT, binary) for sig in sigs]
+    overload = Family(*fns)._overloadByNumArgs[2]
+    callerTs = [a, b, c, d, aOrB, BTIntersection(a, c), BTIntersection(b, c)]
+    compared = 0
+    for callerSig in itertools.product(callerTs, callerTs):
+        assert _select(overload, callerSig) == _priorSelect(overload, callerSig), callerSig
+        # every signature the table distances as a match is a candidate, and its distances are the reference's
+        table = overload._dispatch
+        fitsByArg = table.fitsByArg(callerSig)
+        candidates = set(table.candidates(fitsByArg))
+        for j, fnSig in enumerate(table.sigs):
+            expected = _distancesEtAl(callerSig, fnSig)
+            assert _comparableDistances(table.distancesEtAl(j, fitsByArg)) == _comparableDistances(expected)
+            assert not expected[0] or j in candidates
+        compared += 1
+    assert compared == 49
+
+
+def test_table_is_rebuilt_when_stale():
+    catFn, dogFn, pyFn = _speakFns()
+    overload = Family(catFn, pyFn)._overloadByNumArgs[1]
+    overload._selectFunction((catT,))
+    assert overload._dispatch is not Missing
+    overload[dogFn.sig] = dogFn
+    assert overload._dispatch is Missing
+    assert overload._selectFunction((dogT,))[0] is dogFn
+    table = overload._dispatch
+    weaken(BTAtom('_testSelectStaleA'), BTAtom('_testSelectStaleB'))
+    assert overload._selectFunction((catT,))[0] is catFn
+    assert overload._dispatch is not table
+
+
+# **********************************************************************************************************************
+# BoundFn
+# **********************************************************************************************************************
+
+def test_select_resolves_once():
+    speak = Family(*_speakFns())
+    bound = speak.select((Cat,))
+    assert isinstance(bound, BoundFn) and bound(Cat()) == 'meow'
+    assert speak.select((catT,)).tvfunc is bound.tvfunc
+    assert speak.select((Word,))(Word('hi')) == '...'
+    assert bound(Dog()) == 'meow'               # unguarded so the selection isn't rechecked
+    with pytest.raises(BTypeError):
+        speak.select((Cat, Cat))                # no 2 arg overload
+
+
+def test_guarded_select_rechecks_the_class():
+    speak = Family(*_speakFns())
+    guarded = speak.select((Cat,), guard=True)
+    assert guarded(Cat()) == 'meow'
+    with pytest.raises(BTypeError):
+        guarded(Dog())
+    with pytest.raises(TypeError):
+        guarded(Cat(), Cat())
+    # resolved from a BType the class is learnt on the first call
+    guarded = speak.select((catT,), guard=True)
+    assert guarded._classes is Missing
+    assert guarded(Cat()) == 'meow' and guarded._classes == (Cat,)
+
+
+def test_select_fn():
+    family = Family(*_speakFns())
+    speak = jones._unary('speak', __name__, family, _UNDERSCORE)
+    assert selectFn(speak, Dog)(Dog()) == 'woof'
+    assert selectFn(family, Cat)(Cat()) == 'meow'
+    with pytest.raises(BTypeError):
+        selectFn(speak, Dog, guard=True)(Cat())
+    with pytest.raises(TypeError):
+        selectFn(len, Cat)
+
+
+# **********************************************************************************************************************
+# Family.map
+# **********************************************************************************************************************
+
+def test_map_answers_in_input_order():
+    calls = []
+    def says(word):
+        def fn(x):
+            calls.append(x)
+            return Word(word)
+        return fn
+    speak = Family(
+        _tvfuncFor('speak', says('meow'), (catT,), wordT),
+        _tvfuncFor('speak', says('woof'), (dogT,), wordT),
+        _tvfuncFor('speak', says('...'), (py,), wordT),
+    )
+    xs = [Cat(), Dog(), Word('hi'), Cat(), Dog()]
+    assert speak.map(xs) == ['meow', 'woof', '...', 'meow', 'woof']
+    assert calls == xs
+    assert speak.map(tuple(xs)) == ('meow', 'woof', '...', 'meow', 'woof')
+    assert speak.map([]) == []
+
+
+def test_map_selects_once_per_type(monkeypatch):
+    numSelections = 0
+    priorSelectFunction = Overload._selectFunction
+    def countingSelectFunction(self, callerSig):
+        nonlocal numSelections
+        numSelections += 1
+        return priorSelectFunction(self, callerSig)
+    monkeypatch.setattr(Overload, '_selectFunction', countingSelectFunction)
+    speak = Family(*_speakFns())
+    speak.map([Cat(), Dog(), Cat(), Word('hi'), Dog(), Cat()])
+    assert numSelections == 3
+
+
+def test_map_checks_the_return_type(monkeypatch):
+    liar = Family(_tvfuncFor('liar', lambda x: Dog(), (catT,), wordT))
+    with pytest.raises(BTypeError):
+        liar.map([Cat()])
+    monkeypatch.setattr(select, 'DISABLE_RETURN_CHECK', True)
+    assert isinstance(liar.map([Cat()])[0], Dog)
+
+
+def test_map_numpy_object_arrays():
+    np = pytest.importorskip('numpy')
+    xs = np.empty((2, 2), dtype=object)
+    xs[0, 0], xs[0, 1], xs[1, 0], xs[1, 1] = Cat(), Dog(), Dog(), Cat()
+    answer = Family(*_speakFns()).map(xs)
+    assert isinstance(answer, np.ndarray) and answer.shape == (2, 2)
+    assert answer.tolist() == [['meow', 'woof'], ['woof', 'meow']]
+
+
+def test_map_fn():
+    family = Family(*_speakFns())
+    speak = jones._unary('speak', __name__, family, _UNDERSCORE)
+    assert mapFn(speak, [Dog(), Cat()]) == ['woof', 'meow']
+    assert mapFn(family, (Cat(),)) == ('meow',)
+    with pytest.raises(TypeError):
+        mapFn(len, [Cat()])
+
+
+# **********************************************************************************************************************
+# Family construction
+# **********************************************************************************************************************
+
+def test_extending_leaves_the_source_family_alone():
+    catFn, dogFn, pyFn = _speakFns()
+    one = Family(catFn)
+    two = Family(one, dogFn)
+    three = Family(two, Family(pyFn))
+    assert [len(f._overloadByNumArgs[1]) for f in (one, two, three)] == [1, 2, 3]
+    assert three._overloadByNumArgs[1].selectFunction(Word('hi'))[0] is pyFn
+    assert two._overloadByNumArgs[1].selectFunction(Dog())[0] is dogFn
+    with pytest.raises(ProgrammerError):
+        Family(one, _tvfuncFor('growl', lambda x: Word('grr'), (dogT,), wordT))
+
+
+def test_the_btfamily_is_built_lazily():
+    catFn, dogFn, pyFn = _speakFns()
+    speak = Family(Family(catFn), dogFn)
+    assert speak._t_ is Missing
+    assert speak._t is not Missing and speak._t_ is speak._t
+
+
+def test_shared_overloads_are_copied_before_mutation():
+    catFn, dogFn, pyFn = _speakFns()
+    pairFn = _tvfuncFor('speak', lambda x, y: Word('purr'), (catT, catT), wordT)
+    one = Family(catFn, pairFn)
+    two = Family(one, dogFn)
+    # only the overload gaining a tvfunc is copied
+    assert two._overloadByNumArgs[1] is not one._overloadByNumArgs[1]
+    assert two._overloadByNumArgs[2] is one._overloadByNumArgs[2]
+    # so neither family hands out the shared overload for mutation
+    overload = two.getOverload(2)
+    assert overload is not one._overloadByNumArgs[2]
+    overload[(dogT, dogT)] = _tvfuncFor('speak', lambda x, y: Word('yap'), (dogT, dogT), wordT)
+    assert len(one._overloadByNumArgs[2]) == 1 and len(two._overloadByNumArgs[2]) == 2
+    assert one.getOverload(2) is one.getOverload(2)
+    three = Family(one, pyFn)
+    assert one.getOverload(2) is not three._overloadByNumArgs[2]
+    # overloads the family made itself aren't copied
+    assert two.getOverload(1) is two._overloadByNumArgs[1] and two.getOverload(3) is two.getOverload(3)
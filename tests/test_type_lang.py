@@ -0,0 +1,41 @@
+# **********************************************************************************************************************
+# Copyright 2025 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+pytest.importorskip('bones.jones')
+
+from bones.ts.type_lang import TypeLangInterpreter
+from bones.ts._type_lang.jones_type_manager import JonesTypeManager
+
+
+@pytest.fixture
+def tli():
+    return TypeLangInterpreter(JonesTypeManager())      # scratch so nothing here leaks into sys._gtm
+
+
+def test_pure_sources_are_memoised(tli):
+    tli.eval('_tlMemoA: atom')
+    tli.eval('_tlMemoB: atom')
+    assert tli.memoStats()['size'] == 0                 # binding sources aren't memoised
+    union = tli.eval('_tlMemoA + _tlMemoB')
+    assert tli.eval('_tlMemoA  +\n  _tlMemoB').id == union.id
+    stats = tli.memoStats()
+    assert (stats['hits'], stats['size']) == (1, 1)
+    tli.eval('_tlMemoC: _tlMemoA & _tlMemoB')
+    assert tli.memoStats()['size'] == 1
+
+
+def test_memo_is_dropped_when_the_generation_moves(tli):
+    tli.eval('_tlMemoA: atom')
+    a = tli.eval('_tlMemoA')
+    tli._tm.generation += 1                             # as a rebind to a different btype would
+    assert tli.eval('_tlMemoA').id == a.id
+    stats = tli.memoStats()
+    assert (stats['hits'], stats['invalidations']) == (0, 1)